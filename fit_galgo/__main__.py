@@ -0,0 +1,5 @@
+import sys
+
+from fit_galgo.cli import main
+
+sys.exit(main())
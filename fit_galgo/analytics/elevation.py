@@ -0,0 +1,151 @@
+import math
+from array import array
+from collections.abc import Sequence
+from typing import NamedTuple
+
+NAN = float("nan")
+
+# Meters the altitude must change to count as gain or loss (hysteresis), so
+# the noise of the altitude doesn't add up.
+ELEVATION_THRESHOLD = 3.0
+# Records of the (centered) moving average that smooths the altitudes.
+SMOOTHING_WINDOW = 5
+# Min meters between the points used to compute the grade.
+GRADE_DISTANCE = 10.0
+
+
+class ElevationStats(NamedTuple):
+    max: float
+    min: float
+    gain: float
+    loss: float
+
+
+class Hysteresis:
+    """Gain and loss of the altitudes added, ignoring changes under threshold."""
+    __slots__ = ("threshold", "reference", "gain", "loss")
+
+    def __init__(self, threshold: float = ELEVATION_THRESHOLD) -> None:
+        self.threshold: float = threshold
+        self.reference: float = NAN
+        self.gain: float = 0.0
+        self.loss: float = 0.0
+
+    def add(self, altitude: float) -> None:
+        if math.isnan(altitude):
+            return
+        if math.isnan(self.reference):
+            self.reference = altitude
+        elif altitude - self.reference >= self.threshold:
+            self.gain += altitude - self.reference
+            self.reference = altitude
+        elif self.reference - altitude >= self.threshold:
+            self.loss += self.reference - altitude
+            self.reference = altitude
+
+
+class ElevationProfile(NamedTuple):
+    """Elevation of the records of an activity.
+
+    gains and losses are cumulative (up to each record), so the gain and loss
+    of any range of records (a lap, a split) is a subtraction.
+    """
+    altitudes: Sequence[float]  # raw altitudes (NaN if unknown)
+    smoothed: array
+    grades: array  # in %
+    gains: array
+    losses: array
+
+    @property
+    def stats(self) -> ElevationStats:
+        return self.between(0, len(self.altitudes))
+
+    def between(self, start: int, end: int) -> ElevationStats:
+        """Stats of the records from start to end (exclusive).
+
+        The gain and loss are the ones reached from the previous record.
+        """
+        if end <= start:
+            return ElevationStats(NAN, NAN, 0.0, 0.0)
+        known: list[float] = [
+            a for a in self.altitudes[start:end] if not math.isnan(a)
+        ]
+        before: int = start - 1
+        return ElevationStats(
+            max=max(known) if known else NAN,
+            min=min(known) if known else NAN,
+            gain=self.gains[end - 1] - (self.gains[before] if before >= 0 else 0.0),
+            loss=self.losses[end - 1] - (self.losses[before] if before >= 0 else 0.0)
+        )
+
+
+def elevation_profile(
+        altitudes: Sequence[float],
+        distances: Sequence[float] | None = None,
+        window: int = SMOOTHING_WINDOW,
+        threshold: float = ELEVATION_THRESHOLD,
+        grade_distance: float = GRADE_DISTANCE
+) -> ElevationProfile:
+    """Compute the elevation profile in a single pass over the altitudes.
+
+    :altitudes Sequence[float]: altitudes of the records (NaN if unknown).
+    :distances Sequence[float]: distances of the records (to compute grades,
+                                NaN if unknown).
+    :window int: records of the centered moving average (1 to not smooth).
+    :threshold float: hysteresis of the gain and loss (over smoothed values).
+    :grade_distance float: min meters between the points of a grade.
+    """
+    size: int = len(altitudes)
+    half: int = max(window, 1) // 2
+    width: int = 2 * half + 1
+    smoothed: array = array("d")
+    grades: array = array("d")
+    gains: array = array("d")
+    losses: array = array("d")
+    hysteresis = Hysteresis(threshold)
+
+    window_sum: float = 0.0
+    window_count: int = 0
+    anchor: int = -1
+    grade: float = NAN
+    for i in range(size + half):
+        # The window of the record j = i - half is [j - half, j + half].
+        if i < size and not math.isnan(altitudes[i]):
+            window_sum += altitudes[i]
+            window_count += 1
+        if i >= width and not math.isnan(altitudes[i - width]):
+            window_sum -= altitudes[i - width]
+            window_count -= 1
+        j: int = i - half
+        if j < 0:
+            continue
+
+        altitude: float = window_sum / window_count if window_count else NAN
+        smoothed.append(altitude)
+        hysteresis.add(altitude)
+        gains.append(hysteresis.gain)
+        losses.append(hysteresis.loss)
+
+        distance: float = distances[j] if distances is not None else NAN
+        if not math.isnan(altitude) and not math.isnan(distance):
+            if anchor < 0:
+                anchor = j
+            elif distance - distances[anchor] >= grade_distance:
+                rise: float = altitude - smoothed[anchor]
+                grade = rise / (distance - distances[anchor]) * 100
+                anchor = j
+        grades.append(grade)
+
+    return ElevationProfile(altitudes, smoothed, grades, gains, losses)
+
+
+def elevation_by_ranges(
+        profile: ElevationProfile, ends: list[int]
+) -> list[ElevationStats]:
+    """Return the stats of each range of records (ends are exclusive)."""
+    stats: list[ElevationStats] = []
+    start: int = 0
+    for end in ends:
+        stats.append(profile.between(start, end))
+        start = end
+    return stats
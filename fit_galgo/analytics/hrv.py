@@ -0,0 +1,231 @@
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import datetime
+from typing import NamedTuple
+
+from fit_galgo.fit.models import Hrv
+
+NAN = float("nan")
+
+# Days of the rolling average and of the baseline (the nights before).
+ROLLING_DAYS = 7
+BASELINE_DAYS = 21
+# Width of the baseline band in standard deviations around its mean.
+BASELINE_STDS = 2.0
+# Nights needed in the baseline window to have a baseline.
+MIN_BASELINE_NIGHTS = 7
+SECONDS_PER_DAY = 86400
+
+
+class RollingWindow:
+    """Mean and standard deviation of the values of the last days.
+
+    Values must be added in time order. Each add is O(1) (amortized).
+    """
+    def __init__(self, days: int) -> None:
+        self.seconds: int = days * SECONDS_PER_DAY
+        self._values: deque[tuple[int, float]] = deque()
+        self._sum: float = 0.0
+        self._sum_squares: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, timestamp: int, value: float) -> None:
+        self.evict(timestamp)
+        self._values.append((timestamp, value))
+        self._sum += value
+        self._sum_squares += value * value
+
+    def evict(self, timestamp: int) -> None:
+        """Remove the values older than the window ending at timestamp."""
+        while self._values and self._values[0][0] <= timestamp - self.seconds:
+            _, value = self._values.popleft()
+            self._sum -= value
+            self._sum_squares -= value * value
+
+    @property
+    def mean(self) -> float:
+        return self._sum / len(self._values) if self._values else NAN
+
+    @property
+    def std(self) -> float:
+        if not self._values:
+            return NAN
+        mean: float = self.mean
+        return math.sqrt(max(self._sum_squares / len(self._values) - mean * mean, 0.0))
+
+
+class HrvNights(NamedTuple):
+    """Nightly HRV data as arrays (NaN if unknown)."""
+    timestamps: array  # Unix epoch seconds of the summaries
+    averages: array  # last night averages, in ms
+    rolling_averages: array
+    baseline_lows: array
+    baseline_highs: array
+
+
+class HrvTrend:
+    """HRV time series of many nights.
+
+    Hrv results are added one by one: the nightly summaries and the 5 minute
+    values are stored in arrays and the rolling average and baseline band of
+    each night are updated in O(1) when the night is after the last one
+    (otherwise, everything is recomputed).
+
+    The baseline of a night is the mean of the previous baseline_days days
+    plus/minus baseline_stds standard deviations. There is no baseline (NaN)
+    until MIN_BASELINE_NIGHTS nights are in the baseline window.
+
+    :rolling_days int: days of the rolling average.
+    :baseline_days int: days of the baseline.
+    :baseline_stds float: width of the baseline band.
+    """
+    def __init__(
+            self,
+            rolling_days: int = ROLLING_DAYS,
+            baseline_days: int = BASELINE_DAYS,
+            baseline_stds: float = BASELINE_STDS
+    ) -> None:
+        self.rolling_days: int = rolling_days
+        self.baseline_days: int = baseline_days
+        self.baseline_stds: float = baseline_stds
+        self._nights: HrvNights = HrvNights(
+            array("q"), array("d"), array("d"), array("d"), array("d")
+        )
+        self.value_timestamps: array = array("q")
+        self.values: array = array("d")
+        self._rolling: RollingWindow = RollingWindow(rolling_days)
+        self._baseline: RollingWindow = RollingWindow(baseline_days)
+
+    def __len__(self) -> int:
+        return len(self._nights.timestamps)
+
+    @property
+    def nights(self) -> HrvNights:
+        return self._nights
+
+    def add(self, hrv: Hrv) -> None:
+        """Add the night of hrv (it replaces the same night if it was added)."""
+        if hrv.datetime_utc is None:
+            return
+        timestamp: int = int(hrv.datetime_utc.timestamp())
+        average: float = (
+            hrv.last_night_average if hrv.last_night_average is not None else NAN
+        )
+        self._add_values(hrv)
+
+        timestamps: array = self._nights.timestamps
+        if not timestamps or timestamp > timestamps[-1]:
+            timestamps.append(timestamp)
+            self._nights.averages.append(average)
+            self._update_last()
+            return
+
+        i: int = bisect_left(timestamps, timestamp)
+        if i < len(timestamps) and timestamps[i] == timestamp:
+            self._nights.averages[i] = average
+        else:
+            timestamps.insert(i, timestamp)
+            self._nights.averages.insert(i, average)
+        self.recompute()
+
+    def recompute(
+            self,
+            rolling_days: int | None = None,
+            baseline_days: int | None = None,
+            baseline_stds: float | None = None
+    ) -> None:
+        """Compute the rolling averages and baselines again (with new settings)."""
+        self.rolling_days = rolling_days or self.rolling_days
+        self.baseline_days = baseline_days or self.baseline_days
+        self.baseline_stds = (
+            baseline_stds if baseline_stds is not None else self.baseline_stds
+        )
+        self._rolling = RollingWindow(self.rolling_days)
+        self._baseline = RollingWindow(self.baseline_days)
+        for column in self._nights[2:]:
+            del column[:]
+        for i in range(len(self._nights.timestamps)):
+            self._update(i)
+
+    def between(self, start: datetime | int, end: datetime | int) -> HrvNights:
+        """Return the nights from start to end (both included)."""
+        lo, hi = self._range(self._nights.timestamps, start, end)
+        return HrvNights(*[column[lo:hi] for column in self._nights])
+
+    def values_between(
+            self, start: datetime | int, end: datetime | int
+    ) -> tuple[array, array]:
+        """Return the 5 minute values (timestamps and values) from start to end."""
+        lo, hi = self._range(self.value_timestamps, start, end)
+        return self.value_timestamps[lo:hi], self.values[lo:hi]
+
+    def outliers(self) -> list[int]:
+        """Return the timestamps of the nights out of their baseline band."""
+        return [
+            ts for ts, avg, low, high in zip(
+                self._nights.timestamps,
+                self._nights.averages,
+                self._nights.baseline_lows,
+                self._nights.baseline_highs
+            ) if not math.isnan(low) and not math.isnan(avg) and not low <= avg <= high
+        ]
+
+    def _update_last(self) -> None:
+        self._update(len(self._nights.timestamps) - 1)
+
+    def _update(self, i: int) -> None:
+        timestamp: int = self._nights.timestamps[i]
+        average: float = self._nights.averages[i]
+
+        self._baseline.evict(timestamp)
+        if len(self._baseline) >= MIN_BASELINE_NIGHTS:
+            mean: float = self._baseline.mean
+            width: float = self.baseline_stds * self._baseline.std
+            self._nights.baseline_lows.append(mean - width)
+            self._nights.baseline_highs.append(mean + width)
+        else:
+            self._nights.baseline_lows.append(NAN)
+            self._nights.baseline_highs.append(NAN)
+
+        if not math.isnan(average):
+            self._rolling.add(timestamp, average)
+            self._baseline.add(timestamp, average)
+        else:
+            self._rolling.evict(timestamp)
+        self._nights.rolling_averages.append(self._rolling.mean)
+
+    def _add_values(self, hrv: Hrv) -> None:
+        values: list[tuple[int, float]] = [
+            (int(v.timestamp.timestamp()), float(v.value))
+            for v in hrv.values if v.value is not None
+        ]
+        if not values:
+            return
+        values.sort()
+        lo, hi = self._range(self.value_timestamps, values[0][0], values[-1][0])
+        if lo == len(self.value_timestamps):
+            self.value_timestamps.extend(ts for ts, _ in values)
+            self.values.extend(v for _, v in values)
+            return
+        # The values overlap or go before the stored ones: replace that range.
+        merged: dict[int, float] = dict(
+            zip(self.value_timestamps[lo:hi], self.values[lo:hi])
+        )
+        merged.update(values)
+        items: list[tuple[int, float]] = sorted(merged.items())
+        self.value_timestamps[lo:hi] = array("q", [ts for ts, _ in items])
+        self.values[lo:hi] = array("d", [v for _, v in items])
+
+    @staticmethod
+    def _range(
+            timestamps: array, start: datetime | int, end: datetime | int
+    ) -> tuple[int, int]:
+        if isinstance(start, datetime):
+            start = int(start.timestamp())
+        if isinstance(end, datetime):
+            end = int(end.timestamp())
+        return bisect_left(timestamps, start), bisect_right(timestamps, end)
@@ -0,0 +1,185 @@
+from array import array
+from collections.abc import Iterable
+from datetime import datetime
+from typing import NamedTuple
+
+from fit_galgo.fit.models import Sleep, SleepLevel
+from fit_galgo.utils.date_utils import epoch_to_datetime
+
+AWAKE = "awake"
+UNMEASURABLE = "unmeasurable"
+SLEEP_STAGES = ("light", "deep", "rem")
+STAGES = (UNMEASURABLE, AWAKE, *SLEEP_STAGES)
+
+# Seconds of the last level of a night (each level lasts until the next one).
+LAST_LEVEL_DURATION = 60
+
+
+class SleepRun(NamedTuple):
+    """Consecutive levels of the same stage (a step of the hypnogram)."""
+    stage: str
+    start: int  # Unix epoch seconds
+    duration: int  # in seconds
+
+
+class SleepStats(NamedTuple):
+    start: datetime | None
+    end: datetime | None
+    onset: datetime | None  # when the first sleep stage starts
+    wake: datetime | None  # when the last sleep stage ends
+    durations: dict[str, int]  # seconds by stage
+    transitions: dict[tuple[str, str], int]  # (from, to) stages: count
+    awakenings: int  # awake runs between onset and wake
+    hypnogram: list[SleepRun]
+
+    @property
+    def asleep(self) -> int:
+        """Seconds in a sleep stage."""
+        return sum(self.durations[stage] for stage in SLEEP_STAGES)
+
+    @property
+    def in_bed(self) -> int:
+        """Seconds from the start to the end."""
+        return int((self.end - self.start).total_seconds()) if self.start else 0
+
+
+def _sorted_levels(levels: list[SleepLevel]) -> list[SleepLevel]:
+    for i in range(len(levels) - 1):
+        if levels[i].timestamp > levels[i + 1].timestamp:
+            return sorted(levels, key=lambda level: level.timestamp)
+    return levels
+
+
+def sleep_stats(
+        sleep: Sleep | list[SleepLevel], last_duration: int = LAST_LEVEL_DURATION
+) -> SleepStats:
+    """Compute the stats of a night in a single pass over its levels.
+
+    Each level lasts until the next one and the last one last_duration
+    seconds. The levels are only sorted if they aren't.
+    """
+    levels: list[SleepLevel] = _sorted_levels(
+        sleep.levels if isinstance(sleep, Sleep) else sleep
+    )
+    durations: dict[str, int] = {stage: 0 for stage in STAGES}
+    transitions: dict[tuple[str, str], int] = {}
+    hypnogram: list[SleepRun] = []
+    if not levels:
+        return SleepStats(None, None, None, None, durations, transitions, 0, hypnogram)
+
+    timestamps: list[int] = [int(level.timestamp.timestamp()) for level in levels]
+    timestamps.append(timestamps[-1] + last_duration)
+    run_stage: str = levels[0].level
+    run_start: int = timestamps[0]
+    for i in range(1, len(levels) + 1):
+        stage: str | None = levels[i].level if i < len(levels) else None
+        if stage == run_stage:
+            continue
+        duration: int = timestamps[i] - run_start
+        hypnogram.append(SleepRun(run_stage, run_start, duration))
+        durations[run_stage] = durations.get(run_stage, 0) + duration
+        if stage is not None:
+            transitions[(run_stage, stage)] = transitions.get((run_stage, stage), 0) + 1
+            run_stage, run_start = stage, timestamps[i]
+
+    asleep_runs: list[int] = [
+        i for i, run in enumerate(hypnogram) if run.stage in SLEEP_STAGES
+    ]
+    onset: datetime | None = None
+    wake: datetime | None = None
+    awakenings: int = 0
+    if asleep_runs:
+        first, last = asleep_runs[0], asleep_runs[-1]
+        onset = epoch_to_datetime(hypnogram[first].start)
+        wake = epoch_to_datetime(hypnogram[last].start + hypnogram[last].duration)
+        awakenings = sum(1 for run in hypnogram[first:last] if run.stage == AWAKE)
+
+    return SleepStats(
+        start=epoch_to_datetime(timestamps[0]),
+        end=epoch_to_datetime(timestamps[-1]),
+        onset=onset,
+        wake=wake,
+        durations=durations,
+        transitions=transitions,
+        awakenings=awakenings,
+        hypnogram=hypnogram
+    )
+
+
+class NightlySleepTable:
+    """A compact table with a row by night, sorted by start.
+
+    Times are Unix epoch seconds (0 if unknown), durations are seconds and
+    overall_sleep_score is -1 if unknown.
+    """
+    COLUMNS: dict[str, str] = {
+        "start": "q",
+        "end": "q",
+        "onset": "q",
+        "wake": "q",
+        "asleep": "l",
+        "awake": "l",
+        "light": "l",
+        "deep": "l",
+        "rem": "l",
+        "awakenings": "l",
+        "overall_sleep_score": "h"
+    }
+
+    def __init__(self) -> None:
+        self.columns: dict[str, array] = {
+            name: array(typecode) for name, typecode in self.COLUMNS.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.columns["start"])
+
+    def __getitem__(self, name: str) -> array:
+        return self.columns[name]
+
+    @classmethod
+    def from_sleeps(
+            cls, sleeps: Iterable[Sleep], last_duration: int = LAST_LEVEL_DURATION
+    ) -> "NightlySleepTable":
+        """Build the table from sleeps (it can be a generator of results)."""
+        table = cls()
+        for sleep in sleeps:
+            table.append(sleep, last_duration)
+        table.sort()
+        return table
+
+    def append(self, sleep: Sleep, last_duration: int = LAST_LEVEL_DURATION) -> None:
+        stats: SleepStats = sleep_stats(sleep, last_duration)
+        score: int | None = sleep.overall_sleep_score
+        row: dict[str, int] = {
+            "start": int(stats.start.timestamp()) if stats.start else 0,
+            "end": int(stats.end.timestamp()) if stats.end else 0,
+            "onset": int(stats.onset.timestamp()) if stats.onset else 0,
+            "wake": int(stats.wake.timestamp()) if stats.wake else 0,
+            "asleep": stats.asleep,
+            "awake": stats.durations[AWAKE],
+            "awakenings": stats.awakenings,
+            "overall_sleep_score": score if score is not None else -1,
+            **{stage: stats.durations[stage] for stage in SLEEP_STAGES}
+        }
+        for name, column in self.columns.items():
+            column.append(row[name])
+
+    def sort(self) -> None:
+        """Sort the rows by start (only if they aren't)."""
+        starts: array = self.columns["start"]
+        if all(starts[i] <= starts[i + 1] for i in range(len(starts) - 1)):
+            return
+        order: list[int] = sorted(range(len(starts)), key=starts.__getitem__)
+        for name, column in self.columns.items():
+            self.columns[name] = array(column.typecode, [column[i] for i in order])
+
+    def averages(self) -> dict[str, float]:
+        """Average of the durations, awakenings and score of the nights."""
+        averages: dict[str, float] = {}
+        for name in ("asleep", "awake", *SLEEP_STAGES, "awakenings"):
+            column: array = self.columns[name]
+            averages[name] = sum(column) / len(column) if column else 0.0
+        scores: list[int] = [s for s in self.columns["overall_sleep_score"] if s >= 0]
+        averages["overall_sleep_score"] = sum(scores) / len(scores) if scores else 0.0
+        return averages
@@ -0,0 +1,203 @@
+import math
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from typing import NamedTuple
+
+from fit_galgo.analytics.elevation import (
+    ELEVATION_THRESHOLD,
+    SMOOTHING_WINDOW,
+    ElevationStats,
+    Hysteresis,
+    elevation_by_ranges
+)
+from fit_galgo.fit.columnar import RecordTable
+from fit_galgo.fit.models import DistanceActivity, Lap
+
+NAN = float("nan")
+
+
+class SplitStats(NamedTuple):
+    index: int
+    start: int  # Unix epoch seconds (of the last record of the previous split)
+    end: int  # Unix epoch seconds
+    records: int
+    elapsed: float  # in seconds
+    distance: float  # in meters
+    pace: float  # in seconds per kilometer
+    avg_speed: float  # in m/s
+    avg_heart_rate: float
+    max_heart_rate: float
+    avg_cadence: float
+    max_cadence: float
+    gain: float  # in meters
+    loss: float  # in meters
+
+
+def forward_filled(values: Iterable[float], first: float = 0.0) -> list[float]:
+    """Return values with the NaN replaced by the previous value (first at start)."""
+    filled: list[float] = []
+    last: float = first
+    for value in values:
+        if not math.isnan(value):
+            last = value
+        filled.append(last)
+    return filled
+
+
+def boundaries_by_distance(table: RecordTable, every: float) -> list[int]:
+    """Return the end (exclusive) of the splits of every meters.
+
+    A split ends with the first record that reaches its distance.
+    """
+    distances: list[float] = forward_filled(table["distance"])
+    if not distances:
+        return []
+    ends: list[int] = []
+    limit: float = every
+    while limit < distances[-1]:
+        end: int = bisect_left(distances, limit) + 1
+        ends.append(end)
+        limit = (distances[end - 1] // every + 1) * every
+    ends.append(len(distances))
+    return ends
+
+
+def boundaries_by_time(table: RecordTable, every: float) -> list[int]:
+    """Return the end (exclusive) of the splits of every seconds."""
+    timestamps = table["timestamp"]
+    if not timestamps:
+        return []
+    ends: list[int] = []
+    limit: float = timestamps[0] + every
+    while limit < timestamps[-1]:
+        end: int = bisect_left(timestamps, limit) + 1
+        ends.append(end)
+        elapsed: int = timestamps[end - 1] - timestamps[0]
+        limit = timestamps[0] + (elapsed // every + 1) * every
+    ends.append(len(timestamps))
+    return ends
+
+
+def boundaries_by_laps(table: RecordTable, laps: list[Lap]) -> list[int]:
+    """Return the end (exclusive) of the laps: the records until the lap's timestamp."""
+    timestamps = table["timestamp"]
+    ends: list[int] = sorted({
+        min(bisect_right(timestamps, int(lap.timestamp.timestamp())), len(timestamps))
+        for lap in laps
+    })
+    if timestamps and (not ends or ends[-1] < len(timestamps)):
+        ends.append(len(timestamps))
+    return [end for end in ends if end > 0]
+
+
+def compute_splits(
+        table: RecordTable,
+        ends: list[int],
+        elevation_threshold: float = ELEVATION_THRESHOLD
+) -> list[SplitStats]:
+    """Compute the stats of all the splits in a single pass over the records.
+
+    :table RecordTable: the records.
+    :ends list[int]: the end (exclusive) of each split (see boundaries_*).
+    :elevation_threshold float: hysteresis of the gain and loss. The reference
+                                altitude is kept between splits, so the sum
+                                of the splits is the gain of the activity.
+    """
+    timestamps = table["timestamp"]
+    distances: list[float] = forward_filled(table["distance"])
+    altitudes = table["altitude"]
+    heart_rates = table["heart_rate"]
+    cadences = table["cadence"]
+
+    splits: list[SplitStats] = []
+    hysteresis = Hysteresis(elevation_threshold)
+    start: int = 0
+    for index, end in enumerate(ends):
+        gain: float = hysteresis.gain
+        loss: float = hysteresis.loss
+        hr_sum: float = 0.0
+        hr_count: int = 0
+        hr_max: float = NAN
+        cadence_sum: float = 0.0
+        cadence_count: int = 0
+        cadence_max: float = NAN
+        for i in range(start, end):
+            hysteresis.add(altitudes[i])
+            heart_rate: float = heart_rates[i]
+            if not math.isnan(heart_rate):
+                hr_sum += heart_rate
+                hr_count += 1
+                if math.isnan(hr_max) or heart_rate > hr_max:
+                    hr_max = heart_rate
+            cadence: float = cadences[i]
+            if not math.isnan(cadence):
+                cadence_sum += cadence
+                cadence_count += 1
+                if math.isnan(cadence_max) or cadence > cadence_max:
+                    cadence_max = cadence
+
+        first: int = start - 1 if start > 0 else start
+        elapsed: float = float(timestamps[end - 1] - timestamps[first])
+        distance: float = distances[end - 1] - (distances[first] if start > 0 else 0.0)
+        splits.append(SplitStats(
+            index=index,
+            start=timestamps[first],
+            end=timestamps[end - 1],
+            records=end - start,
+            elapsed=elapsed,
+            distance=distance,
+            pace=elapsed / distance * 1000 if distance > 0 else NAN,
+            avg_speed=distance / elapsed if elapsed > 0 else NAN,
+            avg_heart_rate=hr_sum / hr_count if hr_count else NAN,
+            max_heart_rate=hr_max,
+            avg_cadence=cadence_sum / cadence_count if cadence_count else NAN,
+            max_cadence=cadence_max,
+            gain=hysteresis.gain - gain,
+            loss=hysteresis.loss - loss
+        ))
+        start = end
+    return splits
+
+
+def _boundaries(
+        activity: DistanceActivity, distance: float | None, time: float | None
+) -> list[int]:
+    table: RecordTable = activity.record_table
+    if distance is not None:
+        return boundaries_by_distance(table, distance)
+    if time is not None:
+        return boundaries_by_time(table, time)
+    return boundaries_by_laps(table, activity.laps)
+
+
+def activity_splits(
+        activity: DistanceActivity,
+        distance: float | None = None,
+        time: float | None = None,
+        elevation_threshold: float = ELEVATION_THRESHOLD
+) -> list[SplitStats]:
+    """Compute the splits of activity from its records.
+
+    The splits are every distance meters, every time seconds or, if none of
+    them is given, the laps of the activity.
+    """
+    return compute_splits(
+        activity.record_table, _boundaries(activity, distance, time), elevation_threshold
+    )
+
+
+def activity_elevations(
+        activity: DistanceActivity,
+        distance: float | None = None,
+        time: float | None = None,
+        window: int = SMOOTHING_WINDOW,
+        threshold: float = ELEVATION_THRESHOLD
+) -> list[ElevationStats]:
+    """Return the elevation stats of the splits (or laps) of activity.
+
+    Unlike compute_splits, the gain and loss are the ones of the smoothed
+    profile of the activity (see DistanceActivity.elevation).
+    """
+    return elevation_by_ranges(
+        activity.elevation(window, threshold), _boundaries(activity, distance, time)
+    )
@@ -0,0 +1,230 @@
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from enum import StrEnum
+from itertools import groupby
+
+from fit_galgo.fit.columnar import MonitoringKind
+from fit_galgo.fit.models import FitModel, Hrv, Monitor, Sleep
+
+
+class MergeRule(StrEnum):
+    """How the values of a series with the same timestamp are merged.
+
+    - newest: the value of the newest file (the latest time_created), as a
+      file synced again or renamed has the same samples.
+    - max: the max value, for counters that grow along the day (a file
+      written before the end of the day has smaller ones).
+    """
+    NEWEST = "newest"
+    MAX = "max"
+
+
+# The series of the timeline and how their duplicates are merged. steps,
+# distance and active_calories are the daily totals (the daily logs).
+SERIES_RULES: dict[str, MergeRule] = {
+    "heart_rate": MergeRule.NEWEST,
+    "resting_heart_rate": MergeRule.NEWEST,
+    "stress_level": MergeRule.NEWEST,
+    "respiration_rate": MergeRule.NEWEST,
+    "moderate_minutes": MergeRule.MAX,
+    "vigorous_minutes": MergeRule.MAX,
+    "steps": MergeRule.MAX,
+    "distance": MergeRule.MAX,
+    "active_calories": MergeRule.MAX
+}
+
+# A stream is a list of (timestamp, priority, value) sorted by timestamp:
+# timestamps are Unix epoch seconds and the lower priority the newer file.
+Stream = list[tuple[int, int, float]]
+
+
+class TimeSeries:
+    """Values sorted by timestamp (Unix epoch seconds)."""
+    __slots__ = ("timestamps", "values")
+
+    def __init__(
+            self, timestamps: array | None = None, values: array | None = None
+    ) -> None:
+        self.timestamps: array = timestamps if timestamps is not None else array("q")
+        self.values: array = values if values is not None else array("d")
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __iter__(self) -> Iterator[tuple[int, float]]:
+        return zip(self.timestamps, self.values)
+
+    def between(self, start: datetime | int, end: datetime | int) -> "TimeSeries":
+        """Return the values from start to end (both included)."""
+        lo: int = bisect_left(self.timestamps, _epoch(start))
+        hi: int = bisect_right(self.timestamps, _epoch(end))
+        return TimeSeries(self.timestamps[lo:hi], self.values[lo:hi])
+
+
+def _epoch(dt: datetime | int) -> int:
+    return int(dt.timestamp()) if isinstance(dt, datetime) else dt
+
+
+def _priority(result: FitModel, order: int) -> int:
+    """Lower for newer files, so they come first when timestamps are equal."""
+    time_created: datetime | None = result.file_id.time_created
+    return -(int(time_created.timestamp()) if time_created else 0) * 1_000_000 + order
+
+
+def _sorted_stream(stream: Stream) -> Stream:
+    if any(stream[i][0] > stream[i + 1][0] for i in range(len(stream) - 1)):
+        stream.sort()
+    return stream
+
+
+def merge_streams(streams: Iterable[Stream], rule: MergeRule) -> Stream:
+    """Merge the sorted streams into a sorted stream without duplicates.
+
+    It's a k-way merge, O(n log k) for n values in k streams.
+    """
+    merged: Stream = []
+    for _, group in groupby(heapq.merge(*streams), key=lambda entry: entry[0]):
+        if rule == MergeRule.MAX:
+            merged.append(max(group, key=lambda entry: entry[2]))
+        else:
+            merged.append(next(group))
+    return merged
+
+
+def monitor_streams(monitor: Monitor, priority: int) -> dict[str, Stream]:
+    """Return the streams of the series of monitor."""
+    streams: dict[str, Stream] = {name: [] for name in SERIES_RULES}
+
+    timestamps, heart_rates = monitor.heart_rate_series
+    streams["heart_rate"] = [
+        (ts, priority, float(hr)) for ts, hr in zip(timestamps, heart_rates)
+    ]
+    streams["resting_heart_rate"] = [
+        (int(d.timestamp.timestamp()), priority, float(d.resting_heart_rate))
+        for d in monitor.hr_datas
+    ]
+    streams["stress_level"] = [
+        (int(s.stress_level_time.timestamp()), priority, float(s.stress_level_value))
+        for s in monitor.stress_levels
+    ]
+    streams["respiration_rate"] = [
+        (int(r.timestamp.timestamp()), priority, r.respiration_rate)
+        for r in monitor.respiration_rates
+    ]
+    for intensity in monitor.activity_intensities:
+        ts: int = int(intensity.datetime_utc.timestamp())
+        streams["moderate_minutes"].append(
+            (ts, priority, float(intensity.moderate_minutes))
+        )
+        streams["vigorous_minutes"].append(
+            (ts, priority, float(intensity.vigorous_minutes))
+        )
+
+    # The daily log has a message by activity type: the total is the sum.
+    table = monitor.table
+    totals: dict[str, dict[int, float]] = {
+        "steps": {}, "distance": {}, "active_calories": {}
+    }
+    rows: list[int] = monitor.daily_log_rows(
+        MonitoringKind.STEPS | MonitoringKind.CALORIES
+    )
+    for ts, steps, distance, active_calories, calories in zip(
+            table["timestamp"].take(rows),
+            table["steps"].take(rows),
+            table["distance"].take(rows),
+            table["active_calories"].take(rows),
+            table["calories"].take(rows)
+    ):
+        for name, value in (
+                ("steps", steps),
+                ("distance", distance),
+                ("active_calories", active_calories or calories)
+        ):
+            totals[name][ts] = totals[name].get(ts, 0.0) + (value or 0)
+    for name, values in totals.items():
+        streams[name] = [(ts, priority, value) for ts, value in sorted(values.items())]
+
+    return {name: _sorted_stream(stream) for name, stream in streams.items()}
+
+
+def sleep_start(sleep: Sleep) -> datetime | None:
+    if sleep.levels:
+        return min(level.timestamp for level in sleep.levels)
+    return sleep.file_id.time_created
+
+
+class Timeline:
+    """Monitoring, HRV and sleep data of a user merged from many files.
+
+    Garmin devices write overlapping files (monitoring_a and monitoring_b,
+    daily files renamed, duplicates after syncing), so the data of the
+    files is merged into time sorted series without duplicates (see
+    SERIES_RULES and MergeRule). Hrv and Sleep results are kept by night,
+    the newest file wins.
+
+    Results can be added at any time: they are merged (k-way merge of the
+    sorted streams of each file) when the data is requested.
+    """
+    def __init__(self) -> None:
+        self._pending: dict[str, list[Stream]] = {name: [] for name in SERIES_RULES}
+        self._merged: dict[str, Stream] = {name: [] for name in SERIES_RULES}
+        self._series: dict[str, TimeSeries] = {}
+        self._hrvs: dict[int, tuple[int, Hrv]] = {}
+        self._sleeps: dict[int, tuple[int, Sleep]] = {}
+        self._order: int = 0
+
+    def add(self, result: FitModel) -> None:
+        """Add a Monitor, Hrv or Sleep result (anything else is ignored)."""
+        self._order += 1
+        if not isinstance(result, (Monitor, Hrv, Sleep)):
+            return
+        priority: int = _priority(result, self._order)
+        if isinstance(result, Monitor):
+            for name, stream in monitor_streams(result, priority).items():
+                if stream:
+                    self._pending[name].append(stream)
+                    self._series.pop(name, None)
+        elif isinstance(result, Hrv) and result.datetime_utc is not None:
+            night: int = int(result.datetime_utc.timestamp())
+            self._add_night(self._hrvs, night, priority, result)
+        elif isinstance(result, Sleep) and (start := sleep_start(result)) is not None:
+            self._add_night(self._sleeps, int(start.timestamp()), priority, result)
+
+    def extend(self, results: Iterable[FitModel]) -> None:
+        for result in results:
+            self.add(result)
+
+    def series(self, name: str) -> TimeSeries:
+        """Return the series name (see SERIES_RULES)."""
+        if name not in self._series:
+            if self._pending[name]:
+                self._merged[name] = merge_streams(
+                    [self._merged[name], *self._pending[name]], SERIES_RULES[name]
+                )
+                self._pending[name] = []
+            self._series[name] = TimeSeries(
+                array("q", [entry[0] for entry in self._merged[name]]),
+                array("d", [entry[2] for entry in self._merged[name]])
+            )
+        return self._series[name]
+
+    def between(
+            self, name: str, start: datetime | int, end: datetime | int
+    ) -> TimeSeries:
+        return self.series(name).between(start, end)
+
+    @property
+    def hrvs(self) -> list[Hrv]:
+        return [hrv for _, (_, hrv) in sorted(self._hrvs.items())]
+
+    @property
+    def sleeps(self) -> list[Sleep]:
+        return [sleep for _, (_, sleep) in sorted(self._sleeps.items())]
+
+    @staticmethod
+    def _add_night(nights: dict, key: int, priority: int, result: FitModel) -> None:
+        if key not in nights or priority < nights[key][0]:
+            nights[key] = (priority, result)
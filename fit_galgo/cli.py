@@ -0,0 +1,192 @@
+import argparse
+import os
+import sys
+import time
+from collections.abc import Iterable, Iterator
+
+from fit_galgo.daemon import CACHE_SIZE, MAX_QUEUE
+from fit_galgo.fit.crc import IntegrityMode, verify_file
+from fit_galgo.fit.exceptions import FitIntegrityException
+from fit_galgo.ingest import BATCH_SIZE
+
+BYTES_PER_MB = 1024 * 1024
+
+
+def find_fit_files(paths: Iterable[str]) -> Iterator[str]:
+    """Yield the FIT files in paths (files or folders searched recursively)."""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.lower().endswith(".fit"):
+                    yield os.path.join(dirpath, filename)
+
+
+def verify(args: argparse.Namespace) -> int:
+    """Verify the integrity of the FIT files and show the throughput."""
+    mode = IntegrityMode(args.mode)
+    files: int = 0
+    wrong: int = 0
+    size: int = 0
+    start: float = time.perf_counter()
+    for fit_file_path in find_fit_files(args.paths):
+        files += 1
+        try:
+            size += os.path.getsize(fit_file_path)
+            verify_file(fit_file_path, mode)
+        except (FitIntegrityException, OSError) as error:
+            wrong += 1
+            print(f"{fit_file_path}: {error}")
+        else:
+            if args.verbose:
+                print(f"{fit_file_path}: OK")
+    seconds: float = time.perf_counter() - start
+
+    mb: float = size / BYTES_PER_MB
+    print(
+        f"{files} files, {wrong} wrong, {mb:.2f} MB in {seconds:.2f} s "
+        f"({mb / seconds if seconds > 0 else 0.0:.2f} MB/s)"
+    )
+    return 1 if wrong else 0
+
+
+def daemon(args: argparse.Namespace) -> int:
+    """Serve parse requests until interrupted (see fit_galgo.daemon)."""
+    from fit_galgo.daemon import ParseDaemon
+
+    address: str | tuple[str, int] = (
+        ("127.0.0.1", args.port) if args.port is not None else args.socket
+    )
+    with ParseDaemon(
+            address,
+            max_workers=args.workers,
+            max_concurrency=args.max_concurrency,
+            max_queue=args.max_queue,
+            cache_size=args.cache_size
+    ) as parse_daemon:
+        print(f"Listening on {parse_daemon.address}", flush=True)
+        try:
+            parse_daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def ingest(args: argparse.Namespace) -> int:
+    """Ingest the sessions of the FIT files into a summary index, resuming
+    from its journal (see fit_galgo.ingest)."""
+    from fit_galgo.ingest import IngestStats, Progress, ingest as ingest_files
+
+    stats: IngestStats = ingest_files(
+        find_fit_files(args.paths),
+        args.store,
+        journal_path=args.journal,
+        zone_info=args.zone_info,
+        max_workers=args.workers,
+        batch_size=args.batch_size,
+        progress=None if args.quiet else Progress()
+    )
+    mb: float = stats.bytes / BYTES_PER_MB
+    print(
+        f"{stats.files} files, {stats.skipped} already ingested, "
+        f"{stats.ingested} ingested, {stats.errors} with errors, "
+        f"{stats.sessions} sessions, {mb:.2f} MB in {stats.seconds:.2f} s "
+        f"({stats.files_per_second:.2f} files/s, {stats.mb_per_second:.2f} MB/s)"
+    )
+    for code, count in stats.error_codes.items():
+        print(f"  {code}: {count} files")
+    if stats.interrupted:
+        print("Interrupted: run the command again to resume")
+        return 130
+    return 1 if stats.errors else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="fit_galgo")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    verify_parser = subparsers.add_parser(
+        "verify", help="verify the integrity (CRC) of FIT files"
+    )
+    verify_parser.add_argument(
+        "paths", nargs="+", help="FIT files or folders where FIT files are searched"
+    )
+    verify_parser.add_argument(
+        "-m", "--mode",
+        choices=[m.value for m in IntegrityMode if m != IntegrityMode.NONE],
+        default=IntegrityMode.STRICT.value,
+        help="what is verified (default: strict)"
+    )
+    verify_parser.add_argument(
+        "-v", "--verbose", action="store_true", help="show the right files too"
+    )
+    verify_parser.set_defaults(func=verify)
+
+    daemon_parser = subparsers.add_parser(
+        "daemon", help="parse the FIT files requested through a socket"
+    )
+    daemon_parser.add_argument(
+        "socket", nargs="?", default="fit_galgo.sock",
+        help="path of the Unix domain socket (default: fit_galgo.sock)"
+    )
+    daemon_parser.add_argument(
+        "-p", "--port", type=int, help="listen on this localhost TCP port instead"
+    )
+    daemon_parser.add_argument(
+        "-w", "--workers", type=int, help="worker processes (default: CPUs)"
+    )
+    daemon_parser.add_argument(
+        "-c", "--max-concurrency", type=int,
+        help="files parsed at once (default: workers)"
+    )
+    daemon_parser.add_argument(
+        "-q", "--max-queue", type=int, default=MAX_QUEUE,
+        help=f"requests waiting before new ones are refused (default: {MAX_QUEUE})"
+    )
+    daemon_parser.add_argument(
+        "--cache-size", type=int, default=CACHE_SIZE,
+        help=f"results kept in memory (default: {CACHE_SIZE})"
+    )
+    daemon_parser.set_defaults(func=daemon)
+
+    ingest_parser = subparsers.add_parser(
+        "ingest", help="ingest the sessions of FIT files into a summary index"
+    )
+    ingest_parser.add_argument(
+        "paths", nargs="+", help="FIT files or folders where FIT files are searched"
+    )
+    ingest_parser.add_argument(
+        "-s", "--store", default="fit_galgo.db",
+        help="SQLite database of the summary index (default: fit_galgo.db)"
+    )
+    ingest_parser.add_argument(
+        "-j", "--journal", help="checkpoint journal (default: the store + .journal)"
+    )
+    ingest_parser.add_argument(
+        "-z", "--zone-info", help="IANA zone of the periods (default: UTC)"
+    )
+    ingest_parser.add_argument(
+        "-w", "--workers", type=int, help="worker processes (default: CPUs)"
+    )
+    ingest_parser.add_argument(
+        "-b", "--batch-size", type=int, default=BATCH_SIZE,
+        help=f"files written per transaction (default: {BATCH_SIZE})"
+    )
+    ingest_parser.add_argument(
+        "-q", "--quiet", action="store_true", help="don't report the progress"
+    )
+    ingest_parser.set_defaults(func=ingest)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
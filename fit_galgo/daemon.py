@@ -0,0 +1,524 @@
+import heapq
+import itertools
+import json
+import os
+import pickle
+import socket
+import socketserver
+import stat
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from fit_galgo.pool import FitPool, parse_file
+
+# Jobs waiting for a worker before new ones are refused (see DaemonBusyException).
+MAX_QUEUE = 64
+# Results (serialized) kept in the cache.
+CACHE_SIZE = 256
+
+STATUS_OK = "ok"
+STATUS_BUSY = "busy"
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+
+
+class DaemonException(Exception):
+    """A request the daemon couldn't complete."""
+
+
+class DaemonBusyException(DaemonException):
+    """The queue of the daemon is full: the request should be retried later."""
+
+
+class DeadlineExceededException(DaemonException):
+    """The file wasn't parsed before the deadline of the request."""
+
+
+def parse_serialized(
+        fit_file_path: str, zone_info: str | None = None, options: dict | None = None
+) -> bytes:
+    """Parse a FIT file and pickle the result (the task of the workers).
+
+    The daemon sends the bytes as they are (and keeps them in its cache), so
+    the result is only pickled once.
+    """
+    return pickle.dumps(
+        parse_file(fit_file_path, zone_info, options), pickle.HIGHEST_PROTOCOL
+    )
+
+
+class ResultCache:
+    """The last results (serialized) by file, least recently used out first.
+
+    A file's key has its size and modification time, so the result of a
+    file that changes isn't returned.
+    """
+    def __init__(self, size: int = CACHE_SIZE) -> None:
+        self.size: int = size
+        self.hits: int = 0
+        self.misses: int = 0
+        self._results: OrderedDict[tuple, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    @staticmethod
+    def key(fit_file_path: str, zone_info: str | None) -> tuple:
+        """:raise: OSError if the file can't be read."""
+        st = os.stat(fit_file_path)
+        return (os.path.realpath(fit_file_path), st.st_size, st.st_mtime_ns, zone_info)
+
+    def get(self, key: tuple) -> bytes | None:
+        with self._lock:
+            payload: bytes | None = self._results.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._results.move_to_end(key)
+            return payload
+
+    def put(self, key: tuple, payload: bytes) -> None:
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._results[key] = payload
+            self._results.move_to_end(key)
+            while len(self._results) > self.size:
+                self._results.popitem(last=False)
+
+
+class Job:
+    """A file to parse, waiting in the queue of the daemon or being parsed."""
+    __slots__ = (
+        "fit_file_path", "zone_info", "priority", "deadline", "key",
+        "payload", "error", "cancelled", "retried", "done"
+    )
+
+    def __init__(
+            self,
+            fit_file_path: str,
+            zone_info: str | None,
+            priority: int,
+            deadline: float | None,
+            key: tuple
+    ) -> None:
+        self.fit_file_path: str = fit_file_path
+        self.zone_info: str | None = zone_info
+        self.priority: int = priority
+        # time.monotonic() when the request gives up waiting (None if never).
+        self.deadline: float | None = deadline
+        self.key: tuple = key
+        self.payload: bytes | None = None
+        self.error: Exception | None = None
+        self.cancelled: bool = False
+        # Whether its worker died while parsing it (then it's parsed again).
+        self.retried: bool = False
+        self.done: threading.Event = threading.Event()
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def finish(self, payload: bytes | None = None, error: Exception | None = None):
+        self.payload = payload
+        self.error = error
+        self.done.set()
+
+
+class ParseDaemon:
+    """A long-running process that parses FIT files requested through a socket.
+
+    The workers of its FitPool are started and warmed up once and the results
+    are kept in a ResultCache, so a request only pays for the parsing (or
+    nothing if its result is cached) and not for starting Python, importing
+    the modules and loading the parsers.
+
+    The requests wait in a priority queue (the lower the priority, the
+    sooner) and up to max_concurrency files are parsed at once. If max_queue
+    requests are already waiting, new ones are refused (busy) so the clients
+    can back off. A request with a deadline times out if its file isn't
+    parsed in time.
+
+    If a worker dies (e.g. killed for running out of memory) the pool is
+    restarted once the running files are done, and the files whose parsing
+    was lost are parsed again, one by one: a file that kills its worker
+    again fails instead of breaking the pool for every request.
+
+    The results are pickled with the messages as compact fast classes (see
+    fit_galgo.fit.fast), unless the pool given was built otherwise. See
+    DaemonClient for the protocol.
+
+    :address str | tuple: path of a Unix domain socket or (host, port) of a
+                          TCP socket (it should be a local one: the clients
+                          ask for paths of the local file system).
+    :pool FitPool: the pool where the files are parsed (a new one with
+                   max_workers workers, closed with the daemon, if None).
+    :max_concurrency int: files parsed at once (the workers of the pool by
+                          default).
+    :max_queue int: requests waiting before new ones are refused.
+    :cache_size int: results kept in the cache (0 to disable it).
+    """
+    def __init__(
+            self,
+            address: str | tuple[str, int],
+            pool: FitPool | None = None,
+            max_workers: int | None = None,
+            max_concurrency: int | None = None,
+            max_queue: int = MAX_QUEUE,
+            cache_size: int = CACHE_SIZE
+    ) -> None:
+        if isinstance(address, str):
+            _remove_stale_socket(address)
+            server_cls = _UnixServer
+        else:
+            server_cls = _TCPServer
+        self.server = server_cls(address, _RequestHandler)
+        self.server.parse_daemon = self
+        self.address = self.server.server_address
+        self._serving: bool = False
+
+        self._own_pool: bool = pool is None
+        self.pool: FitPool = pool or FitPool(max_workers=max_workers, fast=True)
+        self.max_concurrency: int = max_concurrency or self.pool.max_workers
+        self.max_queue: int = max_queue
+        self.cache: ResultCache = ResultCache(cache_size)
+
+        self._queue: list[tuple[int, float, int, Job]] = []
+        self._sequence = itertools.count()
+        self._running: int = 0
+        # Whether a worker died and the pool must be restarted.
+        self._broken: bool = False
+        self._closed: bool = False
+        self._condition = threading.Condition()
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name="fit_galgo-dispatcher", daemon=True
+        )
+        self._dispatcher.start()
+
+    def __enter__(self) -> "ParseDaemon":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def serve_forever(self) -> None:
+        self._serving = True
+        self.server.serve_forever()
+
+    def start(self) -> threading.Thread:
+        """Serve the requests in a background thread."""
+        thread = threading.Thread(
+            target=self.serve_forever, name="fit_galgo-daemon", daemon=True
+        )
+        self._serving = True
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        """Stop serving, refuse the queued requests and close the socket."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            queued: list = self._queue
+            self._queue = []
+            self._condition.notify_all()
+        for *_, job in queued:
+            job.finish(error=DaemonException("The daemon is closed"))
+        if self._serving:
+            self.server.shutdown()
+        self.server.server_close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+        if self._own_pool:
+            self.pool.close()
+
+    def stats(self) -> dict:
+        with self._condition:
+            queued: int = len(self._queue)
+            running: int = self._running
+        return {
+            "queued": queued,
+            "running": running,
+            "cached": len(self.cache),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses
+        }
+
+    def parse(
+            self,
+            fit_file_path: str,
+            zone_info: str | None = None,
+            priority: int = 0,
+            timeout: float | None = None
+    ) -> bytes:
+        """Return the serialized result of a file (the work of a request).
+
+        :timeout float: seconds the request waits for its result.
+        :raise: DaemonBusyException if the queue is full,
+                DeadlineExceededException if the file isn't parsed before
+                timeout or the exception raised while parsing it.
+        """
+        key: tuple = ResultCache.key(fit_file_path, zone_info)
+        payload: bytes | None = self.cache.get(key)
+        if payload is not None:
+            return payload
+
+        deadline: float | None = (
+            time.monotonic() + timeout if timeout is not None else None
+        )
+        job = Job(fit_file_path, zone_info, priority, deadline, key)
+        with self._condition:
+            if self._closed:
+                raise DaemonException("The daemon is closed")
+            if len(self._queue) >= self.max_queue:
+                raise DaemonBusyException(
+                    f"{len(self._queue)} requests are waiting, try again later"
+                )
+            self._push(job)
+
+        if not job.done.wait(timeout):
+            # It's parsed anyway if it's already in a worker (and cached).
+            job.cancelled = True
+            raise DeadlineExceededException(
+                f"'{fit_file_path}' wasn't parsed in {timeout} s"
+            )
+        if job.error is not None:
+            raise job.error
+        return job.payload
+
+    def _push(self, job: Job) -> None:
+        """Queue a job (the condition must be held)."""
+        heapq.heappush(self._queue, (
+            job.priority,
+            job.deadline if job.deadline is not None else float("inf"),
+            next(self._sequence),
+            job
+        ))
+        self._condition.notify_all()
+
+    def _can_dispatch(self) -> bool:
+        if self._broken:
+            # The pool is restarted when the running futures are done.
+            return not self._running
+        if not self._queue or self._running >= self.max_concurrency:
+            return False
+        # A job whose worker died is parsed alone.
+        return not (self._running and self._queue[0][-1].retried)
+
+    def _dispatch(self) -> None:
+        """Send the queued jobs to the pool, up to max_concurrency at once."""
+        while True:
+            with self._condition:
+                while not self._closed and not self._can_dispatch():
+                    self._condition.wait()
+                if self._closed:
+                    return
+                restart: bool = self._broken
+                self._broken = False
+                if not restart:
+                    job: Job = heapq.heappop(self._queue)[-1]
+                    if job.cancelled or job.expired():
+                        job.finish(error=DeadlineExceededException(
+                            f"'{job.fit_file_path}' wasn't parsed before its deadline"
+                        ))
+                        continue
+                    self._running += 1
+            if restart:
+                try:
+                    self.pool.restart()
+                except RuntimeError:
+                    # The pool is closed: the next jobs fail when submitted.
+                    pass
+                continue
+            try:
+                future: Future = self.pool.submit(
+                    parse_serialized, job.fit_file_path, job.zone_info,
+                    self.pool.options
+                )
+            except BrokenProcessPool:
+                # A worker died before the callbacks of its futures: the job
+                # waits for the pool to be restarted.
+                with self._condition:
+                    self._running -= 1
+                    self._broken = True
+                    self._push(job)
+                continue
+            except Exception as error:
+                self._finished(job, None, error)
+                continue
+            future.add_done_callback(lambda f, job=job: self._finished(job, f))
+
+    def _finished(
+            self, job: Job, future: Future | None, error: Exception | None = None
+    ) -> None:
+        if future is not None:
+            error = (
+                DaemonException("The daemon is closed") if future.cancelled()
+                else future.exception()
+            )
+        with self._condition:
+            self._running -= 1
+            if isinstance(error, BrokenProcessPool):
+                # The job's worker (or another one) died: it's parsed again
+                # unless it was already parsed alone.
+                self._broken = True
+                if not job.retried and not self._closed:
+                    job.retried = True
+                    self._push(job)
+                    return
+                error = DaemonException(
+                    f"The worker died parsing '{job.fit_file_path}'"
+                )
+            self._condition.notify_all()
+        if error is not None:
+            job.finish(error=error)
+            return
+        payload: bytes = future.result()
+        self.cache.put(job.key, payload)
+        job.finish(payload)
+
+    def handle(self, request: dict) -> tuple[dict, bytes]:
+        """Answer a request: its response (header and payload)."""
+        if request.get("command") == "stats":
+            return {"status": STATUS_OK, **self.stats()}, b""
+        try:
+            payload: bytes = self.parse(
+                request["path"],
+                request.get("zone_info"),
+                int(request.get("priority", 0)),
+                request.get("deadline")
+            )
+        except DaemonBusyException as error:
+            return {"status": STATUS_BUSY, "error": str(error)}, b""
+        except DeadlineExceededException as error:
+            return {"status": STATUS_TIMEOUT, "error": str(error)}, b""
+        except KeyError as error:
+            return {"status": STATUS_ERROR, "error": f"Missing {error} in request"}, b""
+        except Exception as error:
+            return {
+                "status": STATUS_ERROR, "error": f"{type(error).__name__}: {error}"
+            }, b""
+        return {"status": STATUS_OK, "size": len(payload)}, payload
+
+
+def _remove_stale_socket(path: str) -> None:
+    """Remove the socket at path left by a daemon that didn't close it."""
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except FileNotFoundError:
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.remove(path)
+            return
+    raise OSError(f"A daemon is already listening on '{path}'")
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answer the requests of a connection, one after the other."""
+    def handle(self) -> None:
+        daemon: ParseDaemon = self.server.parse_daemon
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("the request isn't an object")
+            except ValueError as error:
+                header, payload = {"status": STATUS_ERROR, "error": str(error)}, b""
+            else:
+                header, payload = daemon.handle(request)
+            self.wfile.write(json.dumps(header).encode() + b"\n" + payload)
+            self.wfile.flush()
+
+
+class DaemonClient:
+    """A connection to a ParseDaemon.
+
+    Each request is a line with a JSON object: "path" of the FIT file and,
+    optionally, "zone_info", "priority" and "deadline" (seconds to wait). The
+    response is a line with a JSON object whose "status" is "ok", "busy",
+    "timeout" or "error" ("error" has the message) followed, if it's "ok",
+    by "size" bytes: the pickled result. {"command": "stats"} returns the
+    stats of the daemon.
+
+    :address str | tuple: the address of the daemon (see ParseDaemon).
+    :timeout float: seconds to wait for the daemon (None to wait forever).
+    """
+    def __init__(self, address: str | tuple[str, int], timeout: float | None = None):
+        family: int = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        self._socket = socket.socket(family, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(address)
+        self._file = self._socket.makefile("rb")
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+    def request(self, request: dict) -> tuple[dict, bytes]:
+        """Send a request and return its response (header and payload)."""
+        self._socket.sendall(json.dumps(request).encode() + b"\n")
+        line: bytes = self._file.readline()
+        if not line:
+            raise DaemonException("The daemon closed the connection")
+        header: dict = json.loads(line)
+        payload: bytes = self._file.read(header.get("size", 0))
+        return header, payload
+
+    def parse(
+            self,
+            fit_file_path: str,
+            zone_info: str | None = None,
+            priority: int = 0,
+            deadline: float | None = None
+    ):
+        """Parse a FIT file in the daemon.
+
+        :fit_file_path str: path of the file (as the daemon sees it).
+        :deadline float: seconds the daemon tries to parse it.
+        :return: the model of the file (its messages as fast classes, see
+                 fit_galgo.fit.fast.to_pydantic).
+        :raise: DaemonBusyException, DeadlineExceededException or
+                DaemonException with the error of the daemon.
+        """
+        request: dict = {"path": os.path.abspath(fit_file_path), "priority": priority}
+        if zone_info is not None:
+            request["zone_info"] = zone_info
+        if deadline is not None:
+            request["deadline"] = deadline
+        header, payload = self.request(request)
+        status: str = header.get("status")
+        if status == STATUS_OK:
+            return pickle.loads(payload)
+        if status == STATUS_BUSY:
+            raise DaemonBusyException(header.get("error"))
+        if status == STATUS_TIMEOUT:
+            raise DeadlineExceededException(header.get("error"))
+        raise DaemonException(header.get("error"))
+
+    def stats(self) -> dict:
+        header, _ = self.request({"command": "stats"})
+        return header
@@ -0,0 +1,316 @@
+import os
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from io import BytesIO
+
+from fit_galgo.export.writers import WRITERS, ExportWriter, LapInfo
+from fit_galgo.fit.columnar import RecordTable
+from fit_galgo.fit.crc import IntegrityMode, verify_stream
+from fit_galgo.fit.definitions import file_type_num
+from fit_galgo.fit.exceptions import (
+    NotFitMessageFoundException,
+    NotSupportedFitFileException
+)
+
+# Records written at once by the writers that don't need the laps.
+BATCH_SIZE = 1000
+
+ACTIVITY_FILE_TYPE = "activity"
+# Sport of the sessions whose sport isn't known.
+GENERIC_SPORT = "generic"
+
+
+def lap_info(lap) -> LapInfo:
+    """Return the LapInfo of a Lap model."""
+    return LapInfo(
+        start=int(lap.start_time.timestamp()),
+        elapsed=lap.total_elapsed_time,
+        timer=lap.total_timer_time,
+        distance=lap.total_distance,
+        calories=lap.total_calories,
+        avg_heart_rate=lap.avg_heart_rate,
+        max_heart_rate=lap.max_heart_rate
+    )
+
+
+def lap_info_from_mesg(mesg: dict) -> LapInfo:
+    """Return the LapInfo of a LAP message as decoded by the SDK."""
+    start: datetime | None = mesg.get("start_time") or mesg.get("timestamp")
+    return LapInfo(
+        start=int(start.timestamp()) if start is not None else 0,
+        elapsed=mesg.get("total_elapsed_time"),
+        timer=mesg.get("total_timer_time"),
+        distance=mesg.get("total_distance"),
+        calories=mesg.get("total_calories"),
+        avg_heart_rate=mesg.get("avg_heart_rate"),
+        max_heart_rate=mesg.get("max_heart_rate"),
+        sport=mesg.get("sport")
+    )
+
+
+def points_lap_info(table: RecordTable, start: int, end: int) -> LapInfo:
+    """Return the LapInfo of the records from start to end (records without lap)."""
+    timestamps = table["timestamp"]
+    distances = [d for d in table["distance"][start:end] if d == d]
+    elapsed: float = float(timestamps[end - 1] - timestamps[start])
+    return LapInfo(
+        start=timestamps[start],
+        elapsed=elapsed,
+        timer=elapsed,
+        distance=distances[-1] - distances[0] if distances else None,
+        calories=None,
+        avg_heart_rate=None,
+        max_heart_rate=None
+    )
+
+
+def export_model(model, writer: ExportWriter) -> None:
+    """Write a parsed activity (DistanceActivity or MultisportActivity).
+
+    The records of each session are written from its RecordTable. Sessions
+    without records (transitions, activities without GPS...) aren't written.
+    """
+    writer.begin()
+    if hasattr(model, "sessions"):
+        for session in model.sessions:
+            records, laps = model.filter_by_session(session)
+            _export_session(
+                writer, session.sport, RecordTable.from_records(records), laps
+            )
+    elif hasattr(model, "record_table"):
+        _export_session(writer, model.sport, model.record_table, model.laps)
+    writer.end()
+
+
+def _export_session(
+        writer: ExportWriter, sport: str, table: RecordTable, laps: list
+) -> None:
+    if not len(table):
+        return
+    writer.begin_session(sport, table["timestamp"][0])
+    timestamps = table["timestamp"]
+    start: int = 0
+    for lap in sorted(laps, key=lambda lap: lap.timestamp):
+        end: int = bisect_right(timestamps, int(lap.timestamp.timestamp()))
+        writer.write_lap(lap_info(lap), table, start, max(end, start))
+        start = max(end, start)
+    if start < len(table):
+        size: int = len(table)
+        writer.write_lap(points_lap_info(table, start, size), table, start, size)
+    writer.end_session()
+
+
+class RecordStreamer:
+    """Feed a writer with the messages of an activity while they're decoded.
+
+    The records are kept (by columns) only until they're written: until
+    their lap is decoded or, if the writer doesn't need the laps and the
+    sport of the records is known, until there are batch_size of them.
+
+    The LAP messages must follow their records (as devices write them). A
+    new session begins when the sport of the laps (or of a SPORT message)
+    changes or after a SESSION message. The sport of a session is the one of
+    its laps or the one of the last SPORT message. The sport of the records
+    is only known after a SPORT message (until the end of its session):
+    otherwise they're kept until their lap tells it, so the records of a
+    leg of a multisport activity aren't written into the previous one.
+    """
+    def __init__(self, writer: ExportWriter, batch_size: int = BATCH_SIZE) -> None:
+        from garmin_fit_sdk import Profile
+
+        self.writer: ExportWriter = writer
+        self.batch_size: int = batch_size
+        self._table: RecordTable = RecordTable()
+        self._sport: str = GENERIC_SPORT
+        # Whether self._sport is the sport of the next records.
+        self._sport_known: bool = False
+        self._in_session: bool = False
+        self._file_type: str | int | None = None
+        self._handlers = {
+            Profile["mesg_num"]["FILE_ID"]: self._on_file_id,
+            Profile["mesg_num"]["SPORT"]: self._on_sport,
+            Profile["mesg_num"]["RECORD"]: self._on_record,
+            Profile["mesg_num"]["LAP"]: self._on_lap,
+            Profile["mesg_num"]["SESSION"]: self._on_session
+        }
+
+    def __call__(self, mesg_num: int, mesg: dict) -> None:
+        handler = self._handlers.get(mesg_num)
+        if handler is not None:
+            handler(mesg)
+
+    def finish(self) -> None:
+        if self._file_type is None:
+            raise NotFitMessageFoundException("file_id")
+        self._flush_points()
+        self._end_session()
+        self.writer.end()
+
+    def _on_file_id(self, mesg: dict) -> None:
+        if self._file_type is not None:
+            return
+        self._file_type = mesg.get("type")
+        if file_type_num(self._file_type) != file_type_num(ACTIVITY_FILE_TYPE):
+            raise NotSupportedFitFileException(self._file_type)
+        self.writer.begin()
+
+    def _on_sport(self, mesg: dict) -> None:
+        sport: str | None = mesg.get("sport")
+        if sport is None:
+            return
+        if self._in_session and sport != self.writer.sport:
+            # The records kept are the last ones of the previous sport.
+            self._flush_points()
+            self._end_session()
+        self._sport = sport
+        self._sport_known = True
+
+    def _on_record(self, mesg: dict) -> None:
+        self._table.append_mesg(mesg)
+        if (
+            not self.writer.BUFFER_LAPS and self._sport_known and
+            len(self._table) >= self.batch_size
+        ):
+            self._begin_session(self._sport, self._table["timestamp"][0])
+            self.writer.write_points(self._table, 0, len(self._table))
+            self._table = RecordTable()
+
+    def _on_lap(self, mesg: dict) -> None:
+        lap: LapInfo = lap_info_from_mesg(mesg)
+        if lap.sport is not None and self._in_session and lap.sport != self.writer.sport:
+            self._end_session()
+        self._begin_session(
+            lap.sport or self._sport,
+            self._table["timestamp"][0] if len(self._table) else lap.start
+        )
+        timestamp: datetime | None = mesg.get("timestamp")
+        end: int = (
+            bisect_right(self._table["timestamp"], int(timestamp.timestamp()))
+            if timestamp is not None else len(self._table)
+        )
+        self.writer.write_lap(lap, self._table, 0, end)
+        self._table = self._table.slice(end, len(self._table))
+
+    def _on_session(self, mesg: dict) -> None:
+        self._flush_points()
+        self._end_session()
+        self._sport_known = False
+
+    def _flush_points(self) -> None:
+        size: int = len(self._table)
+        if size:
+            self._begin_session(self._sport, self._table["timestamp"][0])
+            self.writer.write_lap(
+                points_lap_info(self._table, 0, size), self._table, 0, size
+            )
+            self._table = RecordTable()
+
+    def _begin_session(self, sport: str, start: int) -> None:
+        if not self._in_session:
+            self._in_session = True
+            self.writer.begin_session(sport, start)
+
+    def _end_session(self) -> None:
+        if self._in_session:
+            self._in_session = False
+            self.writer.end_session()
+
+
+def export_file(
+        fit_file_path: str,
+        writer: ExportWriter,
+        integrity: IntegrityMode = IntegrityMode.STRICT,
+        batch_size: int = BATCH_SIZE
+) -> None:
+    """Write the activity of a FIT file while it's decoded (no model is built).
+
+    :raise: FitIntegrityException if the file is corrupted,
+            NotSupportedFitFileException if it isn't an activity or the first
+            error found while decoding it.
+    """
+    from garmin_fit_sdk import Decoder, Stream
+
+    with open(fit_file_path, "rb") as fit_file:
+        data: bytes = fit_file.read()
+    verify_stream(BytesIO(data), len(data), IntegrityMode(integrity))
+
+    streamer = RecordStreamer(writer, batch_size)
+    decoder = Decoder(Stream.from_byte_array(data))
+    # Heart rates can't be merged because the records aren't kept.
+    _, errors = decoder.read(
+        mesg_listener=streamer, enable_crc_check=False, merge_heart_rates=False
+    )
+    if errors:
+        raise errors[0]
+    streamer.finish()
+
+
+def export_path(
+        fit_file_path: str,
+        out_path: str,
+        fmt: str = "gpx",
+        integrity: IntegrityMode = IntegrityMode.STRICT
+) -> str:
+    """Export a FIT file into out_path (removed if the export fails)."""
+    writer_cls: type[ExportWriter] = WRITERS[fmt]
+    name: str = os.path.splitext(os.path.basename(fit_file_path))[0]
+    try:
+        with open(out_path, "w", encoding="utf-8", newline="") as out:
+            export_file(fit_file_path, writer_cls(out, name), integrity)
+    except BaseException:
+        if os.path.exists(out_path):
+            os.remove(out_path)
+        raise
+    return out_path
+
+
+def _export_task(
+        fit_file_path: str, out_path: str, fmt: str, integrity: IntegrityMode
+) -> str | Exception:
+    try:
+        return export_path(fit_file_path, out_path, fmt, integrity)
+    except Exception as error:
+        return error
+
+
+def export_archive(
+        fit_file_paths: Iterable[str],
+        out_dir: str,
+        fmt: str = "gpx",
+        root: str | None = None,
+        pool=None,
+        integrity: IntegrityMode = IntegrityMode.STRICT
+) -> Iterator[tuple[str, str | Exception]]:
+    """Export the FIT files in parallel with a FitPool.
+
+    :out_dir str: where the files are exported. If root is given, the
+                  folders of the FIT files under root are kept.
+    :pool FitPool: the pool where the files are exported (a new one, closed
+                   at the end, if None).
+    :return: (path, exported path or the error) of each file in order.
+    """
+    from fit_galgo.pool import FitPool
+
+    extension: str = WRITERS[fmt].EXTENSION
+    own_pool: bool = pool is None
+    pool = pool or FitPool()
+    try:
+        futures = []
+        for path in fit_file_paths:
+            relative: str = (
+                os.path.relpath(path, root) if root is not None
+                else os.path.basename(path)
+            )
+            out_path: str = os.path.join(
+                out_dir, os.path.splitext(relative)[0] + extension
+            )
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            futures.append(
+                (path, pool.submit(_export_task, path, out_path, fmt, integrity))
+            )
+        for path, future in futures:
+            yield path, future.result()
+    finally:
+        if own_pool:
+            pool.close()
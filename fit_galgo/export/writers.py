@@ -0,0 +1,260 @@
+import math
+import time
+from typing import NamedTuple, TextIO
+from xml.sax.saxutils import escape
+
+from fit_galgo.fit.columnar import RecordTable
+from fit_galgo.utils.geo_utils import semicircles_to_degrees_array
+
+
+class LapInfo(NamedTuple):
+    start: int  # Unix epoch seconds
+    elapsed: float | None  # in seconds
+    timer: float | None  # in seconds
+    distance: float | None  # in meters
+    calories: float | None
+    avg_heart_rate: float | None
+    max_heart_rate: float | None
+    sport: str | None = None
+
+
+def iso_time(timestamp: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+
+def _known(value: float) -> bool:
+    return not math.isnan(value)
+
+
+class ExportWriter:
+    """Write the sessions, laps and records of activities into out.
+
+    The writer is driven by an exporter (see exporter): for each session it
+    calls begin_session, then write_points and write_lap for its records and
+    laps and, at last, end_session. The records are given by columns (see
+    RecordTable) and are written as soon as they're given, so the memory
+    used doesn't depend on the size of the activity.
+
+    Writers that need the lap before its points (BUFFER_LAPS) only receive
+    the points in write_lap.
+
+    :out TextIO: where the activities are written.
+    :name str: name of the activities (if the format has it).
+    """
+    EXTENSION: str = ""
+    BUFFER_LAPS: bool = False
+
+    def __init__(self, out: TextIO, name: str | None = None) -> None:
+        self.out: TextIO = out
+        self.name: str | None = name
+        self.sessions: int = 0
+        self.laps: int = 0
+        self.points: int = 0
+        self.sport: str | None = None
+
+    def begin(self) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+    def begin_session(self, sport: str, start: int) -> None:
+        self.sessions += 1
+        self.sport = sport
+
+    def end_session(self) -> None:
+        pass
+
+    def write_points(self, table: RecordTable, start: int, end: int) -> None:
+        """Write the rows of table from start to end (exclusive)."""
+        self.points += end - start
+
+    def write_lap(self, lap: LapInfo, table: RecordTable, start: int, end: int) -> None:
+        """Write the last points of lap (all of them if BUFFER_LAPS) and lap."""
+        self.write_points(table, start, end)
+        self.laps += 1
+
+
+class GpxWriter(ExportWriter):
+    """GPX 1.1: a track per session with all its points in a segment."""
+    EXTENSION = ".gpx"
+
+    def begin(self) -> None:
+        self.out.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<gpx version="1.1" creator="fit_galgo" '
+            'xmlns="http://www.topografix.com/GPX/1/1" '
+            'xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v1">\n'
+        )
+
+    def end(self) -> None:
+        self.out.write("</gpx>\n")
+
+    def begin_session(self, sport: str, start: int) -> None:
+        super().begin_session(sport, start)
+        name: str = f"<name>{escape(self.name)}</name>" if self.name else ""
+        self.out.write(f" <trk>{name}<type>{escape(sport)}</type>\n  <trkseg>\n")
+
+    def end_session(self) -> None:
+        self.out.write("  </trkseg>\n </trk>\n")
+
+    def write_points(self, table: RecordTable, start: int, end: int) -> None:
+        super().write_points(table, start, end)
+        lats = semicircles_to_degrees_array(table["position_lat"][start:end])
+        lons = semicircles_to_degrees_array(table["position_long"][start:end])
+        timestamps = table["timestamp"]
+        altitudes = table["altitude"]
+        heart_rates = table["heart_rate"]
+        cadences = table["cadence"]
+        lines: list[str] = []
+        for i in range(start, end):
+            lat: float = lats[i - start]
+            lon: float = lons[i - start]
+            # GPX points must have a position.
+            if not _known(lat) or not _known(lon):
+                continue
+            point: str = f'   <trkpt lat="{lat:.7f}" lon="{lon:.7f}">'
+            if _known(altitudes[i]):
+                point += f"<ele>{altitudes[i]:.1f}</ele>"
+            point += f"<time>{iso_time(timestamps[i])}</time>"
+            extensions: str = ""
+            if _known(heart_rates[i]):
+                extensions += f"<gpxtpx:hr>{heart_rates[i]:.0f}</gpxtpx:hr>"
+            if _known(cadences[i]):
+                extensions += f"<gpxtpx:cad>{cadences[i]:.0f}</gpxtpx:cad>"
+            if extensions:
+                point += (
+                    "<extensions><gpxtpx:TrackPointExtension>"
+                    f"{extensions}</gpxtpx:TrackPointExtension></extensions>"
+                )
+            lines.append(point + "</trkpt>\n")
+        self.out.write("".join(lines))
+
+
+class TcxWriter(ExportWriter):
+    """TCX: an Activity per session with its laps and their track points."""
+    EXTENSION = ".tcx"
+    BUFFER_LAPS = True
+
+    # TCX only knows these sports.
+    SPORTS: dict[str, str] = {"running": "Running", "cycling": "Biking"}
+
+    def begin(self) -> None:
+        self.out.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<TrainingCenterDatabase '
+            'xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2">\n'
+            ' <Activities>\n'
+        )
+
+    def end(self) -> None:
+        self.out.write(" </Activities>\n</TrainingCenterDatabase>\n")
+
+    def begin_session(self, sport: str, start: int) -> None:
+        super().begin_session(sport, start)
+        self.out.write(
+            f'  <Activity Sport="{self.SPORTS.get(sport, "Other")}">'
+            f"<Id>{iso_time(start)}</Id>\n"
+        )
+
+    def end_session(self) -> None:
+        self.out.write("  </Activity>\n")
+
+    def write_lap(self, lap: LapInfo, table: RecordTable, start: int, end: int) -> None:
+        lap_xml: str = (
+            f'   <Lap StartTime="{iso_time(lap.start)}">'
+            f"<TotalTimeSeconds>{lap.timer or lap.elapsed or 0:.1f}</TotalTimeSeconds>"
+            f"<DistanceMeters>{lap.distance or 0:.1f}</DistanceMeters>"
+            f"<Calories>{lap.calories or 0:.0f}</Calories>"
+        )
+        if lap.avg_heart_rate is not None:
+            lap_xml += (
+                "<AverageHeartRateBpm><Value>"
+                f"{lap.avg_heart_rate:.0f}</Value></AverageHeartRateBpm>"
+            )
+        if lap.max_heart_rate is not None:
+            lap_xml += (
+                "<MaximumHeartRateBpm><Value>"
+                f"{lap.max_heart_rate:.0f}</Value></MaximumHeartRateBpm>"
+            )
+        self.out.write(
+            lap_xml + "<Intensity>Active</Intensity>"
+            "<TriggerMethod>Manual</TriggerMethod>\n    <Track>\n"
+        )
+        super().write_lap(lap, table, start, end)
+        self.out.write("    </Track>\n   </Lap>\n")
+
+    def write_points(self, table: RecordTable, start: int, end: int) -> None:
+        super().write_points(table, start, end)
+        lats = semicircles_to_degrees_array(table["position_lat"][start:end])
+        lons = semicircles_to_degrees_array(table["position_long"][start:end])
+        timestamps = table["timestamp"]
+        altitudes = table["altitude"]
+        distances = table["distance"]
+        heart_rates = table["heart_rate"]
+        cadences = table["cadence"]
+        lines: list[str] = []
+        for i in range(start, end):
+            point: str = f"     <Trackpoint><Time>{iso_time(timestamps[i])}</Time>"
+            lat: float = lats[i - start]
+            lon: float = lons[i - start]
+            if _known(lat) and _known(lon):
+                point += (
+                    f"<Position><LatitudeDegrees>{lat:.7f}</LatitudeDegrees>"
+                    f"<LongitudeDegrees>{lon:.7f}</LongitudeDegrees></Position>"
+                )
+            if _known(altitudes[i]):
+                point += f"<AltitudeMeters>{altitudes[i]:.1f}</AltitudeMeters>"
+            if _known(distances[i]):
+                point += f"<DistanceMeters>{distances[i]:.2f}</DistanceMeters>"
+            if _known(heart_rates[i]):
+                point += (
+                    f"<HeartRateBpm><Value>{heart_rates[i]:.0f}</Value></HeartRateBpm>"
+                )
+            if _known(cadences[i]):
+                point += f"<Cadence>{cadences[i]:.0f}</Cadence>"
+            lines.append(point + "</Trackpoint>\n")
+        self.out.write("".join(lines))
+
+
+class CsvWriter(ExportWriter):
+    """CSV: a row per point with its session and lap (0-based) in degrees."""
+    EXTENSION = ".csv"
+
+    HEADER: tuple[str, ...] = (
+        "session", "lap", "sport", "timestamp", "lat", "lon", "altitude",
+        "distance", "speed", "heart_rate", "cadence", "power"
+    )
+
+    def begin(self) -> None:
+        self.out.write(",".join(self.HEADER) + "\n")
+
+    def write_points(self, table: RecordTable, start: int, end: int) -> None:
+        super().write_points(table, start, end)
+        lats = semicircles_to_degrees_array(table["position_lat"][start:end])
+        lons = semicircles_to_degrees_array(table["position_long"][start:end])
+        columns = [
+            table[name] for name in
+            ("altitude", "distance", "speed", "heart_rate", "cadence", "power")
+        ]
+        timestamps = table["timestamp"]
+        prefix: str = f"{self.sessions - 1},{self.laps},{self.sport}"
+        lines: list[str] = []
+        for i in range(start, end):
+            values: list[str] = [
+                _csv_value(lats[i - start], 7), _csv_value(lons[i - start], 7)
+            ]
+            values.extend(_csv_value(column[i], 2) for column in columns)
+            lines.append(f"{prefix},{iso_time(timestamps[i])},{','.join(values)}\n")
+        self.out.write("".join(lines))
+
+
+def _csv_value(value: float, digits: int) -> str:
+    return f"{value:.{digits}f}" if _known(value) else ""
+
+
+WRITERS: dict[str, type[ExportWriter]] = {
+    "gpx": GpxWriter,
+    "tcx": TcxWriter,
+    "csv": CsvWriter
+}
@@ -0,0 +1,213 @@
+import struct
+from typing import NamedTuple
+
+from fit_galgo.fit.crc import read_header
+
+# Bits of the record headers (see the FIT protocol).
+COMPRESSED_HEADER_MASK = 0x80
+DEFINITION_MASK = 0x40
+DEVELOPER_DATA_MASK = 0x20
+LOCAL_MESG_NUM_MASK = 0x0F
+COMPRESSED_LOCAL_MESG_NUM_MASK = 0x03
+
+# Bytes of a definition before its fields: header, reserved, architecture,
+# global message number (2) and number of fields.
+DEFINITION_SIZE = 6
+FIELD_DEFINITION_SIZE = 3
+
+
+class Definition(NamedTuple):
+    """A definition message read from the bytes of a file."""
+    local: int
+    global_num: int
+    field_nums: bytes
+    size: int  # bytes of its data messages (without the record header)
+    end: int  # position after the definition
+
+
+def read_definition(data: bytes, position: int) -> Definition | None:
+    """Read the definition message at data[position:].
+
+    :return: the definition or None if data ends before it.
+    """
+    if position + DEFINITION_SIZE > len(data):
+        return None
+    record_header: int = data[position]
+    n_fields: int = data[position + 5]
+    end: int = position + DEFINITION_SIZE + n_fields * FIELD_DEFINITION_SIZE
+    field_nums: bytes = data[position + DEFINITION_SIZE:end:FIELD_DEFINITION_SIZE]
+    size: int = sum(data[position + DEFINITION_SIZE + 1:end:FIELD_DEFINITION_SIZE])
+    if record_header & DEVELOPER_DATA_MASK:
+        if end >= len(data):
+            return None
+        n_developer_fields: int = data[end]
+        size += sum(data[end + 2:end + 1 + n_developer_fields * 3:3])
+        end += 1 + n_developer_fields * FIELD_DEFINITION_SIZE
+    if end > len(data):
+        return None
+    big_endian: bool = data[position + 2] == 1
+    (global_num,) = struct.unpack_from(
+        ">H" if big_endian else "<H", data, position + 3
+    )
+    return Definition(
+        record_header & LOCAL_MESG_NUM_MASK, global_num, field_nums, size, end
+    )
+
+
+def local_mesg_num(record_header: int) -> int:
+    """Local message number of a data message header."""
+    if record_header & COMPRESSED_HEADER_MASK:
+        return (record_header >> 5) & COMPRESSED_LOCAL_MESG_NUM_MASK
+    return record_header & LOCAL_MESG_NUM_MASK
+
+
+class Chunk(NamedTuple):
+    """A range of messages of a file that can be decoded on its own.
+
+    definitions are the bytes of the definition messages active at start, so
+    they're decoded before the messages of the chunk.
+    """
+    start: int
+    end: int
+    definitions: bytes
+
+
+class ScanResult(NamedTuple):
+    """Result of prescan: the chunks or why the file can't be split."""
+    chunks: list[Chunk]
+    reason: str | None = None
+
+    @property
+    def parallel(self) -> bool:
+        return self.reason is None
+
+
+_stateful_fields: set[tuple[int, int]] | None = None
+
+
+def stateful_fields() -> set[tuple[int, int]]:
+    """Return the (message, field) numbers whose decoding depends on the
+    messages decoded before.
+
+    They are the fields with components that are accumulated (the decoder
+    keeps the accumulated value between messages).
+    """
+    global _stateful_fields
+    if _stateful_fields is None:
+        from garmin_fit_sdk import Profile
+
+        _stateful_fields = set()
+        for mesg_num, message in Profile["messages"].items():
+            fields: dict = message["fields"]
+            accumulated: set[int] = {
+                f["num"] for f in fields.values() if f.get("is_accumulated")
+            }
+            for field in fields.values():
+                components: list[int] = list(field.get("components", []))
+                for sub_field in field.get("sub_fields", []):
+                    components.extend(sub_field.get("components", []))
+                if accumulated.intersection(components):
+                    _stateful_fields.add((mesg_num, field["num"]))
+    return _stateful_fields
+
+
+def prescan(data: bytes, n_chunks: int) -> ScanResult:
+    """Split the messages of a FIT file into about n_chunks chunks.
+
+    It only reads the record headers and the definitions, so it's much
+    faster than decoding. The file can't be split (see ScanResult.reason) if
+    it's a chained file or if a message can't be decoded without the
+    messages before it: developer fields, compressed timestamps or
+    accumulated fields.
+    """
+    header = read_header(data[:14])
+    start: int = header.header_size
+    end: int = header.header_size + header.data_size
+    if end + 2 < len(data):
+        return ScanResult([], "chained FIT files")
+    if end > len(data):
+        return ScanResult([], "truncated file")
+
+    stateful: set[tuple[int, int]] = stateful_fields()
+    chunk_size: int = max((end - start) // max(n_chunks, 1), 1)
+    chunks: list[Chunk] = []
+    chunk_start: int = start
+    chunk_definitions: bytes = b""
+    definitions: dict[int, bytes] = {}
+    sizes: dict[int, int] = {}
+    position: int = start
+    while position < end:
+        if position - chunk_start >= chunk_size:
+            chunks.append(Chunk(chunk_start, position, chunk_definitions))
+            chunk_start = position
+            chunk_definitions = b"".join(definitions.values())
+
+        record_header: int = data[position]
+        if record_header & COMPRESSED_HEADER_MASK:
+            return ScanResult([], "compressed timestamps")
+        if not record_header & DEFINITION_MASK:
+            local: int = record_header & LOCAL_MESG_NUM_MASK
+            if local not in sizes:
+                return ScanResult([], "message without definition")
+            position += 1 + sizes[local]
+            continue
+
+        if record_header & DEVELOPER_DATA_MASK:
+            return ScanResult([], "developer fields")
+        definition: Definition | None = read_definition(data, position)
+        if definition is None:
+            break
+        global_num: int = definition.global_num
+        if any((global_num, num) in stateful for num in definition.field_nums):
+            return ScanResult([], "accumulated fields")
+        # Definitions are kept in the order they're found.
+        definitions.pop(definition.local, None)
+        definitions[definition.local] = data[position:definition.end]
+        sizes[definition.local] = definition.size
+        position = definition.end
+
+    if position != end:
+        return ScanResult([], "truncated message")
+    if chunk_start < end:
+        chunks.append(Chunk(chunk_start, end, chunk_definitions))
+    return ScanResult(chunks)
+
+
+def decode_chunk(
+        fit_file_path: str, chunk: Chunk, mesg_nums: frozenset[int]
+) -> tuple[list[tuple[int, dict]], list[Exception]]:
+    """Decode the messages of a chunk (the task of the workers).
+
+    :mesg_nums frozenset[int]: messages returned whole. Only the timestamp
+                               and timestamp_16 of the rest are returned (if
+                               they have them).
+    :return: the (message number, message) in order and the decoding errors.
+    """
+    from garmin_fit_sdk import Decoder, Stream
+    from garmin_fit_sdk.decoder import DecodeMode
+
+    with open(fit_file_path, "rb") as fit_file:
+        fit_file.seek(chunk.start)
+        data: bytes = fit_file.read(chunk.end - chunk.start)
+
+    messages: list[tuple[int, dict]] = []
+
+    def listener(mesg_num: int, mesg: dict) -> None:
+        if mesg_num in mesg_nums:
+            messages.append((mesg_num, mesg))
+        else:
+            # The listener tracks the last timestamp with them.
+            timestamps: dict = {
+                k: mesg[k] for k in ("timestamp", "timestamp_16") if k in mesg
+            }
+            if timestamps:
+                messages.append((mesg_num, timestamps))
+
+    # DATA_ONLY streams have no header and end with the (unchecked) CRC.
+    decoder = Decoder(Stream.from_byte_array(chunk.definitions + data + b"\0\0"))
+    _, errors = decoder.read(
+        mesg_listener=listener,
+        enable_crc_check=False,
+        decode_mode=DecodeMode.DATA_ONLY
+    )
+    return messages, errors
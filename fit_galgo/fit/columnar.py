@@ -0,0 +1,456 @@
+from array import array
+from datetime import datetime
+from enum import IntFlag
+from typing import Any, Callable, Iterable
+
+from fit_galgo.fit.definitions import VOCABULARY
+from fit_galgo.fit.exceptions import UnexpectedDataMessageException
+
+# Type codes of the columns: the ones of array plus "O" for Python objects
+# (strings or values of several types) that are kept in a list and "C" for
+# the values of enumerated fields, kept as codes (see CategoryColumn).
+OBJECT = "O"
+CATEGORY = "C"
+
+NAN = float("nan")
+
+
+class SparseColumn:
+    """A column that only stores its values that aren't None.
+
+    rows are the (ascending) row indexes with value and values their values.
+
+    :typecode str: type code of the values (see array) or "O".
+    """
+    __slots__ = ("typecode", "rows", "values")
+
+    def __init__(self, typecode: str) -> None:
+        self.typecode: str = typecode
+        self.rows: array = array("I")
+        self.values: array | list = [] if typecode == OBJECT else array(typecode)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def nbytes(self) -> int:
+        values_size: int = (
+            len(self.values) * 8 if self.typecode == OBJECT
+            else len(self.values) * self.values.itemsize
+        )
+        return len(self.rows) * self.rows.itemsize + values_size
+
+    def append(self, row: int, value: Any) -> None:
+        self.rows.append(row)
+        self.values.append(value)
+
+    def dense(self, size: int) -> array | list:
+        """Return the values of the size rows: NaN (None if "O") without value.
+
+        Integer values are returned as floats unless all rows have value, and
+        then the values themselves are returned (no copy is made).
+        """
+        if len(self.rows) == size and self.typecode != OBJECT:
+            return self.values
+        values: array | list = (
+            [None] * size if self.typecode == OBJECT else array("d", [NAN]) * size
+        )
+        for row, value in zip(self.rows, self.values):
+            values[row] = value
+        return values
+
+    def take(self, rows: Iterable[int]) -> list:
+        """Return the values of rows (ascending), None for rows without value."""
+        own_rows: array = self.rows
+        values = self.values
+        size: int = len(own_rows)
+        taken: list = []
+        i: int = 0
+        for row in rows:
+            while i < size and own_rows[i] < row:
+                i += 1
+            taken.append(values[i] if i < size and own_rows[i] == row else None)
+        return taken
+
+
+class CategoryColumn(SparseColumn):
+    """A SparseColumn of an enumerated field: its values are a few strings
+    repeated again and again.
+
+    values are the codes (2 bytes each) of the values in categories, whose
+    values are interned (see Vocabulary), so each one is stored once.
+    """
+    __slots__ = ("categories", "codes")
+
+    def __init__(self, typecode: str = CATEGORY) -> None:
+        super().__init__("H")
+        self.typecode = CATEGORY
+        self.categories: list = []
+        self.codes: dict = {}
+
+    def append(self, row: int, value: Any) -> None:
+        code: int | None = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.categories)
+            self.categories.append(VOCABULARY.intern(value))
+        self.rows.append(row)
+        self.values.append(code)
+
+    def dense(self, size: int) -> list:
+        """Return the values of the size rows (None without value)."""
+        categories: list = self.categories
+        values: list = [None] * size
+        for row, code in zip(self.rows, self.values):
+            values[row] = categories[code]
+        return values
+
+    def take(self, rows: Iterable[int]) -> list:
+        categories: list = self.categories
+        return [
+            categories[code] if code is not None else None
+            for code in super().take(rows)
+        ]
+
+    def set_categories(self, categories: list) -> None:
+        """Set the values of the codes (see MonitoringTable.from_buffers)."""
+        self.categories = [VOCABULARY.intern(value) for value in categories]
+        self.codes = {value: code for code, value in enumerate(self.categories)}
+
+
+class MonitoringKind(IntFlag):
+    """What a MONITORING message carries. A message can carry several."""
+    OTHER = 0
+    STEPS = 1
+    HEART_RATE = 2
+    INTENSITY = 4
+    ASCENT = 8
+    CALORIES = 16
+
+
+# Fields (of the MONITORING message) that set each kind.
+MONITORING_KIND_FIELDS: dict[MonitoringKind, tuple[str, ...]] = {
+    MonitoringKind.STEPS: ("steps", "cycles", "distance"),
+    MonitoringKind.HEART_RATE: ("heart_rate",),
+    MonitoringKind.INTENSITY: ("moderate_activity_minutes", "vigorous_activity_minutes"),
+    MonitoringKind.ASCENT: ("ascent", "descent"),
+    MonitoringKind.CALORIES: ("calories", "active_calories")
+}
+
+_KIND_BY_FIELD: dict[str, MonitoringKind] = {
+    name: kind for kind, names in MONITORING_KIND_FIELDS.items() for name in names
+}
+
+
+class MonitoringTable:
+    """MONITORING messages stored by columns (see Monitoring).
+
+    Most of the fields of a MONITORING message are None, so each column is a
+    SparseColumn. kinds is the MonitoringKind of each row so the rows that
+    carry some data can be selected without looking into the columns.
+    timestamp is stored as Unix epoch seconds.
+    """
+    COLUMNS: dict[str, str] = {
+        "timestamp": "q",
+        "calories": "q",
+        "distance": "d",
+        "cycles": "d",
+        "steps": "q",
+        "strokes": "q",
+        "active_time": "d",
+        "activity_type": CATEGORY,
+        "activity_subtype": CATEGORY,
+        "activity_level": CATEGORY,
+        "distance_16": "q",
+        "cycles_16": "q",
+        "active_time_16": "q",
+        "local_timestamp": "q",
+        "temperature": "q",
+        "temperature_min": "q",
+        "temperature_max": "q",
+        "activity_time": "q",
+        "active_calories": "q",
+        "current_activity_type_intensity": "q",
+        "timestamp_min_8": "q",
+        "timestamp_16": "q",
+        "heart_rate": "q",
+        "intensity": "q",
+        "duration_min": "q",
+        "duration": "q",
+        "ascent": "d",
+        "descent": "d",
+        "moderate_activity_minutes": "q",
+        "vigorous_activity_minutes": "q",
+        "last_timestamp": "q"
+    }
+
+    def __init__(self) -> None:
+        self.kinds: array = array("B")
+        self.columns: dict[str, SparseColumn] = {
+            name: (CategoryColumn if typecode == CATEGORY else SparseColumn)(typecode)
+            for name, typecode in self.COLUMNS.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, name: str) -> SparseColumn:
+        return self.columns[name]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate bytes of the data (not counting the Python objects)."""
+        return len(self.kinds) + sum(c.nbytes for c in self.columns.values())
+
+    @classmethod
+    def from_monitorings(cls, monitorings: Iterable) -> "MonitoringTable":
+        """Build a table from Monitoring models."""
+        table = cls()
+        for monitoring in monitorings:
+            table.append({
+                name: getattr(monitoring, name) for name in cls.COLUMNS
+                if getattr(monitoring, name) is not None
+            })
+        return table
+
+    def append(self, mesg: dict, last_timestamp: int | None = None) -> None:
+        """Append a MONITORING message as decoded by the SDK.
+
+        :mesg dict: the message (fields not in COLUMNS are discarded).
+        :last_timestamp int: Unix epoch seconds of the last full timestamp
+                             decoded before the message (if it isn't in mesg).
+        :raise: UnexpectedDataMessageException if a value has a wrong type.
+        """
+        columns: dict[str, SparseColumn] = self.columns
+        row: int = len(self.kinds)
+        kind: int = MonitoringKind.OTHER
+        values: list[tuple[SparseColumn, Any]] = []
+        for name, value in mesg.items():
+            column: SparseColumn | None = columns.get(name)
+            if column is None or value is None:
+                continue
+            try:
+                if isinstance(value, datetime):
+                    value = int(value.timestamp())
+                elif column.typecode == "q":
+                    value = int(value)
+                elif column.typecode == "d":
+                    value = float(value)
+            except (TypeError, ValueError):
+                raise UnexpectedDataMessageException(
+                    "monitoring", f"wrong value for '{name}': {value!r}"
+                )
+            values.append((column, value))
+            kind |= _KIND_BY_FIELD.get(name, 0)
+        if last_timestamp is not None and mesg.get("last_timestamp") is None:
+            values.append((columns["last_timestamp"], last_timestamp))
+
+        # The row is only appended when all its values are right.
+        for column, value in values:
+            column.append(row, value)
+        self.kinds.append(kind)
+
+    def rows(self, kind: MonitoringKind, *required: str) -> list[int]:
+        """Return the rows of kind (some of its flags) with value in required."""
+        rows: list[int] = [i for i, k in enumerate(self.kinds) if k & kind]
+        for name in required:
+            present: set[int] = set(self.columns[name].rows)
+            rows = [row for row in rows if row in present]
+        return rows
+
+    def to_arrays(self) -> dict[str, array | list]:
+        """Return the columns with a value per row (see SparseColumn.dense)."""
+        size: int = len(self.kinds)
+        return {
+            "kind": self.kinds,
+            **{name: column.dense(size) for name, column in self.columns.items()}
+        }
+
+    def buffers(self) -> dict[str, array | list]:
+        """Return the arrays (and lists) that hold the table (not copied)."""
+        buffers: dict[str, array | list] = {"kinds": self.kinds}
+        for name, column in self.columns.items():
+            buffers[f"{name}.rows"] = column.rows
+            buffers[f"{name}.values"] = column.values
+            if isinstance(column, CategoryColumn):
+                buffers[f"{name}.categories"] = column.categories
+        return buffers
+
+    @classmethod
+    def from_buffers(cls, buffers: dict[str, array | list]) -> "MonitoringTable":
+        """Build a table from its buffers (see buffers)."""
+        table = cls()
+        table.kinds = buffers["kinds"]
+        for name, column in table.columns.items():
+            column.rows = buffers[f"{name}.rows"]
+            column.values = buffers[f"{name}.values"]
+            if isinstance(column, CategoryColumn):
+                column.set_categories(buffers[f"{name}.categories"])
+        return table
+
+    def row(self, row: int) -> dict[str, Any]:
+        """Return the values (not None) of row."""
+        values: dict[str, Any] = {}
+        for name, column in self.columns.items():
+            value = column.take([row])[0]
+            if value is not None:
+                values[name] = value
+        return values
+
+
+class RecordTable:
+    """RECORD messages of an activity stored by columns (see Record).
+
+    Records have most of their fields, so the columns are dense arrays: NaN
+    where a record has no value. timestamp is stored as Unix epoch seconds,
+    altitude, distance and speed are the enhanced values if there are and
+    the positions are in semicircles.
+    """
+    COLUMNS: tuple[str, ...] = (
+        "distance", "altitude", "speed", "heart_rate", "cadence", "power",
+        "position_lat", "position_long"
+    )
+
+    def __init__(self) -> None:
+        self.timestamp: array = array("q")
+        self.columns: dict[str, array] = {name: array("d") for name in self.COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __getitem__(self, name: str) -> array:
+        return self.timestamp if name == "timestamp" else self.columns[name]
+
+    @classmethod
+    def from_records(cls, records: Iterable) -> "RecordTable":
+        """Build a table from Record models."""
+        table = cls()
+        for record in records:
+            table.append(record)
+        return table
+
+    def append(self, record) -> None:
+        self._append(int(record.timestamp.timestamp()), {
+            "distance": _first_value(record.enhanced_distance, record.distance),
+            "altitude": _first_value(record.enhanced_altitude, record.altitude),
+            "speed": _first_value(record.enhanced_speed, record.speed),
+            "heart_rate": record.heart_rate,
+            "cadence": record.cadence,
+            "power": record.power,
+            "position_lat": record.position_lat,
+            "position_long": record.position_long
+        })
+
+    def append_mesg(self, mesg: dict) -> None:
+        """Append a RECORD message as decoded by the SDK.
+
+        :raise: UnexpectedDataMessageException if it has no timestamp.
+        """
+        get = mesg.get
+        timestamp: datetime | None = get("timestamp")
+        if timestamp is None:
+            raise UnexpectedDataMessageException("record", "no timestamp")
+        self._append(int(timestamp.timestamp()), {
+            "distance": _first_value(get("enhanced_distance"), get("distance")),
+            "altitude": _first_value(get("enhanced_altitude"), get("altitude")),
+            "speed": _first_value(get("enhanced_speed"), get("speed")),
+            "heart_rate": get("heart_rate"),
+            "cadence": get("cadence"),
+            "power": get("power"),
+            "position_lat": get("position_lat"),
+            "position_long": get("position_long")
+        })
+
+    def to_arrays(self) -> dict[str, array]:
+        """Return the columns themselves (no copy is made)."""
+        return {"timestamp": self.timestamp, **self.columns}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, array]) -> "RecordTable":
+        """Build a table from its columns (see to_arrays)."""
+        table = cls()
+        table.timestamp = arrays["timestamp"]
+        table.columns = {name: arrays[name] for name in cls.COLUMNS}
+        return table
+
+    def slice(self, start: int, end: int) -> "RecordTable":
+        """Return a new table with the rows from start to end (exclusive)."""
+        table = RecordTable()
+        table.timestamp = self.timestamp[start:end]
+        table.columns = {
+            name: column[start:end] for name, column in self.columns.items()
+        }
+        return table
+
+    def _append(self, timestamp: int, values: dict[str, Any]) -> None:
+        self.timestamp.append(timestamp)
+        for name, column in self.columns.items():
+            value = values[name]
+            column.append(float(value) if value is not None else NAN)
+
+
+class LazyList(list):
+    """A list whose items are built the first time they're used.
+
+    Its length is known without building them, so a list of models kept by
+    columns (see fit_galgo.transport.receive) only costs the columns until
+    someone reads its items. Code that reads the items of lists without
+    their methods (e.g. pydantic serializers) must call build first.
+
+    :size int: the number of items.
+    :build Callable: returns the items (it must be picklable to pickle the
+                     list before its items are built).
+    """
+    __slots__ = ("_size", "_build")
+
+    def __init__(self, size: int, build: Callable[[], list]) -> None:
+        super().__init__()
+        self._size: int = size
+        self._build: Callable[[], list] | None = build
+
+    @property
+    def built(self) -> bool:
+        return self._build is None
+
+    def build(self) -> "LazyList":
+        if self._build is not None:
+            build, self._build = self._build, None
+            list.extend(self, build())
+        return self
+
+    def __len__(self) -> int:
+        return list.__len__(self) if self._build is None else self._size
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __reduce__(self):
+        if self._build is not None:
+            return (LazyList, (self._size, self._build))
+        return (list, (list(self),))
+
+
+def _building(name: str):
+    method = getattr(list, name)
+
+    def built_method(self, *args, **kwargs):
+        self.build()
+        return method(self, *args, **kwargs)
+    built_method.__name__ = name
+    return built_method
+
+
+for _name in (
+        "__iter__", "__reversed__", "__getitem__", "__contains__", "__eq__",
+        "__ne__", "__lt__", "__le__", "__gt__", "__ge__", "__repr__", "__add__",
+        "__mul__", "__rmul__", "__iadd__", "__imul__", "__setitem__",
+        "__delitem__", "append", "extend", "insert", "remove", "pop", "clear",
+        "index", "count", "sort", "reverse", "copy"
+):
+    setattr(LazyList, _name, _building(_name))
+
+
+def _first_value(*values):
+    for value in values:
+        if value is not None:
+            return value
+    return None
@@ -0,0 +1,184 @@
+import os
+import struct
+import sys
+from array import array
+from enum import StrEnum
+from typing import BinaryIO, NamedTuple
+
+from fit_galgo.fit.exceptions import FitIntegrityException
+
+HEADER_WITH_CRC_SIZE = 14
+HEADER_WITHOUT_CRC_SIZE = 12
+CRC_SIZE = 2
+DATA_TYPE = b".FIT"
+
+# Bytes read at once when the CRC of a file is computed.
+CHUNK_SIZE = 1 << 20
+
+
+class IntegrityMode(StrEnum):
+    """How the integrity of a FIT file is verified before decoding it.
+
+    - strict: the header and the CRCs of the header and the whole file.
+    - header: only the header (size, data type, header CRC and that the file
+      is as long as the header says).
+    - none: nothing, for trusted files (for example, our own cache).
+    """
+    STRICT = "strict"
+    HEADER = "header"
+    NONE = "none"
+
+
+class FitHeader(NamedTuple):
+    header_size: int
+    protocol_version: int
+    profile_version: int
+    data_size: int
+    data_type: bytes
+    crc: int
+
+    @property
+    def file_size(self) -> int:
+        """The size of the file (header, data and CRC) described by the header."""
+        return self.header_size + self.data_size + CRC_SIZE
+
+
+def _build_crc_table() -> list[int]:
+    # CRC-16 of the FIT protocol: reflected polynomial 0xA001, initial value 0.
+    table: list[int] = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+CRC_TABLE: list[int] = _build_crc_table()
+
+# The CRC after two bytes only depends on crc ^ (the two bytes as a little
+# endian word), so a table with the 65536 words processes two bytes per
+# step. It's built the first time it's needed.
+_crc_table_16: list[int] = []
+
+
+def _get_crc_table_16() -> list[int]:
+    if not _crc_table_16:
+        table = CRC_TABLE
+        for x in range(65536):
+            crc = (x >> 8) ^ table[x & 0xFF]
+            _crc_table_16.append((crc >> 8) ^ table[crc & 0xFF])
+    return _crc_table_16
+
+
+def crc16(data: bytes | bytearray | memoryview, crc: int = 0) -> int:
+    """Return the FIT CRC-16 of data, continuing from crc.
+
+    The CRC of a block followed by its (little endian) CRC is 0.
+    """
+    table_16 = _get_crc_table_16()
+    size: int = len(data) & ~1
+    words = array("H")
+    words.frombytes(memoryview(data)[:size])
+    if sys.byteorder == "big":
+        words.byteswap()
+    for word in words:
+        crc = table_16[crc ^ word]
+    if size < len(data):
+        crc = (crc >> 8) ^ CRC_TABLE[(crc ^ data[size]) & 0xFF]
+    return crc
+
+
+def read_header(data: bytes, offset: int = 0) -> FitHeader:
+    """Read the header of the FIT file that starts in data[offset:].
+
+    :raise: FitIntegrityException if it isn't a FIT file header.
+    """
+    if len(data) - offset < HEADER_WITHOUT_CRC_SIZE:
+        raise FitIntegrityException("The file is not a fit file: too short header")
+    header_size: int = data[offset]
+    if header_size not in (HEADER_WITH_CRC_SIZE, HEADER_WITHOUT_CRC_SIZE):
+        raise FitIntegrityException(
+            f"The file is not a fit file: wrong header size {header_size}"
+        )
+    if len(data) - offset < header_size:
+        raise FitIntegrityException("The file is not a fit file: too short header")
+
+    protocol, profile, data_size, data_type = struct.unpack_from(
+        "<BHI4s", data, offset + 1
+    )
+    if data_type != DATA_TYPE:
+        raise FitIntegrityException("The file is not a fit file: wrong data type")
+    crc: int = 0
+    if header_size == HEADER_WITH_CRC_SIZE:
+        crc = struct.unpack_from("<H", data, offset + HEADER_WITHOUT_CRC_SIZE)[0]
+    return FitHeader(header_size, protocol, profile, data_size, data_type, crc)
+
+
+def verify_header(header_data: bytes, file_size: int) -> FitHeader:
+    """Verify the header of a FIT file of file_size bytes.
+
+    :header_data bytes: the bytes of the header (at least 14 bytes if the file
+                        is longer than that).
+    :file_size int: bytes of the file, from the header.
+    :return: the header.
+    :raise: FitIntegrityException if the header is wrong.
+    """
+    header: FitHeader = read_header(header_data)
+    if header.file_size > file_size:
+        raise FitIntegrityException(
+            f"Truncated file: {header.file_size} bytes expected but got {file_size}"
+        )
+    if header.crc != 0 and crc16(header_data[:HEADER_WITHOUT_CRC_SIZE]) != header.crc:
+        raise FitIntegrityException("Header CRC Error")
+    return header
+
+
+def verify_stream(
+        stream: BinaryIO,
+        size: int,
+        mode: IntegrityMode = IntegrityMode.STRICT,
+        chunk_size: int = CHUNK_SIZE
+) -> None:
+    """Verify the FIT file (or chained FIT files) of size bytes in stream.
+
+    :raise: FitIntegrityException if the file is wrong.
+    """
+    if mode == IntegrityMode.NONE:
+        return
+    position: int = 0
+    while position < size:
+        header_data: bytes = stream.read(HEADER_WITH_CRC_SIZE)
+        header: FitHeader = verify_header(header_data, size - position)
+        if mode == IntegrityMode.HEADER:
+            stream.seek(position + header.file_size)
+        else:
+            # The CRC of the header, data and CRC is 0 if the file is right.
+            crc: int = crc16(header_data)
+            pending: int = header.file_size - len(header_data)
+            while pending > 0:
+                chunk: bytes = stream.read(min(chunk_size, pending))
+                if not chunk:
+                    # The stream ended before size (e.g. a growing file).
+                    raise FitIntegrityException(
+                        f"Truncated file: {pending} bytes of "
+                        f"{header.file_size} not read"
+                    )
+                crc = crc16(chunk, crc)
+                pending -= len(chunk)
+            if crc != 0:
+                raise FitIntegrityException("CRC Error")
+        position += header.file_size
+
+
+def verify_file(
+        fit_file_path: str,
+        mode: IntegrityMode = IntegrityMode.STRICT,
+        chunk_size: int = CHUNK_SIZE
+) -> None:
+    """Verify the integrity of the FIT file fit_file_path.
+
+    :raise: FitIntegrityException if the file is wrong.
+    """
+    with open(fit_file_path, "rb") as stream:
+        verify_stream(stream, os.path.getsize(fit_file_path), mode, chunk_size)
@@ -1,3 +1,4 @@
+from collections.abc import Hashable, Iterable
 from enum import Enum, StrEnum
 
 UNKNOWN = "unknown"
@@ -182,6 +183,32 @@ ACTIVITY_TYPES = {
 }
 ACTIVITY_TYPE_UNKNOWN = "unknown"
 
+# FIT file types (FILE_ID's type): the names are the ones from the FIT
+# standard (Profile), the others are Garmin's files not described there.
+FILE_TYPES = {
+    1: "device",
+    2: "settings",
+    3: "sport",
+    4: "activity",
+    5: "workout",
+    6: "course",
+    7: "schedules",
+    9: "weight",
+    10: "totals",
+    11: "goals",
+    14: "blood_pressure",
+    15: "monitoring_a",
+    20: "activity_summary",
+    28: "monitoring_daily",
+    32: "monitoring_b",
+    34: "segment",
+    35: "segment_list",
+    40: "exd_configuration",
+    49: "sleep",
+    68: "hrv_status"
+}
+FILE_TYPE_NUMS = {name: num for num, name in FILE_TYPES.items()}
+
 HRV_STATUS = {
     0: "none",
     1: "poor",
@@ -199,6 +226,96 @@ SLEEP_LEVEL = {
 }
 
 
+class Vocabulary:
+    """Interned values of the enumerated fields, each with a small int code.
+
+    A value is stored once (see intern), so the messages with the same value
+    share it, and its code (its index in values) can be stored instead of
+    the value (see columnar's CategoryColumn).
+    """
+    __slots__ = ("values", "codes")
+
+    def __init__(self, values: Iterable[Hashable] = ()) -> None:
+        self.values: list[Hashable] = []
+        self.codes: dict[Hashable, int] = {}
+        for value in values:
+            self.code(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, value: Hashable) -> bool:
+        return value in self.codes
+
+    def code(self, value: Hashable) -> int:
+        """Return the code of value (it's added if it's a new one)."""
+        code: int | None = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def intern(self, value: Hashable) -> Hashable:
+        """Return the stored value equal to value."""
+        return self.values[self.code(value)]
+
+
+# Vocabulary of the process (the known names are added when they're defined).
+VOCABULARY = Vocabulary(
+    [UNKNOWN]
+    + [member.value for member in (*SetType, *ExerciseCategories)]
+    + [
+        name for category in SPORTS.values()
+        for sport, sub_sports in category.items() for name in (sport, *sub_sports)
+    ]
+)
+
+
+class CodeTable:
+    """Names of the codes of a FIT enum (precompiled from a dict).
+
+    The codes from 0 to the last one below 256 are looked up in a tuple, the
+    others (like 254 or 65534, the "all" and "unknown" codes) in a dict. The
+    names are interned in VOCABULARY.
+    """
+    __slots__ = ("names", "sparse", "codes")
+
+    def __init__(self, names: dict[int, str]) -> None:
+        size: int = max((code + 1 for code in names if code < 256), default=0)
+        self.names: tuple[str | None, ...] = tuple(
+            VOCABULARY.intern(names[code]) if code in names else None
+            for code in range(size)
+        )
+        self.sparse: dict[int, str] = {
+            code: VOCABULARY.intern(name) for code, name in names.items() if code >= size
+        }
+        self.codes: dict[str, int] = {
+            VOCABULARY.intern(name): code for code, name in names.items()
+        }
+
+    def __contains__(self, code) -> bool:
+        return self.name(code) is not None
+
+    def name(self, code, default: str | None = None) -> str | None:
+        """Return the name of code (an int) or default if it has none."""
+        if code.__class__ is not int:
+            return default
+        name: str | None = (
+            self.names[code] if 0 <= code < len(self.names) else self.sparse.get(code)
+        )
+        return default if name is None else name
+
+    def code(self, name: str) -> int | None:
+        """Return the code of name (None if unknown)."""
+        return self.codes.get(name)
+
+
+EXERCISE_CATEGORY_NAMES = CodeTable(EXERCISE_CATEGORIES)
+ACTIVITY_TYPE_NAMES = CodeTable(ACTIVITY_TYPES)
+HRV_STATUS_NAMES = CodeTable(HRV_STATUS)
+SLEEP_LEVEL_NAMES = CodeTable(SLEEP_LEVEL)
+
+
 def is_distance_sport(sport: str) -> bool:
     return sport in SPORTS[DISTANCE_CATEGORY]
 
@@ -213,3 +330,10 @@ def is_climb_sport(sport: str) -> bool:
 
 def is_set_sport(sport: str) -> bool:
     return sport in SPORTS[SET_CATEGORY]
+
+
+def file_type_num(file_type: str | int) -> str | int:
+    """Return the number of the file type or file_type itself if unknown."""
+    if isinstance(file_type, int):
+        return file_type
+    return FILE_TYPE_NUMS.get(file_type, file_type)
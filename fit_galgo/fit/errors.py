@@ -0,0 +1,135 @@
+from collections.abc import Iterable
+from typing import NamedTuple
+
+from fit_galgo.fit.exceptions import ErrorCode, FitException
+from fit_galgo.logging.logging import get_logger
+
+# How many errors of each kind are logged. The rest are only counted and
+# reported by ErrorCollector.log_summary.
+LOG_LIMIT = 3
+
+
+class FitErrorRecord(NamedTuple):
+    """A kind of error found in a FIT file and how many times it happened.
+
+    It only holds strings and numbers so it is small and cheap to pickle or
+    to serialize.
+    """
+    code: ErrorCode
+    message: str
+    mesg_name: str | None = None
+    field: str | None = None
+    count: int = 1
+
+
+def error_code(error: Exception, default: ErrorCode = ErrorCode.DECODE) -> ErrorCode:
+    """Return the code of error (default for the errors not raised by fit_galgo)."""
+    return error.code if isinstance(error, FitException) else default
+
+
+class ErrorCollector:
+    """Aggregate the errors of a FIT file by code, message and field.
+
+    Only the first exception of each kind is kept, without its traceback so
+    it doesn't keep the frames (and the decoded data) alive, and only the
+    first log_limit errors of each kind are logged. Internal errors (maybe
+    bugs) are logged with their traceback.
+
+    :fit_file_path str: the FIT file path (to be shown in the logs).
+    :log_limit int: errors logged by kind (0 to not log anything).
+    """
+    def __init__(
+            self, fit_file_path: str | None = None, log_limit: int = LOG_LIMIT
+    ) -> None:
+        self._fit_file_path: str | None = fit_file_path
+        self._log_limit: int = log_limit
+        self._errors: dict[tuple, Exception] = {}
+        self._counts: dict[tuple, int] = {}
+        self._codes: dict[tuple, ErrorCode] = {}
+        self._total: int = 0
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __bool__(self) -> bool:
+        return self._total > 0
+
+    @property
+    def errors(self) -> list[Exception]:
+        """The first exception of each kind."""
+        return list(self._errors.values())
+
+    def add(
+            self,
+            error: Exception,
+            mesg_name: str | None = None,
+            code: ErrorCode | None = None
+    ) -> ErrorCode:
+        """Count error, keeping it if it's the first of its kind.
+
+        :error Exception: the error.
+        :mesg_name str: the message where error was found, if known and not
+                        given by error.
+        :code ErrorCode: the code of error (see error_code if None).
+        :return: the code of error.
+        """
+        code = code or error_code(error)
+        mesg_name = getattr(error, "mesg_name", None) or mesg_name
+        key = (code, mesg_name, getattr(error, "field", None))
+        count: int = self._counts.get(key, 0) + 1
+        self._counts[key] = count
+        self._total += 1
+
+        if count <= self._log_limit:
+            self._log(error, code)
+        if count == 1:
+            self._errors[key] = error.with_traceback(None)
+            self._codes[key] = code
+        return code
+
+    def extend(self, errors: Iterable[Exception], code: ErrorCode | None = None) -> None:
+        for error in errors:
+            self.add(error, code=code)
+
+    def records(self) -> list[FitErrorRecord]:
+        return [
+            FitErrorRecord(
+                code=self._codes[key],
+                message=str(error),
+                mesg_name=key[1],
+                field=key[2],
+                count=self._counts[key]
+            )
+            for key, error in self._errors.items()
+        ]
+
+    def log_summary(self) -> None:
+        """Log how many errors of each kind there are, if some were not logged."""
+        if self._log_limit <= 0 or all(
+                count <= self._log_limit for count in self._counts.values()
+        ):
+            return
+        kinds: str = "; ".join(
+            f"{r.code}"
+            f"{' in ' + r.mesg_name if r.mesg_name else ''}"
+            f"{' (' + r.field + ')' if r.field else ''}: {r.count}"
+            for r in self.records()
+        )
+        get_logger(__name__).warning(
+            f"File {self._fit_file_path}: {self._total} errors, {kinds}"
+        )
+
+    def _log(self, error: Exception, code: ErrorCode) -> None:
+        message: str = f"File {self._fit_file_path}: {code} error: {error}"
+        if code == ErrorCode.INTERNAL:
+            get_logger(__name__).error(
+                f"{message} (maybe a dev error, bug)", exc_info=error
+            )
+        else:
+            get_logger(__name__).warning(message)
+
+
+def records_from_errors(errors: Iterable[Exception]) -> list[FitErrorRecord]:
+    collector = ErrorCollector(log_limit=0)
+    collector.extend(errors)
+    return collector.records()
@@ -1,39 +1,140 @@
-from pydantic import ValidationError
+from enum import StrEnum
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pydantic import ValidationError
+
+
+class ErrorCode(StrEnum):
+    """Category of the errors found while parsing a FIT file."""
+    FIT = "fit"
+    DECODE = "decode"
+    INTEGRITY = "integrity"
+    NOT_SUPPORTED_FILE = "not_supported_file"
+    NOT_SUPPORTED_SPORT = "not_supported_sport"
+    MESSAGE_NOT_FOUND = "message_not_found"
+    UNCOMPLETE_MESSAGE = "uncomplete_message"
+    UNEXPECTED_DATA = "unexpected_data"
+    VALIDATION = "validation"
+    TOO_MANY_ERRORS = "too_many_errors"
+    INTERNAL = "internal"
+
+
+def _rebuild_exception(cls: type, args: tuple) -> "FitException":
+    error = cls.__new__(cls)
+    error.args = args
+    return error
 
 
 class FitException(Exception):
-    def __init__(self, message: str) -> None:
+    """Base of the fit_galgo exceptions.
+
+    They can be pickled (to be returned from worker processes) although their
+    constructors don't take the message.
+
+    :message str: the message of the exception.
+    :mesg_name str: the name of the message where the error is found.
+    :field str: the name of the field where the error is found.
+    """
+    code: ErrorCode = ErrorCode.FIT
+
+    def __init__(
+            self, message: str, mesg_name: str | None = None, field: str | None = None
+    ) -> None:
         super().__init__(message)
+        self.mesg_name: str | None = mesg_name
+        self.field: str | None = field
+
+    def __reduce__(self):
+        return _rebuild_exception, (type(self), self.args), self.__dict__
 
 
 class NotSupportedFitFileException(FitException):
+    code = ErrorCode.NOT_SUPPORTED_FILE
+
     def __init__(self, file_type: str) -> None:
-        super().__init__(f"The FIT file '{file_type}' is not supported")
+        super().__init__(
+            f"The FIT file '{file_type}' is not supported", "file_id", "type"
+        )
 
 
 class NotSupportedFitSportException(FitException):
+    code = ErrorCode.NOT_SUPPORTED_SPORT
+
     def __init__(self, sport: str, sub_sport: str) -> None:
-        super().__init__(f"The FIT file describes a not supported sport: {sport} ({sub_sport})")
+        super().__init__(
+            f"The FIT file describes a not supported sport: {sport} ({sub_sport})",
+            "session",
+            "sport"
+        )
 
 
 class NotFitMessageFoundException(FitException):
+    code = ErrorCode.MESSAGE_NOT_FOUND
+
     def __init__(self, message: str) -> None:
-        super().__init__(f"Not found '{message}' into FIT file")
+        super().__init__(f"Not found '{message}' into FIT file", message)
 
 
 class UncompleteMessageException(FitException):
+    code = ErrorCode.UNCOMPLETE_MESSAGE
+
     def __init__(self, message_name: str, values: list[str]) -> None:
         super().__init__(
             f"Uncomplete data to build '{message_name}' "
-            f"message: {', '.join([str(n) for n in values])}"
+            f"message: {', '.join([str(n) for n in values])}",
+            message_name,
+            ", ".join([str(n) for n in values])
         )
 
 
 class UnexpectedDataMessageException(FitException):
+    code = ErrorCode.UNEXPECTED_DATA
+
     def __init__(self, message_name: str, description: str) -> None:
-        super().__init__(f"Unexpected data for '{message_name}' message: {description}")
+        super().__init__(
+            f"Unexpected data for '{message_name}' message: {description}", message_name
+        )
 
 
 class FitMessageValidationException(FitException):
-    def __init__(self, error: ValidationError) -> None:
-        super().__init__(f"Validation error: {str(error)}")
+    """A pydantic ValidationError, without keeping it (nor the input values).
+
+    :error ValidationError: the validation error.
+    :mesg_name str: the name of the message that can't be validated.
+    """
+    code = ErrorCode.VALIDATION
+
+    def __init__(self, error: "ValidationError", mesg_name: str | None = None) -> None:
+        fields: list[str] = [
+            ".".join(str(loc) for loc in e["loc"]) for e in error.errors()
+        ]
+        super().__init__(
+            f"Validation error: {str(error)}",
+            mesg_name or error.title,
+            ", ".join(fields) or None
+        )
+
+
+class FitIntegrityException(FitException, RuntimeError):
+    """The file is not a FIT file or it's corrupted (see IntegrityMode).
+
+    It's a RuntimeError too, like the errors of the SDK's Decoder for these
+    same problems.
+    """
+    code = ErrorCode.INTEGRITY
+
+
+class TooManyErrorsException(FitException):
+    code = ErrorCode.TOO_MANY_ERRORS
+
+    def __init__(self, max_errors: int) -> None:
+        super().__init__(f"Decoding stopped after {max_errors} errors")
+
+
+class DecodeAbortedException(Exception):
+    """Raised from the messages listener to stop the decoding of a file.
+
+    The SDK's Decoder stops reading when the listener raises and returns the
+    exception as an error, so it must be discarded from the decoder errors.
+    """
@@ -0,0 +1,337 @@
+import threading
+import types
+import typing
+from collections import OrderedDict
+from collections.abc import Iterable
+from enum import Enum
+
+from pydantic import AliasChoices, BaseModel
+
+# Default of the arguments that are checked (or computed) when the instance
+# is built.
+_MISSING = object()
+
+# Defaults that can be shared by all instances.
+_IMMUTABLE_DEFAULTS = (type(None), bool, int, float, str, Enum)
+
+# Attributes of the models copied into the fast classes.
+_ATTRIBUTE_TYPES = (property, types.FunctionType, staticmethod, classmethod)
+
+# Compact classes kept (the least recently used are dropped).
+COMPACT_MODELS_SIZE = 512
+
+_fast_models: dict[type[BaseModel], type["FastMessage"]] = {}
+_compact_models: OrderedDict[
+    tuple[type[BaseModel], frozenset[str]], type["FastMessage"]
+] = OrderedDict()
+_compact_models_lock = threading.Lock()
+# Names (and aliases) of the fields of each model.
+_field_names: dict[type[BaseModel], frozenset[str]] = {}
+
+
+class FastMessage:
+    """Base of the fast message classes (see fast_model).
+
+    They have the fields, properties and methods of their pydantic MODEL but
+    the values are stored in __slots__ and they're only converted (the same
+    way pydantic converts the values the SDK gives: aliases, before and
+    after validators, enums, ints and floats), not validated.
+
+    Compact classes (see compact_model) only store the fields given to them
+    and the default value of the rest is a class attribute.
+    """
+    __slots__ = ()
+    MODEL: type[BaseModel]
+    model_fields: dict = {}
+    # Fields given when the instances are built (None if all of them).
+    FIELDS_SET: frozenset[str] | None = None
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, FastMessage) or other.MODEL is not self.MODEL:
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.model_fields
+        )
+
+    def __repr__(self) -> str:
+        values: str = ", ".join(
+            f"{name}={getattr(self, name)!r}" for name in self.__slots__
+        )
+        return f"{self.__class__.__name__}({values})"
+
+    def __reduce__(self):
+        return (_rebuild, (self.MODEL.__name__, self.model_dump(exclude_unset=True)))
+
+    @property
+    def model_fields_set(self) -> set[str]:
+        return set(self.model_fields if self.FIELDS_SET is None else self.FIELDS_SET)
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.model_fields}
+
+    def model_dump(self, exclude_unset: bool = False) -> dict:
+        """The values of the fields (only the given ones if exclude_unset)."""
+        if not exclude_unset or self.FIELDS_SET is None:
+            return self.as_dict()
+        return {
+            name: getattr(self, name) for name in self.model_fields
+            if name in self.FIELDS_SET
+        }
+
+    def to_model(self) -> BaseModel:
+        """The pydantic model with the same values (and the same fields set)."""
+        return self.MODEL.model_validate(self.model_dump(exclude_unset=True))
+
+
+def _rebuild(model_name: str, values: dict) -> FastMessage:
+    return compact_model(_message_model(model_name), values)(**values)
+
+
+def _message_model(model_name: str) -> type[BaseModel]:
+    from fit_galgo.fit.messages import MESSAGES
+
+    for message in MESSAGES.values():
+        if message["model_cls"].__name__ == model_name:
+            return message["model_cls"]
+    raise LookupError(f"Unknown message model '{model_name}'")
+
+
+def _validate(model_cls: type[BaseModel], values: dict, extra: dict) -> None:
+    """Validate the arguments of a fast class with its model (to raise its
+    ValidationError)."""
+    model_cls.model_validate(
+        {**extra, **{k: v for k, v in values.items() if v is not _MISSING}}
+    )
+
+
+def _to_int(value: float) -> int:
+    if not value.is_integer():
+        raise ValueError(f"{value} is not an integer")
+    return int(value)
+
+
+def _aliases(name: str, field) -> list[str]:
+    """Names (other than name) the value of the field can be given with."""
+    if isinstance(field.validation_alias, AliasChoices):
+        return [a for a in field.validation_alias.choices if a != name]
+    if isinstance(field.validation_alias, str) and field.validation_alias != name:
+        return [field.validation_alias]
+    return []
+
+
+def _converter(annotation) -> tuple[str | None, type[Enum] | None]:
+    """Expression (over v) that converts a value the way pydantic does.
+
+    :return: the expression (None if the value is kept) and the enum it
+             uses (named _enum in the expression).
+    """
+    args: tuple = typing.get_args(annotation) if (
+        isinstance(annotation, types.UnionType) or
+        typing.get_origin(annotation) is typing.Union
+    ) else (annotation,)
+    args = tuple(arg for arg in args if arg is not type(None))
+    if len(args) != 1:
+        return None, None
+    arg = args[0]
+    if isinstance(arg, type) and issubclass(arg, Enum):
+        return "v if v is None else _enum(v)", arg
+    if arg is float:
+        return "float(v) if v.__class__ is int else v", None
+    if arg is int:
+        return "_to_int(v) if v.__class__ is float else v", None
+    return None, None
+
+
+def fast_model(model_cls: type[BaseModel]) -> type[FastMessage]:
+    """Return the fast class of a pydantic message model (built once).
+
+    It's built from the fields declared by model_cls. Its instances are
+    built with the same keyword arguments (extra ones are ignored) and they
+    have the same attributes, properties and methods.
+
+    :raise: ValidationError (when an instance is built) if a required field
+            is missing, as the model does.
+    """
+    fast_cls = _fast_models.get(model_cls)
+    if fast_cls is None:
+        fast_cls = _fast_models[model_cls] = _build_fast_model(model_cls)
+    return fast_cls
+
+
+def compact_model(
+        model_cls: type[BaseModel], field_names: Iterable[str]
+) -> type[FastMessage]:
+    """Return the fast class of model_cls that only stores field_names.
+
+    field_names are the fields of the messages decoded, so most of the
+    fields of the model (all None) aren't stored: their default value is a
+    class attribute. Its instances must be built with field_names (the rest
+    are ignored).
+
+    The classes are kept by the fields of model_cls in field_names (the
+    names that aren't fields of model_cls and their order don't matter) but
+    only the last COMPACT_MODELS_SIZE used, so the files with many field
+    combinations don't make them grow forever.
+    """
+    names: frozenset[str] | None = _field_names.get(model_cls)
+    if names is None:
+        names = _field_names[model_cls] = frozenset(
+            alias for name, field in model_cls.model_fields.items()
+            for alias in (name, *_aliases(name, field))
+        )
+    key: tuple = (model_cls, names.intersection(field_names))
+    with _compact_models_lock:
+        compact_cls = _compact_models.get(key)
+        if compact_cls is not None:
+            _compact_models.move_to_end(key)
+            return compact_cls
+    compact_cls = _build_fast_model(model_cls, key[1])
+    with _compact_models_lock:
+        _compact_models[key] = compact_cls
+        while len(_compact_models) > COMPACT_MODELS_SIZE:
+            _compact_models.popitem(last=False)
+    return compact_cls
+
+
+def _build_fast_model(
+        model_cls: type[BaseModel], present: frozenset[str] | None = None
+) -> type[FastMessage]:
+    names: list[str] = list(model_cls.model_fields)
+    namespace: dict = {
+        "_MISSING": _MISSING,
+        "_to_int": _to_int,
+        "_fields": model_cls.model_fields,
+        "_validators": {},
+        "_model": model_cls,
+        "_validate": _validate
+    }
+    validators = model_cls.__pydantic_decorators__.field_validators
+    before: dict[str, list[str]] = {name: [] for name in names}
+    after: dict[str, list[str]] = {name: [] for name in names}
+    for validator_name, decorator in validators.items():
+        namespace["_validators"][validator_name] = getattr(model_cls, validator_name)
+        for field in decorator.info.fields:
+            modes: dict = before if decorator.info.mode in ("before", "plain") else after
+            modes[field].append(validator_name)
+
+    parameters: list[str] = []
+    body: list[str] = []
+    # Fields not given whose value is always their default (class attributes).
+    defaults: dict = {}
+    fields_set: frozenset[str] | None = None if present is None else frozenset(
+        name for name, field in model_cls.model_fields.items()
+        if name in present or present.intersection(_aliases(name, field))
+    )
+    for name, field in model_cls.model_fields.items():
+        if (
+            fields_set is not None and name not in fields_set and
+            isinstance(field.default, _IMMUTABLE_DEFAULTS) and
+            not field.is_required() and not before[name] and not after[name]
+        ):
+            defaults[name] = field.default
+    names = [name for name in names if name not in defaults]
+    arguments: str = "{" + ", ".join(f"{name!r}: {name}" for name in names) + "}"
+    for name in names:
+        field = model_cls.model_fields[name]
+        aliases: list[str] = _aliases(name, field)
+        immutable: bool = isinstance(field.default, _IMMUTABLE_DEFAULTS)
+        if field.is_required() or aliases or not immutable:
+            parameters.append(f"{name}=_MISSING")
+        else:
+            namespace[f"_default_{name}"] = field.default
+            parameters.append(f"{name}=_default_{name}")
+
+        for alias in aliases:
+            body.append(f"if {name} is _MISSING and {alias!r} in _extra:")
+            body.append(f"    {name} = _extra[{alias!r}]")
+        if field.is_required():
+            body.append(f"if {name} is _MISSING:")
+            # The model raises the ValidationError.
+            body.append(f"    _validate(_model, {arguments}, _extra)")
+        elif aliases or not immutable:
+            body.append(f"if {name} is _MISSING:")
+            body.append(
+                f"    {name} = _fields[{name!r}].get_default(call_default_factory=True)"
+            )
+        for validator_name in before[name]:
+            body.append(f"{name} = _validators[{validator_name!r}]({name})")
+        converter, enum = _converter(field.annotation)
+        if converter is not None:
+            namespace[f"_enum_{name}"] = enum
+            body.append(f"v = {name}")
+            body.append(f"{name} = {converter.replace('_enum', f'_enum_{name}')}")
+        for validator_name in after[name]:
+            body.append(f"{name} = _validators[{validator_name!r}]({name})")
+        body.append(f"self.{name} = {name}")
+
+    source: str = (
+        f"def __init__(self, *, {', '.join(parameters + ['**_extra'])}):\n"
+        + "".join(f"    {line}\n" for line in body or ["pass"])
+    )
+    exec(source, namespace)
+
+    attributes: dict = {
+        "__slots__": tuple(names),
+        "__init__": namespace["__init__"],
+        "__module__": __name__,
+        "__qualname__": f"Fast{model_cls.__name__}",
+        "__doc__": model_cls.__doc__,
+        "MODEL": model_cls,
+        "model_fields": model_cls.model_fields,
+        "FIELDS_SET": fields_set,
+        **defaults
+    }
+    # Properties and methods (the validators and pydantic's attributes aren't).
+    for cls in reversed(model_cls.__mro__):
+        if not issubclass(cls, BaseModel) or cls is BaseModel:
+            continue
+        for name, value in vars(cls).items():
+            if name.startswith("_") or name.startswith("model_") or name in validators:
+                continue
+            if isinstance(value, _ATTRIBUTE_TYPES):
+                attributes[name] = value
+    return type(f"Fast{model_cls.__name__}", (FastMessage,), attributes)
+
+
+def is_fast(value) -> bool:
+    """Whether value is (or is a list of) fast messages."""
+    if isinstance(value, list):
+        return bool(value) and isinstance(value[0], FastMessage)
+    return isinstance(value, FastMessage)
+
+
+def build_model(model_cls: type[BaseModel], **fields) -> BaseModel:
+    """Build a model of a file from its messages.
+
+    If they're fast messages, the model is built without validating them
+    (pydantic only accepts its models), so its fields have the fast messages.
+    The models of the files (see FitModel) convert them when they're
+    serialized. See to_pydantic.
+    """
+    if any(is_fast(value) for value in fields.values()):
+        return model_cls.model_construct(**fields)
+    return model_cls(**fields)
+
+
+def to_pydantic(model: BaseModel) -> BaseModel:
+    """Return model with its fast messages converted to pydantic models.
+
+    The models built from fast messages (see build_model) must be converted
+    before they're given to code that validates them.
+    """
+    fields: dict = {}
+    changed: bool = False
+    for name in model.__class__.model_fields:
+        value = getattr(model, name)
+        if is_fast(value):
+            value = to_models(value)
+            changed = True
+        fields[name] = value
+    return model.__class__(**fields) if changed else model
+
+
+def to_models(value):
+    """Return the fast message (or list of them) value as pydantic models."""
+    if isinstance(value, FastMessage):
+        return value.to_model()
+    return [v.to_model() if isinstance(v, FastMessage) else v for v in value]
@@ -0,0 +1,62 @@
+import importlib
+from array import array
+
+from fit_galgo.fit.columnar import OBJECT
+
+# Data of a model by columns (see to_arrays in the models): arrays of numbers
+# (NaN if unknown) or lists of Python objects (None if unknown).
+Columns = dict[str, array | list]
+
+# Columns with Unix epoch seconds (UTC).
+TIMESTAMP_COLUMNS: frozenset[str] = frozenset({"timestamp", "last_timestamp"})
+
+
+def _import_optional(module: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError as error:
+        raise ImportError(
+            f"{module} is needed for this conversion: pip install {module}"
+        ) from error
+
+
+def to_arrow(columns: Columns):
+    """Return a pyarrow Table with columns.
+
+    The arrays are wrapped without copying them, so they mustn't be changed
+    while the table is used.
+    """
+    pa = _import_optional("pyarrow")
+    types = {"q": pa.int64(), "d": pa.float64(), "B": pa.uint8()}
+    arrow_arrays: list = []
+    for name, values in columns.items():
+        if isinstance(values, array) and values.typecode in types:
+            arrow_type = (
+                pa.timestamp("s", tz="UTC")
+                if name in TIMESTAMP_COLUMNS and values.typecode == "q"
+                else types[values.typecode]
+            )
+            arrow_arrays.append(pa.Array.from_buffers(
+                arrow_type, len(values), [None, pa.py_buffer(values)]
+            ))
+        else:
+            arrow_arrays.append(pa.array(list(values)))
+    return pa.Table.from_arrays(arrow_arrays, names=list(columns))
+
+
+def to_pandas(columns: Columns):
+    """Return a pandas DataFrame with columns.
+
+    The number columns are numpy views of the arrays (no copy is made).
+    """
+    pd = _import_optional("pandas")
+    np = _import_optional("numpy")
+    data: dict = {}
+    for name, values in columns.items():
+        if isinstance(values, array) and values.typecode != OBJECT:
+            data[name] = np.frombuffer(values, dtype=values.typecode)
+            if name in TIMESTAMP_COLUMNS and values.typecode == "q":
+                data[name] = pd.to_datetime(data[name], unit="s", utc=True)
+        else:
+            data[name] = values
+    return pd.DataFrame(data, copy=False)
@@ -0,0 +1,449 @@
+from datetime import datetime
+from typing import NamedTuple
+
+from fit_galgo.analytics.elevation import ELEVATION_THRESHOLD, Hysteresis
+from fit_galgo.fit.chunks import (
+    COMPRESSED_HEADER_MASK,
+    DEFINITION_MASK,
+    Definition,
+    local_mesg_num,
+    read_definition
+)
+from fit_galgo.fit.columnar import RecordTable
+from fit_galgo.fit.crc import HEADER_WITH_CRC_SIZE, HEADER_WITHOUT_CRC_SIZE, read_header
+from fit_galgo.fit.exceptions import FitIntegrityException
+from fit_galgo.fit.messages import MESSAGES, MESSAGES_BY_NUM
+from fit_galgo.fit.models import DistanceActivity, FileId, Lap, Record, Session
+
+# Messages that describe the developer fields: they're needed to decode the
+# developer fields of the messages that follow them.
+DEVELOPER_DATA_ID_NUM = 207
+FIELD_DESCRIPTION_NUM = 206
+# Sport of the activity (the models have no SPORT message).
+SPORT_NUM = 12
+
+GENERIC_SPORT = "generic"
+
+
+class AccumulatedComponent(NamedTuple):
+    """A component of a field (source) accumulated in another field (target)."""
+    source: str
+    target: str
+    target_num: int
+    bits: int
+    scale: float
+    offset: float
+    target_scale: float
+    target_offset: float
+
+
+_accumulated_components: dict[int, list[AccumulatedComponent]] | None = None
+
+
+def accumulated_components() -> dict[int, list[AccumulatedComponent]]:
+    """Return the accumulated components of each message number (see the
+    profile of the SDK)."""
+    global _accumulated_components
+    if _accumulated_components is None:
+        from garmin_fit_sdk import Profile
+
+        _accumulated_components = {}
+        for mesg_num, message in Profile["messages"].items():
+            fields: dict = message["fields"]
+            for field in fields.values():
+                # The components of a field accumulated in the same target
+                # (an array) have the same bits, scale and offset.
+                targets: set[int] = set()
+                for i, num in enumerate(field["components"]):
+                    target: dict = fields[num]
+                    if not target["is_accumulated"] or num in targets:
+                        continue
+                    targets.add(num)
+                    _accumulated_components.setdefault(mesg_num, []).append(
+                        AccumulatedComponent(
+                            field["name"], target["name"], num, field["bits"][i],
+                            field["scale"][i], field["offset"][i],
+                            target["scale"][0], target["offset"][0]
+                        )
+                    )
+    return _accumulated_components
+
+
+class IncrementalDecoder:
+    """Decode a FIT file that is still being written, a bit at a time.
+
+    Each update decodes only the complete messages appended since the last
+    update. The decoding state is kept between updates: the offset of the
+    next message, the local definitions, the developer fields descriptions,
+    the accumulated fields and the last timestamp.
+
+    The CRC isn't checked. The file is finished when its header has the
+    size of the data and all of it has been decoded.
+
+    :fit_file_path str: the FIT file (it may not exist yet).
+    """
+    def __init__(self, fit_file_path: str) -> None:
+        self.fit_file_path: str = fit_file_path
+        # Position of the next message (0 until the header is read).
+        self.offset: int = 0
+        self.finished: bool = False
+        # Unix epoch seconds of the last timestamp decoded.
+        self.last_timestamp: int | None = None
+        self._end: int | None = None
+        self._definitions: dict[int, bytes] = {}
+        self._globals: dict[int, int] = {}
+        self._sizes: dict[int, int] = {}
+        self._field_nums: dict[int, bytes] = {}
+        # Bytes (the definition and the message) of the developer messages.
+        self._developer_data: list[bytes] = []
+        # Last value of the accumulated fields by (message number, field), as
+        # the SDK's decoder keeps it.
+        self._accumulated: dict[tuple[int, str], int] = {}
+
+    def update(self) -> list[tuple[int, dict]]:
+        """Decode the messages appended since the last update.
+
+        :return: the (message number, message) decoded, in order.
+        :raise: FitIntegrityException if the file isn't a FIT file or the
+                first error found while decoding the messages.
+        """
+        if self.finished:
+            return []
+        try:
+            with open(self.fit_file_path, "rb") as fit_file:
+                header_data: bytes = fit_file.read(HEADER_WITH_CRC_SIZE)
+                if not self._read_header(header_data):
+                    return []
+                fit_file.seek(self.offset)
+                data: bytes = fit_file.read(
+                    self._end - self.offset if self._end is not None else -1
+                )
+        except FileNotFoundError:
+            return []
+
+        prefix: bytes = b"".join(self._developer_data + list(self._definitions.values()))
+        skip: int = len(self._developer_data)
+        field_nums: list[bytes] = []
+        size: int = self._scan(data, field_nums)
+        if size == 0:
+            self._check_finished()
+            return []
+        messages: list[tuple[int, dict]] = self._decode(prefix + data[:size], skip)
+        self._accumulate(messages, field_nums)
+        self.offset += size
+        self._check_finished()
+        return messages
+
+    def _read_header(self, header_data: bytes) -> bool:
+        if len(header_data) < HEADER_WITHOUT_CRC_SIZE:
+            return False
+        if len(header_data) < header_data[0]:
+            return False
+        header = read_header(header_data)
+        if self.offset == 0:
+            self.offset = header.header_size
+        # The size of the data is written when the file is finished.
+        if header.data_size:
+            self._end = header.header_size + header.data_size
+        return True
+
+    def _check_finished(self) -> None:
+        self.finished = self._end is not None and self.offset >= self._end
+
+    def _scan(self, data: bytes, field_nums: list[bytes]) -> int:
+        """Update the definitions with the complete messages of data.
+
+        :field_nums list[bytes]: where the fields of the definition of each
+                                 data message are added.
+        :return: the size of the complete messages.
+        """
+        position: int = 0
+        while position < len(data):
+            record_header: int = data[position]
+            is_definition: bool = bool(record_header & DEFINITION_MASK)
+            if is_definition and not record_header & COMPRESSED_HEADER_MASK:
+                definition: Definition | None = read_definition(data, position)
+                if definition is None:
+                    break
+                self._definitions.pop(definition.local, None)
+                self._definitions[definition.local] = data[position:definition.end]
+                self._globals[definition.local] = definition.global_num
+                self._sizes[definition.local] = definition.size
+                self._field_nums[definition.local] = definition.field_nums
+                position = definition.end
+                continue
+
+            local: int = local_mesg_num(record_header)
+            if local not in self._sizes:
+                raise FitIntegrityException(
+                    f"Message without definition at {self.offset + position}"
+                )
+            end: int = position + 1 + self._sizes[local]
+            if end > len(data):
+                break
+            if self._globals[local] in (DEVELOPER_DATA_ID_NUM, FIELD_DESCRIPTION_NUM):
+                self._developer_data.append(
+                    self._definitions[local] + data[position:end]
+                )
+            field_nums.append(self._field_nums[local])
+            position = end
+        return position
+
+    def _decode(self, data: bytes, skip: int) -> list[tuple[int, dict]]:
+        """Decode data (skipping its first skip messages)."""
+        from garmin_fit_sdk import Decoder, Stream
+        from garmin_fit_sdk.decoder import DecodeMode
+
+        messages: list[tuple[int, dict]] = []
+
+        def listener(mesg_num: int, mesg: dict) -> None:
+            nonlocal skip
+            if skip:
+                skip -= 1
+                return
+            timestamp = mesg.get("timestamp")
+            if isinstance(timestamp, datetime):
+                self.last_timestamp = int(timestamp.timestamp())
+            messages.append((mesg_num, mesg))
+
+        # DATA_ONLY streams have no header and end with the (unchecked) CRC.
+        decoder = Decoder(Stream.from_byte_array(data + b"\0\0"))
+        _, errors = decoder.read(
+            mesg_listener=listener,
+            enable_crc_check=False,
+            merge_heart_rates=False,
+            decode_mode=DecodeMode.DATA_ONLY
+        )
+        if errors:
+            raise FitIntegrityException(str(errors[0]))
+        return messages
+
+    def _accumulate(
+            self, messages: list[tuple[int, dict]], field_nums: list[bytes]
+    ) -> None:
+        """Continue the accumulated fields of messages from the last update.
+
+        Each update is decoded by a new decoder, so its first accumulated
+        value of a field starts from 0 instead of the last one. The values
+        until a message has the field itself (not only the component,
+        restarting the accumulation) are corrected by the same amount.
+
+        :field_nums list[bytes]: the fields of the definition of each message.
+        """
+        components: dict[int, list[AccumulatedComponent]] = accumulated_components()
+        corrections: dict[tuple[int, str], int] = {}
+        for (mesg_num, mesg), fields in zip(messages, field_nums):
+            for component in components.get(mesg_num, ()):
+                value = mesg.get(component.target)
+                if value is None:
+                    continue
+                key: tuple[int, str] = (mesg_num, component.target)
+                if component.target_num in fields:
+                    # Both decoders restart from the value of the field.
+                    corrections[key] = 0
+                # Invalid values aren't in the messages (nor expanded).
+                if component.source not in mesg:
+                    if component.target_num in fields:
+                        last = value[-1] if isinstance(value, list) else value
+                        self._accumulated[key] = round(
+                            (last + component.target_offset) * component.target_scale
+                        )
+                    continue
+
+                values: list = value if isinstance(value, list) else [value]
+                accumulated: list[int] = [
+                    round((v + component.offset) * component.scale) for v in values
+                ]
+                correction: int | None = corrections.get(key)
+                if correction is None:
+                    last: int | None = self._accumulated.get(key)
+                    first: int = accumulated[0]
+                    mask: int = (1 << component.bits) - 1
+                    correction = corrections[key] = (
+                        0 if last is None else last + ((first - last) & mask) - first
+                    )
+                if correction:
+                    values = [
+                        _component_value(a + correction, component) for a in accumulated
+                    ]
+                    mesg[component.target] = (
+                        values if isinstance(value, list) else values[0]
+                    )
+                self._accumulated[key] = accumulated[-1] + correction
+
+
+def _component_value(accumulated: int, component: AccumulatedComponent):
+    """The value of an accumulated component as the SDK's decoder gives it."""
+    value = accumulated / component.scale - component.offset
+    return int(value) if value.is_integer() else value
+
+
+class LiveStats(NamedTuple):
+    records: int
+    elapsed: float  # in seconds
+    distance: float | None  # in meters
+    avg_speed: float | None  # in m/s
+    max_speed: float | None  # in m/s
+    avg_heart_rate: float | None
+    max_heart_rate: int | None
+    ascent: float  # in meters
+    descent: float  # in meters
+
+
+class RunningStats:
+    """Stats of the records added so far, updated in constant time."""
+    __slots__ = (
+        "count", "start", "timestamp", "distance", "max_speed",
+        "heart_rate_sum", "heart_rate_count", "max_heart_rate", "elevation"
+    )
+
+    def __init__(self, threshold: float = ELEVATION_THRESHOLD) -> None:
+        self.count: int = 0
+        self.start: datetime | None = None
+        self.timestamp: datetime | None = None
+        self.distance: float | None = None
+        self.max_speed: float | None = None
+        self.heart_rate_sum: int = 0
+        self.heart_rate_count: int = 0
+        self.max_heart_rate: int | None = None
+        self.elevation: Hysteresis = Hysteresis(threshold)
+
+    def add(self, record: Record) -> None:
+        self.count += 1
+        self.start = self.start or record.timestamp
+        self.timestamp = record.timestamp
+        distance = record.enhanced_distance or record.distance
+        if distance is not None:
+            self.distance = distance
+        speed = record.enhanced_speed or record.speed
+        if speed is not None and (self.max_speed is None or speed > self.max_speed):
+            self.max_speed = speed
+        if record.heart_rate is not None:
+            self.heart_rate_sum += record.heart_rate
+            self.heart_rate_count += 1
+            self.max_heart_rate = max(self.max_heart_rate or 0, record.heart_rate)
+        altitude = record.enhanced_altitude or record.altitude
+        if altitude is not None:
+            self.elevation.add(altitude)
+
+    @property
+    def stats(self) -> LiveStats:
+        elapsed: float = (
+            (self.timestamp - self.start).total_seconds() if self.start else 0.0
+        )
+        return LiveStats(
+            records=self.count,
+            elapsed=elapsed,
+            distance=self.distance,
+            avg_speed=self.distance / elapsed if self.distance and elapsed else None,
+            max_speed=self.max_speed,
+            avg_heart_rate=(
+                self.heart_rate_sum / self.heart_rate_count
+                if self.heart_rate_count else None
+            ),
+            max_heart_rate=self.max_heart_rate,
+            ascent=self.elevation.gain,
+            descent=self.elevation.loss
+        )
+
+
+class LiveActivity:
+    """An activity built from a FIT file while it's being written.
+
+    Each update decodes only the new messages (see IncrementalDecoder) and
+    updates the records, the laps and the running stats, so the cost of an
+    update doesn't depend on the size of the activity.
+
+    :fit_file_path str: the FIT file of the activity.
+    :zone_info str: IANA zone info string (for example: "Europe/Madrid").
+    """
+    def __init__(self, fit_file_path: str, zone_info: str | None = None) -> None:
+        self.fit_file_path: str = fit_file_path
+        self.zone_info: str | None = zone_info
+        self.decoder: IncrementalDecoder = IncrementalDecoder(fit_file_path)
+        self.file_id: FileId | None = None
+        self.records: list[Record] = []
+        self.laps: list[Lap] = []
+        # The SESSION message (written when the activity ends).
+        self.session: Session | None = None
+        self.table: RecordTable = RecordTable()
+        self.sport: str = GENERIC_SPORT
+        self.sub_sport: str = GENERIC_SPORT
+        self._stats: RunningStats = RunningStats()
+
+    @property
+    def finished(self) -> bool:
+        return self.decoder.finished
+
+    @property
+    def stats(self) -> LiveStats:
+        return self._stats.stats
+
+    def update(self) -> list[Record]:
+        """Decode the messages appended to the file since the last update.
+
+        :return: the new records.
+        """
+        records: list[Record] = []
+        for mesg_num, mesg in self.decoder.update():
+            name: str | None = MESSAGES_BY_NUM.get(mesg_num)
+            if mesg_num == SPORT_NUM:
+                self.sport = mesg.get("sport") or self.sport
+                self.sub_sport = mesg.get("sub_sport") or self.sub_sport
+            elif name == "RECORD":
+                record: Record = self._build(name, mesg)
+                self.records.append(record)
+                self.table.append_mesg(mesg)
+                self._stats.add(record)
+                records.append(record)
+            elif name == "LAP":
+                self.laps.append(self._build(name, mesg))
+            elif name == "SESSION":
+                self.session = self._build(name, mesg)
+            elif name == "FILE_ID" and self.file_id is None:
+                self.file_id = self._build(name, mesg)
+        return records
+
+    def activity(self) -> DistanceActivity | None:
+        """Return the activity decoded so far (None until it has records).
+
+        Until the SESSION message is written, the session is built from the
+        running stats.
+        """
+        if self.file_id is None or not self.records:
+            return None
+        activity = DistanceActivity(
+            fit_file_path=self.fit_file_path,
+            file_id=self.file_id,
+            zone_info=self.zone_info,
+            session=self.session or self._live_session(),
+            records=list(self.records),
+            laps=list(self.laps)
+        )
+        activity._record_table = self.table.slice(0, len(self.table))
+        return activity
+
+    def _live_session(self) -> Session:
+        stats: LiveStats = self.stats
+        first: Record = self.records[0]
+        return Session(
+            message_index=0,
+            timestamp=self.records[-1].timestamp,
+            start_time=first.timestamp,
+            total_elapsed_time=stats.elapsed,
+            total_timer_time=stats.elapsed,
+            sport=self.sport,
+            sub_sport=self.sub_sport,
+            start_position_lat=first.position_lat,
+            start_position_long=first.position_long,
+            total_distance=stats.distance,
+            avg_speed=stats.avg_speed,
+            max_speed=stats.max_speed,
+            avg_heart_rate=stats.avg_heart_rate,
+            max_heart_rate=stats.max_heart_rate
+        )
+
+    @staticmethod
+    def _build(name: str, mesg: dict):
+        model_cls = MESSAGES[name]["model_cls"]
+        return model_cls(**{str(k): v for k, v in mesg.items()})
@@ -137,3 +137,19 @@ MESSAGES = {
         "model_cls": HrvValue
     }
 }
+
+# Dispatch table: message name by its number.
+MESSAGES_BY_NUM: dict[int, str] = {
+    message["num"]: name for name, message in MESSAGES.items()
+}
+
+
+def register_message(name: str, num: int, model_cls: type) -> None:
+    """Add a message to MESSAGES so parsers can ask for it in MESSAGE_NAMES.
+
+    :name str: the name of the message in the FIT SDK Profile.
+    :num int: the number of the message in the FIT SDK Profile.
+    :model_cls type: the class message to build from the decoded data.
+    """
+    MESSAGES[name] = {"name": name, "num": num, "model_cls": model_cls}
+    MESSAGES_BY_NUM[num] = name
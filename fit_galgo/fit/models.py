@@ -1,3 +1,5 @@
+from abc import ABC, abstractmethod
+from array import array
 from datetime import date, datetime, timedelta
 from collections import namedtuple
 from zoneinfo import ZoneInfo
@@ -8,23 +10,42 @@ from pydantic import (
     Field,
     ConfigDict,
     AliasChoices,
-    computed_field
+    computed_field,
+    model_validator,
+    PrivateAttr
 )
 
 from fit_galgo.fit.definitions import (
-    HRV_STATUS,
-    ACTIVITY_TYPES,
+    HRV_STATUS_NAMES,
+    ACTIVITY_TYPE_NAMES,
     ACTIVITY_TYPE_UNKNOWN,
     SplitType,
     ClimbResult,
     TRANSITION_SPORT,
     is_distance_sport,
-    SLEEP_LEVEL,
+    SLEEP_LEVEL_NAMES,
     UNKNOWN,
     EXERCISE_CATEGORIES,
+    EXERCISE_CATEGORY_NAMES,
     SetType
 )
-from fit_galgo.utils.date_utils import combine_date_and_seconds
+from fit_galgo.analytics.elevation import (
+    ELEVATION_THRESHOLD,
+    SMOOTHING_WINDOW,
+    ElevationProfile,
+    elevation_profile
+)
+from fit_galgo.fit.columnar import (
+    NAN, LazyList, MonitoringKind, MonitoringTable, RecordTable
+)
+from fit_galgo.fit.errors import FitErrorRecord, records_from_errors
+from fit_galgo.fit.fast import build_model, is_fast, to_models
+from fit_galgo.fit.frames import Columns, to_arrow, to_pandas
+from fit_galgo.utils.date_utils import (
+    epoch_to_datetime,
+    resolve_timestamp_16,
+    resolve_timestamp_min_8
+)
 
 DoubleStat = namedtuple("DoubleStat", ["max", "avg"])
 TripleStat = namedtuple("TripleStat", ["max", "min", "avg"])
@@ -57,6 +78,7 @@ WorkoutCustomTarget = namedtuple(
     ]
 )
 RecordsAndLaps = namedtuple("RecordsAndLaps", ["records", "laps"])
+HeartRateSeries = namedtuple("HeartRateSeries", ["timestamps", "heart_rates"])
 
 
 class FileId(BaseModel):
@@ -73,12 +95,62 @@ class FitModel(BaseModel):
     file_id: FileId
     zone_info: str | None = None
 
+    def model_dump(self, **kwargs) -> dict:
+        """The fields of the model (the fast messages are converted first, see
+        fit_galgo.fit.fast)."""
+        return BaseModel.model_dump(self._serializable(), **kwargs)
+
+    def model_dump_json(self, **kwargs) -> str:
+        """The fields of the model as JSON (see model_dump)."""
+        return BaseModel.model_dump_json(self._serializable(), **kwargs)
+
+    def _serializable(self) -> "FitModel":
+        # The fast messages are converted in a copy (the rest of the fields
+        # aren't validated again), only if there are some.
+        update: dict = {}
+        for name in self.__class__.model_fields:
+            value = getattr(self, name)
+            if isinstance(value, LazyList):
+                # pydantic reads the items of the lists without their methods.
+                value.build()
+            if is_fast(value):
+                update[name] = to_models(value)
+        return self.model_copy(update=update) if update else self
+
+
+class ColumnarModel(ABC):
+    """A model whose data can be taken by columns (see frames)."""
+
+    @abstractmethod
+    def to_arrays(self) -> Columns:
+        """The data of the model by columns."""
+
+    def to_arrow(self):
+        """The columns as a pyarrow Table (pyarrow is needed)."""
+        return to_arrow(self.to_arrays())
+
+    def to_pandas(self):
+        """The columns as a pandas DataFrame (pandas is needed)."""
+        return to_pandas(self.to_arrays())
+
 
 class FitError(BaseModel):
+    """The errors found in a FIT file.
+
+    errors keeps the first exception of each kind and records all kinds of
+    errors with their counts (they're built from errors if not given).
+    """
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     fit_file_path: str
     errors: list[Exception]
+    records: list[FitErrorRecord] = []
+
+    @model_validator(mode="after")
+    def records_validator(self) -> "FitError":
+        if not self.records and self.errors:
+            self.records = records_from_errors(self.errors)
+        return self
 
 
 class WorkoutExercise(BaseModel):
@@ -610,15 +682,44 @@ class Lap(BaseModel):
         )
 
 
-class DistanceActivity(Activity):
+class DistanceActivity(Activity, ColumnarModel):
     records: list[Record]
     laps: list[Lap] = []
 
+    _record_table: RecordTable | None = PrivateAttr(default=None)
+    _elevations: dict[tuple, ElevationProfile] = PrivateAttr(default_factory=dict)
+
+    @property
+    def record_table(self) -> RecordTable:
+        """The records by columns (built the first time)."""
+        if self._record_table is None:
+            self._record_table = RecordTable.from_records(self.records)
+        return self._record_table
+
+    def to_arrays(self) -> Columns:
+        """The records by columns (the ones of record_table, not copied)."""
+        return self.record_table.to_arrays()
+
+    def elevation(
+            self,
+            window: int = SMOOTHING_WINDOW,
+            threshold: float = ELEVATION_THRESHOLD
+    ) -> ElevationProfile:
+        """The elevation profile of the records (computed once per arguments).
+
+        See elevation_profile.
+        """
+        key: tuple = (window, threshold)
+        if key not in self._elevations:
+            table: RecordTable = self.record_table
+            self._elevations[key] = elevation_profile(
+                table["altitude"], table["distance"], window, threshold
+            )
+        return self._elevations[key]
+
     @property
     def altitudes(self) -> list[float]:
-        return [
-            record.enhanced_altitude or record.altitude or 0 for record in self.records
-        ]
+        return [a if a == a else 0 for a in self.record_table["altitude"]]
 
     @property
     def total_distance(self) -> float | None:
@@ -640,11 +741,19 @@ class DistanceActivity(Activity):
 
     @property
     def altitude(self) -> AltitudeStat:
+        """Max and min of the records, gain and loss of the session.
+
+        The gain and loss are computed from the records when the session
+        hasn't them.
+        """
+        stats = self.elevation().stats
+        gain = self.session.total_ascent
+        loss = self.session.total_descent
         return AltitudeStat(
-            max=max(self.altitudes),
-            min=min(self.altitudes),
-            gain=self.session.total_ascent,
-            loss=self.session.total_descent
+            max=stats.max if stats.max == stats.max else None,
+            min=stats.min if stats.min == stats.min else None,
+            gain=gain if gain is not None else stats.gain,
+            loss=loss if loss is not None else stats.loss
         )
 
     @property
@@ -686,7 +795,7 @@ class LapActivity(DistanceActivity):
 
     def _computed_elapsed_time(self):
         computed_elapsed_time = sum(
-            [l.total_elapsed_time for l in self.laps if l.total_distance > 0]
+            l.total_elapsed_time or 0 for l in self.laps if (l.total_distance or 0) > 0
         )
         if computed_elapsed_time:
             return computed_elapsed_time
@@ -761,7 +870,7 @@ class ClimbActivity(Activity):
 
     @property
     def climbs(self) -> list[Climb]:
-        return [Climb(split=s) for s in self.splits]
+        return [build_model(Climb, split=s) for s in self.splits]
 
     @property
     def time(self) -> TimeStat:
@@ -802,7 +911,7 @@ class Set(BaseModel):
             return UNKNOWN
 
         categories = [
-            EXERCISE_CATEGORIES.get(value, str(value))
+            EXERCISE_CATEGORY_NAMES.name(value) or str(value)
             if value is not None else value for value in self.category
         ]
         valid_categories = [cat for cat in categories if cat is not None]
@@ -849,7 +958,7 @@ class TransitionActivity(Activity):
     pass
 
 
-class MultisportActivity(MultiActivity):
+class MultisportActivity(MultiActivity, ColumnarModel):
     records: list[Record]
     laps: list[Lap]
 
@@ -858,7 +967,8 @@ class MultisportActivity(MultiActivity):
         activity_list: list[Activity] = []
         for session in self.sessions:
             if session.sport == TRANSITION_SPORT:
-                activity = TransitionActivity(
+                activity = build_model(
+                    TransitionActivity,
                     fit_file_path=self.fit_file_path,
                     file_id=self.file_id,
                     zone_info=self.zone_info,
@@ -866,7 +976,8 @@ class MultisportActivity(MultiActivity):
                 )
             elif is_distance_sport(session.sport):
                 session_records, session_laps = self.filter_by_session(session)
-                activity = DistanceActivity(
+                activity = build_model(
+                    DistanceActivity,
                     fit_file_path=self.fit_file_path,
                     file_id=self.file_id,
                     zone_info=self.zone_info,
@@ -881,6 +992,22 @@ class MultisportActivity(MultiActivity):
             activity_list.append(activity)
         return activity_list
 
+    def to_arrays(self) -> Columns:
+        """The records by columns (see RecordTable) with the index of their
+        session in a session column (see filter_by_session)."""
+        tables: list[RecordTable] = [
+            RecordTable.from_records(self.filter_by_session(session).records)
+            for session in self.sessions
+        ]
+        arrays: Columns = {"session": array("q")}
+        for name in ("timestamp", *RecordTable.COLUMNS):
+            arrays[name] = array("q" if name == "timestamp" else "d")
+        for index, table in enumerate(tables):
+            arrays["session"].extend([index] * len(table))
+            for name, values in table.to_arrays().items():
+                arrays[name].extend(values)
+        return arrays
+
     def filter_by_session(self, session: Session) -> RecordsAndLaps:
         if not isinstance(session.start_time, datetime):
             return RecordsAndLaps([], [])
@@ -937,6 +1064,10 @@ class Monitoring(BaseModel):
     moderate_activity_minutes: int | None = None
     vigorous_activity_minutes: int | None = None
 
+    # Unix epoch seconds of the last timestamp decoded before this message:
+    # the reference to resolve timestamp_16 (not serialized).
+    last_timestamp: int | None = Field(default=None, exclude=True)
+
 
 class Steps(BaseModel):
     steps: int
@@ -979,13 +1110,37 @@ class RespirationRate(BaseModel):
     respiration_rate: float  # breaths/min
 
 
-class Monitor(FitModel):
+class Monitor(FitModel, ColumnarModel):
+    """Monitoring data of a day.
+
+    The MONITORING messages are either Monitoring models (monitorings) or a
+    MonitoringTable (monitoring_table, see FitGalgo's columnar option). The
+    stats are computed from the table, which is built from monitorings if
+    it's not given.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     monitoring_info: MonitoringInfo
-    monitorings: list[Monitoring]
+    monitorings: list[Monitoring] = []
+    monitoring_table: MonitoringTable | None = Field(default=None, exclude=True)
     hr_datas: list[MonitoringHrData] = []
     stress_levels: list[StressLevel] = []
     respiration_rates: list[RespirationRate] = []
 
+    _table: MonitoringTable | None = PrivateAttr(default=None)
+
+    @property
+    def table(self) -> MonitoringTable:
+        if self.monitoring_table is not None:
+            return self.monitoring_table
+        if self._table is None:
+            self._table = MonitoringTable.from_monitorings(self.monitorings)
+        return self._table
+
+    def to_arrays(self) -> Columns:
+        """The monitorings by columns (see MonitoringTable.to_arrays)."""
+        return self.table.to_arrays()
+
     def is_daily_log(self, dt_utc: datetime) -> bool:
         """Check if datetime is a daily log.
 
@@ -1033,10 +1188,12 @@ class Monitor(FitModel):
     @computed_field
     @property
     def active_calories(self) -> int:
+        table: MonitoringTable = self.table
+        rows: list[int] = self.daily_log_rows(MonitoringKind.CALORIES)
         return sum([
-            (value if value is not None else 0)
-            for m in self.monitorings if self.is_daily_log(m.timestamp)
-            for value in [m.active_calories, m.calories] if value is not None
+            value
+            for column in (table["active_calories"], table["calories"])
+            for value in column.take(rows) if value is not None
         ])
 
     @computed_field
@@ -1047,12 +1204,20 @@ class Monitor(FitModel):
     @computed_field
     @property
     def steps(self) -> list[Steps]:
+        table: MonitoringTable = self.table
+        rows: list[int] = self.daily_log_rows(MonitoringKind.STEPS)
         return [
             Steps(
-                steps=m.steps,
-                distance=m.distance or 0,
-                calories=m.active_calories or m.calories or 0
-            ) for m in self.monitorings if self.is_daily_log(m.timestamp) and m.steps
+                steps=steps,
+                distance=distance or 0,
+                calories=active_calories or calories or 0
+            )
+            for steps, distance, active_calories, calories in zip(
+                table["steps"].take(rows),
+                table["distance"].take(rows),
+                table["active_calories"].take(rows),
+                table["calories"].take(rows)
+            ) if steps
         ]
 
     @computed_field
@@ -1062,56 +1227,99 @@ class Monitor(FitModel):
 
     @computed_field
     @property
-    def total_distance(self) -> int:
+    def total_distance(self) -> float | None:
         return sum([step.distance for step in self.steps])
 
+    @property
+    def heart_rate_series(self) -> HeartRateSeries:
+        """Heart rates and their timestamps (Unix epoch seconds) as arrays."""
+        rows: list[int] = self._timestamped_rows(MonitoringKind.HEART_RATE)
+        return HeartRateSeries(
+            timestamps=self._resolve_timestamps(rows),
+            heart_rates=array("H", self.table["heart_rate"].take(rows))
+        )
+
     @computed_field
     @property
     def heart_rates(self) -> list[HeartRate]:
+        timestamps, heart_rates = self.heart_rate_series
         return [
-            HeartRate(
-                heart_rate=m.heart_rate,
-                datetime_utc=combine_date_and_seconds(
-                    self.monitoring_date, m.timestamp_16
-                )
-            )
-            for m in self.monitorings
-            if (
-                    self.monitoring_date is not None and
-                    m.heart_rate is not None and
-                    m.timestamp_16 is not None
-            )
+            HeartRate(heart_rate=hr, datetime_utc=epoch_to_datetime(ts))
+            for ts, hr in zip(timestamps, heart_rates)
         ]
 
     @computed_field
     @property
     def activity_intensities(self) -> list[ActivityIntensity]:
-        def compute_datetime(dt: datetime | None, ts_16: int | None) -> datetime | None:
-            if dt is None or ts_16 is None:
-                return None
-            return combine_date_and_seconds(dt, ts_16)
-
+        table: MonitoringTable = self.table
+        rows: list[int] = self._timestamped_rows(MonitoringKind.INTENSITY)
         return [
             ActivityIntensity(
-                moderate_minutes=m.moderate_activity_minutes or 0,
-                vigorous_minutes=m.vigorous_activity_minutes or 0,
-                datetime_utc=compute_datetime(self.monitoring_date, m.timestamp_16)
+                moderate_minutes=moderate or 0,
+                vigorous_minutes=vigorous or 0,
+                datetime_utc=epoch_to_datetime(ts)
             )
-            for m in self.monitorings
-            if m.timestamp_16 is not None and (
-                    m.moderate_activity_minutes is not None or
-                    m.vigorous_activity_minutes is not None
+            for moderate, vigorous, ts in zip(
+                table["moderate_activity_minutes"].take(rows),
+                table["vigorous_activity_minutes"].take(rows),
+                self._resolve_timestamps(rows)
             )
         ]
 
+    def daily_log_rows(self, kind: MonitoringKind) -> list[int]:
+        """Return the rows of kind whose timestamp is a daily log."""
+        rows: list[int] = self.table.rows(kind, "timestamp")
+        return [
+            row for row, ts in zip(rows, self.table["timestamp"].take(rows))
+            if self.is_daily_log(epoch_to_datetime(ts))
+        ]
+
+    def _timestamped_rows(self, kind: MonitoringKind) -> list[int]:
+        """Return the rows of kind with a timestamp_16 or a timestamp_min_8."""
+        timestamped: set[int] = {
+            *self.table["timestamp_16"].rows, *self.table["timestamp_min_8"].rows
+        }
+        return [row for row in self.table.rows(kind) if row in timestamped]
+
+    def _resolve_timestamps(self, rows: list[int]) -> array:
+        """Resolve the timestamp_16 (or, without it, the timestamp_min_8) of the
+        table's rows into epoch seconds in bulk.
+
+        The reference is the last timestamp tracked while decoding or, if it
+        is unknown, the monitoring info's timestamp.
+        """
+        default_last: int = int(self.monitoring_info.timestamp.timestamp())
+        lasts: list[int] = [
+            last if last is not None else default_last
+            for last in self.table["last_timestamp"].take(rows)
+        ]
+        timestamps_16: list[int | None] = self.table["timestamp_16"].take(rows)
+        if None not in timestamps_16:
+            return resolve_timestamp_16(lasts, timestamps_16)
+
+        rows_16: list[int] = [i for i, ts in enumerate(timestamps_16) if ts is not None]
+        rows_min_8: list[int] = [i for i, ts in enumerate(timestamps_16) if ts is None]
+        resolved = array("q", bytes(8 * len(rows)))
+        for i, ts in zip(rows_16, resolve_timestamp_16(
+                [lasts[i] for i in rows_16], [timestamps_16[i] for i in rows_16]
+        )):
+            resolved[i] = ts
+        for i, ts in zip(rows_min_8, resolve_timestamp_min_8(
+                [lasts[i] for i in rows_min_8],
+                self.table["timestamp_min_8"].take([rows[i] for i in rows_min_8])
+        )):
+            resolved[i] = ts
+        return resolved
+
     def _activity_types_as_str(self) -> list[str]:
         if self.monitoring_info.activity_type is None:
             return []
 
         activity_types: list[str] = []
         for at in self.monitoring_info.activity_type:
-            if at in ACTIVITY_TYPES:
-                activity_types.append(ACTIVITY_TYPES[at])
+            name: str | None = ACTIVITY_TYPE_NAMES.name(at)
+            if name is not None:
+                activity_types.append(name)
             elif type(at) is str:
                 activity_types.append(at)
             else:
@@ -1136,10 +1344,19 @@ class HrvValue(BaseModel):
     value: int | None = None  # in ms (5 minute RMSSD)
 
 
-class Hrv(FitModel):
+class Hrv(FitModel, ColumnarModel):
     summary: HrvStatusSummary
     values: list[HrvValue] = []
 
+    def to_arrays(self) -> Columns:
+        """The values by columns (NaN if a value is unknown)."""
+        return {
+            "timestamp": array("q", [int(v.timestamp.timestamp()) for v in self.values]),
+            "value": array("d", [
+                v.value if v.value is not None else NAN for v in self.values
+            ])
+        }
+
     @property
     def datetime_utc(self) -> datetime | None:
         return self.summary.timestamp
@@ -1172,10 +1389,8 @@ class Hrv(FitModel):
     @property
     def status(self) -> str:
         if isinstance(self.summary.status, int):
-            return (
-                HRV_STATUS[self.summary.status]
-                if self.summary.status in HRV_STATUS
-                else HRV_STATUS[0]
+            return HRV_STATUS_NAMES.name(
+                self.summary.status, HRV_STATUS_NAMES.name(0)
             )
         return self.summary.status
 
@@ -1194,10 +1409,7 @@ class SleepLevel(BaseModel):
         return (
             self.sleep_level
             if isinstance(self.sleep_level, str)
-            else (
-                SLEEP_LEVEL[self.sleep_level]
-                if self.sleep_level in SLEEP_LEVEL else SLEEP_LEVEL[0]
-            )
+            else SLEEP_LEVEL_NAMES.name(self.sleep_level, SLEEP_LEVEL_NAMES.name(0))
         )
 
 
@@ -1218,22 +1430,27 @@ class SleepAssessment(BaseModel):
     average_stress_during_sleep: float | None = None
 
 
-class Sleep(FitModel):
+class Sleep(FitModel, ColumnarModel):
     assessment: SleepAssessment
     levels: list[SleepLevel] = []
 
+    def to_arrays(self) -> Columns:
+        """The levels by columns."""
+        return {
+            "timestamp": array(
+                "q", [int(level.timestamp.timestamp()) for level in self.levels]
+            ),
+            "level": [level.level for level in self.levels]
+        }
+
     @computed_field
     @property
     def dates(self) -> list[datetime]:
-        sorted_dates: list[datetime] = sorted(
-            [level.datetime_utc for level in self.levels]
-        )
-        if sorted_dates == 0:
+        """The first and the last level datetimes (empty if there are no levels)."""
+        if not self.levels:
             return []
-        elif sorted_dates == 1:
-            return [sorted_dates[0], sorted_dates[0]]
-        else:
-            return [sorted_dates[0], sorted_dates[-1]]
+        dates: list[datetime] = [level.datetime_utc for level in self.levels]
+        return [min(dates), max(dates)]
 
     @property
     def combined_awake_score(self) -> int | None:
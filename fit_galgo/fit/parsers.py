@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 
 from pydantic import ValidationError, BaseModel
 
+from fit_galgo.fit.columnar import MonitoringTable
 from fit_galgo.fit.definitions import (
     SPORTS, is_distance_sport, is_lap_sport, is_climb_sport, is_set_sport
 )
@@ -11,6 +12,7 @@ from fit_galgo.fit.exceptions import (
     UnexpectedDataMessageException,
     FitMessageValidationException
 )
+from fit_galgo.fit.fast import build_model
 from fit_galgo.fit.models import (
     FitModel,
     FitError,
@@ -38,6 +40,24 @@ from fit_galgo.fit.models import (
 
 
 class FitAbstractParser(ABC):
+    """Base class of the parsers.
+
+    Each parser declares the FIT file types it can parse (FILE_TYPES) and the
+    messages it needs (MESSAGE_NAMES, see MESSAGES): FitGalgo only builds
+    these messages while decoding.
+
+    The messages in COLUMNAR_MESSAGES can be stored in a table (its class is
+    the value) instead of a list of models when FitGalgo is columnar.
+
+    If FAST_MESSAGES, the messages can be fast classes (see
+    fit_galgo.fit.fast) when FitGalgo is fast, so the parser must build its
+    model with build_model.
+    """
+    FILE_TYPES: tuple[str | int, ...] = ()
+    MESSAGE_NAMES: frozenset[str] = frozenset()
+    COLUMNAR_MESSAGES: dict[str, type] = {}
+    FAST_MESSAGES: bool = False
+
     @abstractmethod
     def __init__(
             self,
@@ -60,6 +80,11 @@ class FitActivityParser(FitAbstractParser):
 
     Also, it handles the errors that save into an array of errors.
     """
+    FILE_TYPES = ("activity",)
+    MESSAGE_NAMES = frozenset({
+        "FILE_ID", "WORKOUT", "WORKOUT_STEP", "RECORD", "LAP", "SET", "SPLIT", "SESSION"
+    })
+    FAST_MESSAGES = True
 
     def __init__(
             self,
@@ -139,7 +164,8 @@ class FitActivityParser(FitAbstractParser):
         file_id: FileId = self._messages["FILE_ID"][0]
 
         if len(self._messages["SESSION"]) > 1:
-            return MultisportActivity(
+            return build_model(
+                MultisportActivity,
                 fit_file_path=self._fit_file_path,
                 file_id=file_id,
                 zone_info=self._zone_info,
@@ -155,7 +181,8 @@ class FitActivityParser(FitAbstractParser):
         session: Session = self._messages["SESSION"][0]
 
         if is_distance_sport(session.sport):
-            return DistanceActivity(
+            return build_model(
+                DistanceActivity,
                 fit_file_path=self._fit_file_path,
                 file_id=file_id,
                 zone_info=self._zone_info,
@@ -167,7 +194,8 @@ class FitActivityParser(FitAbstractParser):
             )
 
         if is_lap_sport(session.sport):
-            return LapActivity(
+            return build_model(
+                LapActivity,
                 fit_file_path=self._fit_file_path,
                 file_id=file_id,
                 zone_info=self._zone_info,
@@ -179,7 +207,8 @@ class FitActivityParser(FitAbstractParser):
             )
 
         if is_climb_sport(session.sport):
-            return ClimbActivity(
+            return build_model(
+                ClimbActivity,
                 fit_file_path=self._fit_file_path,
                 file_id=file_id,
                 zone_info=self._zone_info,
@@ -190,7 +219,8 @@ class FitActivityParser(FitAbstractParser):
             )
 
         if is_set_sport(session.sport):
-            return SetActivity(
+            return build_model(
+                SetActivity,
                 fit_file_path=self._fit_file_path,
                 file_id=file_id,
                 zone_info=self._zone_info,
@@ -204,6 +234,14 @@ class FitActivityParser(FitAbstractParser):
 
 
 class FitMonitoringParser(FitAbstractParser):
+    FILE_TYPES = ("monitoring_a", "monitoring_b")
+    MESSAGE_NAMES = frozenset({
+        "FILE_ID", "MONITORING_INFO", "MONITORING", "MONITORING_HR_DATA",
+        "STRESS_LEVEL", "RESPIRATION_RATE"
+    })
+    COLUMNAR_MESSAGES = {"MONITORING": MonitoringTable}
+    FAST_MESSAGES = True
+
     def __init__(
             self,
             fit_file_path: str,
@@ -252,9 +290,8 @@ class FitMonitoringParser(FitAbstractParser):
         try:
             file_id: FileId = self._messages["FILE_ID"][0]
             monitoring_info: MonitoringInfo = self._messages["MONITORING_INFO"][0]
-            monitorings: list[Monitoring] = (
-                [message for message in self._messages["MONITORING"]]
-                if "MONITORING" in self._messages else []
+            monitorings: list[Monitoring] | MonitoringTable = (
+                self._messages["MONITORING"] if "MONITORING" in self._messages else []
             )
             hr_datas: list[MonitoringHrData] = (
                 [message for message in self._messages["MONITORING_HR_DATA"]]
@@ -268,12 +305,16 @@ class FitMonitoringParser(FitAbstractParser):
                 [message for message in self._messages["RESPIRATION_RATE"]]
                 if "RESPIRATION_RATE" in self._messages else []
             )
-            return Monitor(
+            return build_model(
+                Monitor,
                 fit_file_path=self._fit_file_path,
                 file_id=file_id,
                 zone_info=self._zone_info,
                 monitoring_info=monitoring_info,
-                monitorings=monitorings,
+                monitorings=monitorings if isinstance(monitorings, list) else [],
+                monitoring_table=(
+                    monitorings if isinstance(monitorings, MonitoringTable) else None
+                ),
                 hr_datas=hr_datas,
                 stress_levels=stress_levels,
                 respiration_rates=respiration_rates
@@ -286,6 +327,10 @@ class FitMonitoringParser(FitAbstractParser):
 
 
 class FitHrvParser(FitAbstractParser):
+    FILE_TYPES = ("hrv_status",)
+    MESSAGE_NAMES = frozenset({"FILE_ID", "HRV_STATUS_SUMMARY", "HRV_VALUE"})
+    FAST_MESSAGES = True
+
     def __init__(
             self,
             fit_file_path: str,
@@ -341,7 +386,8 @@ class FitHrvParser(FitAbstractParser):
             file_id: FileId = self._messages["FILE_ID"][0]
             summary: HrvStatusSummary = self._messages["HRV_STATUS_SUMMARY"][0]
             values: list[HrvValue] = self._messages["HRV_VALUE"]
-            return Hrv(
+            return build_model(
+                Hrv,
                 fit_file_path=self._fit_file_path,
                 file_id=file_id,
                 zone_info=self._zone_info,
@@ -356,6 +402,10 @@ class FitHrvParser(FitAbstractParser):
 
 
 class FitSleepParser(FitAbstractParser):
+    FILE_TYPES = ("sleep",)
+    MESSAGE_NAMES = frozenset({"FILE_ID", "SLEEP_ASSESSMENT", "SLEEP_LEVEL"})
+    FAST_MESSAGES = True
+
     def __init__(
             self,
             fit_file_path: str,
@@ -411,7 +461,8 @@ class FitSleepParser(FitAbstractParser):
             file_id = self._messages["FILE_ID"][0]
             assessment = self._messages["SLEEP_ASSESSMENT"][0]
             levels = [level for level in self._messages["SLEEP_LEVEL"]]
-            return Sleep(
+            return build_model(
+                Sleep,
                 fit_file_path=self._fit_file_path,
                 file_id=file_id,
                 zone_info=self._zone_info,
@@ -423,3 +474,7 @@ class FitSleepParser(FitAbstractParser):
                 fit_file_path=self._fit_file_path,
                 errors=[FitMessageValidationException(error)]
             )
+
+
+# Parsers shipped with fit_galgo, loaded by the registry when first needed.
+BUILTIN_PARSERS = (FitActivityParser, FitMonitoringParser, FitHrvParser, FitSleepParser)
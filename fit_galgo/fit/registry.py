@@ -0,0 +1,112 @@
+import importlib
+from typing import TYPE_CHECKING
+
+from fit_galgo.fit.definitions import file_type_num
+from fit_galgo.logging.logging import get_logger
+
+if TYPE_CHECKING:
+    from fit_galgo.fit.parsers import FitAbstractParser
+
+# Entry points group where third-party packages can register their parsers:
+#
+#     entry_points={"fit_galgo.parsers": ["course = my_pkg.parsers:CourseParser"]}
+PARSERS_ENTRY_POINT_GROUP = "fit_galgo.parsers"
+
+# Module with the parsers shipped with fit_galgo (see BUILTIN_PARSERS there).
+BUILTIN_PARSERS_MODULE = "fit_galgo.fit.parsers"
+
+
+class ParserRegistry:
+    """Registry of the parsers by FIT file type.
+
+    Each parser class declares the FIT file types it parses (FILE_TYPES) and
+    the messages it needs (MESSAGE_NAMES), so only those messages are built
+    while decoding a file of these types.
+
+    File types can be given by name or by number: both are normalized to the
+    file type number when it is known (see FILE_TYPES in definitions).
+
+    The built-in parsers and the ones from the entry points are loaded the
+    first time they are needed. They never replace a parser registered
+    explicitly and the entry points take precedence over the built-in ones.
+    """
+    def __init__(
+            self, load_builtins: bool = True, load_entry_points: bool = True
+    ) -> None:
+        self._parsers: dict[str | int, type["FitAbstractParser"]] = {}
+        self._builtins_loaded: bool = not load_builtins
+        self._entry_points_loaded: bool = not load_entry_points
+
+    def register(
+            self,
+            parser_cls: type["FitAbstractParser"],
+            file_types: tuple[str | int, ...] | None = None
+    ) -> type["FitAbstractParser"]:
+        """Register parser_cls for file_types (or its FILE_TYPES).
+
+        It returns parser_cls so it can be used as a class decorator.
+        """
+        if file_types is None:
+            file_types = parser_cls.FILE_TYPES
+        for file_type in file_types:
+            self._parsers[file_type_num(file_type)] = parser_cls
+        return parser_cls
+
+    def register_default(self, parser_cls: type["FitAbstractParser"]) -> None:
+        """Register parser_cls only for its file types without a parser."""
+        for file_type in parser_cls.FILE_TYPES:
+            self._parsers.setdefault(file_type_num(file_type), parser_cls)
+
+    def unregister(self, file_type: str | int) -> None:
+        self._parsers.pop(file_type_num(file_type), None)
+
+    def get(self, file_type: str | int) -> type["FitAbstractParser"] | None:
+        self._load()
+        return self._parsers.get(file_type_num(file_type))
+
+    def __contains__(self, file_type: str | int) -> bool:
+        return self.get(file_type) is not None
+
+    def file_types(self) -> list[str | int]:
+        self._load()
+        return list(self._parsers.keys())
+
+    def message_names(self, file_type: str | int) -> frozenset[str]:
+        """Return the messages needed to parse a file of file_type."""
+        parser_cls = self.get(file_type)
+        return parser_cls.MESSAGE_NAMES if parser_cls is not None else frozenset()
+
+    def _load(self) -> None:
+        if not self._entry_points_loaded:
+            self._entry_points_loaded = True
+            self._load_entry_points()
+        if not self._builtins_loaded:
+            self._builtins_loaded = True
+            module = importlib.import_module(BUILTIN_PARSERS_MODULE)
+            for parser_cls in module.BUILTIN_PARSERS:
+                self.register_default(parser_cls)
+
+    def _load_entry_points(self) -> None:
+        from importlib.metadata import entry_points
+
+        for entry_point in entry_points(group=PARSERS_ENTRY_POINT_GROUP):
+            try:
+                loaded = entry_point.load()
+            except Exception as error:
+                get_logger(__name__).error(
+                    f"Parser entry point '{entry_point.name}' can't be loaded: {error}"
+                )
+                continue
+            # The entry point can be a parser class or a module that registers
+            # its parsers on import (see register_parser).
+            if isinstance(loaded, type) and hasattr(loaded, "FILE_TYPES"):
+                self.register_default(loaded)
+
+
+# The registry used by FitGalgo.
+registry = ParserRegistry()
+
+
+def register_parser(parser_cls: type["FitAbstractParser"]) -> type["FitAbstractParser"]:
+    """Class decorator that registers a parser into the default registry."""
+    return registry.register(parser_cls)
@@ -1,60 +1,68 @@
-import os
+from __future__ import annotations
 
-from pydantic import BaseModel, ValidationError
-from garmin_fit_sdk import Decoder, Stream, Profile
+import os
+from collections.abc import Callable
+from datetime import datetime
+from functools import partial
+from io import BytesIO
+from typing import TYPE_CHECKING
 
-from fit_galgo.logging.logging import get_logger, initialize, LogLevel
-from fit_galgo.fit.messages import MESSAGES
+from fit_galgo.fit.crc import IntegrityMode, verify_stream
+from fit_galgo.fit.errors import ErrorCollector
 from fit_galgo.fit.exceptions import (
-    FitException, NotFitMessageFoundException, NotSupportedFitFileException
-)
-from fit_galgo.fit.models import FitModel, FitError
-from fit_galgo.fit.parsers import (
-    FitActivityParser, FitMonitoringParser, FitHrvParser, FitSleepParser
+    DecodeAbortedException,
+    ErrorCode,
+    FitException,
+    FitIntegrityException,
+    FitMessageValidationException,
+    NotFitMessageFoundException,
+    NotSupportedFitFileException,
+    TooManyErrorsException
 )
+from fit_galgo.fit.registry import ParserRegistry, registry as default_registry
+from fit_galgo.utils.date_utils import timestamp_16_to_epoch
+
+# The SDK (and its Profile), pydantic and the models are heavy to import so
+# they are imported the first time a file is parsed. Logging is configured by
+# the application (see fit_galgo.logging.logging.initialize).
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+    from fit_galgo.fit.models import FitModel, FitError
+    from fit_galgo.fit.parsers import FitAbstractParser
+    from fit_galgo.index.geo import GeoIndex
+    from fit_galgo.pool import FitPool
 
-# Initialize logger system.
-initialize(LogLevel.DEBUG)
-
-
-# All FIT files supported.
-FIT_FILE_SUPPORTED = {
-    "activity": {
-        "name": "activity",
-        "num": 4,
-        "parser_cls": FitActivityParser,
-        "description": "Activity FIT file: running, cycling..."
-    },
-    "monitoring_a": {
-        "name": "monitoring_a",
-        "num": 15,
-        "parser_cls": FitMonitoringParser,
-        "description": ""
-    },
-    "monitoring_b": {
-        "name": "monitoring_b",
-        "num": 32,
-        "parser_cls": FitMonitoringParser,
-        "description": "Monitoring FIT file with steps, stress level... data"
-    },
-    68: {
-        "name": 68,
-        "num": 68,
-        "parser_cls": FitHrvParser,
-        "description": "FIT file with HRV data"
-    },
-    49: {
-        "name": 49,
-        "num": 49,
-        "parser_cls": FitSleepParser,
-        "description": "FIT file with sleep data"
-    }
+_LAZY_ATTRIBUTES = {
+    "FitModel": "fit_galgo.fit.models",
+    "FitError": "fit_galgo.fit.models",
+    "GeoIndex": "fit_galgo.index.geo"
 }
 
 
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+        return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Files smaller than this are decoded sequentially even if there is a pool.
+PARALLEL_MIN_SIZE = 8 * 1024 * 1024
+# Chunks each worker decodes when a file is decoded in parallel.
+CHUNKS_PER_WORKER = 2
+
+
 class FitReader:
-    def __init__(self, root_folder: str) -> None:
+    """Parse all FIT files found in root_folder.
+
+    :root_folder str: the folder where the FIT files are searched.
+    :geo_index GeoIndex: if given, the parsed activities are added to it.
+    """
+    def __init__(self, root_folder: str, geo_index: GeoIndex | None = None) -> None:
+        from fit_galgo.fit.models import FitModel
+
         self.fit_results: dict[str, FitModel] = {}
+        self.geo_index: GeoIndex | None = geo_index
 
         for dirpath, dirnames, filenames in os.walk(root_folder):
             for filename in [name for name in filenames if name.lower().endswith(".fit")]:
@@ -63,6 +71,8 @@ class FitReader:
                 fit_parser = FitGalgo(fit_file_path)
                 fit_result: FitModel = fit_parser.parse()
                 self.fit_results[fit_file_path] = fit_result
+                if self.geo_index is not None and isinstance(fit_result, FitModel):
+                    self.geo_index.add_activity(fit_result)
 
 
 class FitGalgo:
@@ -81,88 +91,243 @@ class FitGalgo:
     a FitResult that can be a FitError, FitActivity or whatever fit result
     depending on the type of the fit file.
 
+    The parser is chosen from the registry as soon as the FILE_ID message is
+    decoded and, from then on, only the messages it needs are built.
+
+    The decoding stops as soon as a critical error is found (an unsupported
+    file or a message that can't be built) or max_errors errors are found, so
+    bad files are rejected in time proportional to where they fail.
+
+    The integrity of the file is verified before decoding it (see
+    IntegrityMode), so no message is built for a corrupted file.
+
     :fit_file_path str: FIT's file path.
     :zone_info str: IANA zone info string (for example: "Europe/Madrid").
+    :registry ParserRegistry: the registry of parsers (the default one if None).
+    :max_errors int: errors (not critical) allowed before the decoding stops.
+                     None to not stop.
+    :integrity IntegrityMode: how the integrity of the file is verified.
+    :columnar bool: if True, the messages the parser accepts as a table (see
+                    COLUMNAR_MESSAGES in the parsers) are stored into a table
+                    instead of being built as models.
+    :pool FitPool: if given, files of parallel_min_size bytes or more are
+                   split into chunks (see fit_galgo.fit.chunks) decoded by the
+                   workers of the pool, while the messages are built here in
+                   order. The result is the same as decoding the file
+                   sequentially, which is done when it can't be split.
+    :parallel_min_size int: size (in bytes) from which the pool is used.
+    :fast bool: if True and the parser supports it (see FAST_MESSAGES in the
+                parsers), the messages are built as fast classes that only
+                store the fields of their definition (see
+                fit_galgo.fit.fast.compact_model) instead of pydantic models. Use
+                fit_galgo.fit.fast.to_pydantic to validate the result.
     """
-    def __init__(self, fit_file_path: str, zone_info: str | None = None) -> None:
+    def __init__(
+            self,
+            fit_file_path: str,
+            zone_info: str | None = None,
+            registry: ParserRegistry | None = None,
+            max_errors: int | None = None,
+            integrity: IntegrityMode = IntegrityMode.STRICT,
+            columnar: bool = False,
+            pool: FitPool | None = None,
+            parallel_min_size: int = PARALLEL_MIN_SIZE,
+            fast: bool = False
+    ) -> None:
         self._fit_file_path: str = fit_file_path
         self._zone_info: str | None = zone_info
-        self._messages: dict[str, list[BaseModel]] = {name: [] for name in MESSAGES}
-        self._errors: list[Exception] = []
+        self._registry: ParserRegistry = registry or default_registry
+        self._parser_cls: type[FitAbstractParser] | None = None
+        # Messages to build: only FILE_ID until the parser is known.
+        self._message_names: frozenset[str] = frozenset({"FILE_ID"})
+        self._messages: dict[str, list[BaseModel]] = {}
+        self._models: dict[str, dict] = {}
+        self._names_by_num: dict[int, str] = {}
+        self._errors: ErrorCollector = ErrorCollector(fit_file_path)
         self._has_critical_error: bool = False
+        self._max_errors: int | None = max_errors
+        self._integrity: IntegrityMode = IntegrityMode(integrity)
+        self._columnar: bool = columnar
+        self._pool: FitPool | None = pool
+        self._parallel_min_size: int = parallel_min_size
+        self._fast: bool = fast
+        # Compact fast class of the fields of a message (see
+        # fit_galgo.fit.fast.compact_model), by message name.
+        self._fast_models: dict[str, Callable[[tuple[str, ...]], type]] = {}
+        # The compact classes of this file by message name and fields.
+        self._compact_models: dict[tuple[str, tuple[str, ...]], type] = {}
+        # Unix epoch seconds of the last timestamp decoded (a full timestamp
+        # or a resolved timestamp_16), the reference of timestamp_16 fields.
+        self._last_timestamp: int | None = None
 
     def parse(self) -> FitModel | FitError:
-        stream = Stream.from_file(self._fit_file_path)
-        decoder = Decoder(stream)
-        _, decoder_errors = decoder.read(mesg_listener=self._mesg_listener)
-        self._errors.extend(decoder_errors)
+        from fit_galgo.fit.messages import MESSAGES, MESSAGES_BY_NUM
+        from fit_galgo.fit.models import FitError
 
-        if len(self._errors) > 0:
-            return FitError(
-                fit_file_path=self._fit_file_path,
-                errors=self._errors
-            )
+        self._models = MESSAGES
+        self._names_by_num = MESSAGES_BY_NUM
+        self._messages = {name: [] for name in MESSAGES}
 
-        if not self._messages["FILE_ID"]:
-            self._errors.append(NotFitMessageFoundException("file_id"))
-            return FitError(
-                fit_file_path=self._fit_file_path,
-                errors=self._errors
-            )
+        with open(self._fit_file_path, "rb") as fit_file:
+            data: bytes = fit_file.read()
+        try:
+            verify_stream(BytesIO(data), len(data), self._integrity)
+        except FitIntegrityException as error:
+            self._errors.add(error)
+        else:
+            self._decode(data)
 
-        file_type: str = self._messages["FILE_ID"][0].file_type
+        if not self._errors and not self._messages["FILE_ID"]:
+            self._errors.add(NotFitMessageFoundException("file_id"))
 
-        if file_type not in FIT_FILE_SUPPORTED.keys():
-            self._errors.append(NotSupportedFitFileException(file_type))
+        if not self._errors and self._parser_cls is None:
+            self._errors.add(
+                NotSupportedFitFileException(self._messages["FILE_ID"][0].file_type)
+            )
+
+        if self._errors:
+            self._errors.log_summary()
             return FitError(
                 fit_file_path=self._fit_file_path,
-                errors=self._errors
+                errors=self._errors.errors,
+                records=self._errors.records()
             )
 
-        parser = FIT_FILE_SUPPORTED[file_type]["parser_cls"](
+        parser = self._parser_cls(
             fit_file_path=self._fit_file_path,
             messages=self._messages,
             zone_info=self._zone_info
         )
         return parser.parse()
 
+    def _decode(self, data: bytes) -> None:
+        from garmin_fit_sdk import Decoder, Stream
+
+        if self._pool is not None and len(data) >= self._parallel_min_size:
+            from fit_galgo.fit.chunks import prescan
+
+            scan = prescan(data, self._pool.max_workers * CHUNKS_PER_WORKER)
+            if scan.parallel and len(scan.chunks) > 1:
+                self._decode_chunks(scan.chunks)
+                return
+
+        # The CRC is already verified (or it mustn't be verified).
+        decoder = Decoder(Stream.from_byte_array(data))
+        _, decoder_errors = decoder.read(
+            mesg_listener=self._mesg_listener, enable_crc_check=False
+        )
+        self._errors.extend(
+            [e for e in decoder_errors if not isinstance(e, DecodeAbortedException)],
+            ErrorCode.DECODE
+        )
+
+    def _decode_chunks(self, chunks: list) -> None:
+        """Build the messages of the chunks decoded by the pool in order.
+
+        As in the sequential decoding, it stops at the first decoding error
+        or when the listener aborts the decoding.
+        """
+        from fit_galgo.fit.chunks import decode_chunk
+
+        mesg_nums: frozenset[int] = frozenset(self._names_by_num)
+        futures = [
+            self._pool.submit(decode_chunk, self._fit_file_path, chunk, mesg_nums)
+            for chunk in chunks
+        ]
+        try:
+            for future in futures:
+                messages, decoder_errors = future.result()
+                for mesg_num, mesg in messages:
+                    self._mesg_listener(mesg_num, mesg)
+                if decoder_errors:
+                    self._errors.extend(decoder_errors, ErrorCode.DECODE)
+                    return
+        except DecodeAbortedException:
+            pass
+        except Exception as error:
+            self._errors.extend([error], ErrorCode.DECODE)
+        finally:
+            for future in futures:
+                future.cancel()
+
     def _mesg_listener(self, mesg_num: int, mesg: dict) -> None:
-        if self._has_critical_error:
-            return
-        for profile_name, profile_num in Profile["mesg_num"].items():
-            self._add_message_if_supported(profile_name, profile_num, mesg_num, mesg)
+        timestamp = mesg.get("timestamp")
+        if isinstance(timestamp, datetime):
+            self._last_timestamp = int(timestamp.timestamp())
 
-    def _add_message_if_supported(
-            self, profile_name: str, profile_num: int, mesg_num: int, mesg_data: dict
-    ) -> None:
-        if mesg_num != profile_num or profile_name not in MESSAGES:
+        name: str | None = self._names_by_num.get(mesg_num)
+        if name is not None and name in self._message_names:
+            errors: int = len(self._errors)
+            self._add_message(name, mesg)
+
+            if name == "FILE_ID" and self._parser_cls is None and self._messages[name]:
+                self._select_parser(self._messages[name][0].file_type)
+
+            if self._has_critical_error:
+                raise DecodeAbortedException()
+            if (
+                self._max_errors is not None and len(self._errors) > errors and
+                len(self._errors) >= self._max_errors
+            ):
+                self._errors.add(TooManyErrorsException(self._max_errors))
+                raise DecodeAbortedException()
+
+        # The timestamp_16 (once added) is the reference of the next ones.
+        timestamp_16 = mesg.get("timestamp_16")
+        if isinstance(timestamp_16, int) and self._last_timestamp is not None:
+            self._last_timestamp = timestamp_16_to_epoch(
+                self._last_timestamp, timestamp_16
+            )
+
+    def _select_parser(self, file_type: str | int) -> None:
+        parser_cls = self._registry.get(file_type)
+        if parser_cls is None:
+            self._errors.add(NotSupportedFitFileException(file_type))
+            self._has_critical_error = True
             return
+        self._parser_cls = parser_cls
+        self._message_names = parser_cls.MESSAGE_NAMES | {"FILE_ID"}
+        if self._columnar:
+            for name, table_cls in parser_cls.COLUMNAR_MESSAGES.items():
+                self._messages[name] = table_cls()
+        if self._fast and parser_cls.FAST_MESSAGES:
+            from fit_galgo.fit.fast import compact_model
+
+            self._fast_models = {
+                name: partial(compact_model, self._models[name]["model_cls"])
+                for name in parser_cls.MESSAGE_NAMES if name in self._models
+            }
 
+    def _add_message(self, profile_name: str, mesg_data: dict) -> None:
         try:
+            messages = self._messages[profile_name]
+            if not isinstance(messages, list):
+                messages.append(mesg_data, self._last_timestamp)
+                return
+            model_cls = self._models[profile_name]["model_cls"]
             data_dict = {str(k): v for k, v in mesg_data.items()}
-            model = MESSAGES[profile_name]["model_cls"](**data_dict)
-            self._messages[profile_name].append(model)
+            if "last_timestamp" in model_cls.model_fields:
+                data_dict["last_timestamp"] = self._last_timestamp
+            fast_model = self._fast_models.get(profile_name)
+            if fast_model is not None:
+                # The messages of a definition have the same fields (unless
+                # some of them are invalid).
+                key: tuple = (profile_name, tuple(data_dict))
+                compact_cls = self._compact_models.get(key)
+                if compact_cls is None:
+                    compact_cls = self._compact_models[key] = fast_model(key[1])
+                model_cls = compact_cls
+            messages.append(model_cls(**data_dict))
         except NotSupportedFitFileException as error:
-            self._errors.append(error)
+            self._errors.add(error, profile_name)
             self._has_critical_error = True
-            get_logger(__name__).exception(
-                f"File {self._fit_file_path}: an exception was launched: {error}"
-            )
         except FitException as error:
-            self._errors.append(error)
-            get_logger(__name__).exception(
-                f"File {self._fit_file_path}: an exception was launched: {error}"
-            )
-        except ValidationError as error:
-            self._errors.append(error)
-            self._has_critical_error = True
-            get_logger(__name__).exception(
-                f"File {self._fit_file_path}: an exception was launched: {error}"
-            )
+            self._errors.add(error, profile_name)
         except Exception as error:
-            self._errors.append(error)
+            from pydantic import ValidationError
+
             self._has_critical_error = True
-            get_logger(__name__).exception(
-                f"File {self._fit_file_path}: an exception was launched, "
-                f"maybe for a dev error (bug): {error}"
-            )
+            if isinstance(error, ValidationError):
+                self._errors.add(FitMessageValidationException(error, profile_name))
+            else:
+                self._errors.add(error, profile_name, ErrorCode.INTERNAL)
@@ -0,0 +1,310 @@
+import json
+import os
+from collections import namedtuple
+from math import floor
+
+from fit_galgo.fit.columnar import RecordTable
+from fit_galgo.fit.models import DistanceActivity, FitModel, Session, Record
+from fit_galgo.utils.geo_utils import (
+    semicircles_to_degrees,
+    semicircles_to_degrees_array,
+    haversine_distance,
+    degrees_around,
+    point_segment_distance
+)
+
+BoundingBox = namedtuple("BoundingBox", ["min_lat", "min_lon", "max_lat", "max_lon"])
+GeoPoint = namedtuple("GeoPoint", ["lat", "lon"])
+GeoEntry = namedtuple("GeoEntry", ["bbox", "start", "end", "track"])
+
+# Grid cell size in degrees (about 1.1 km of latitude).
+DEFAULT_CELL_SIZE = 0.01
+GEO_INDEX_VERSION = 1
+
+Cell = tuple[int, int]
+
+
+class GeoIndex:
+    """Spatial index over the activities of an archive.
+
+    For every activity (keyed by its FIT file path) it stores the bounding
+    box, the start and end points and a simplified track. The simplified
+    track is indexed in a grid of cell_size degrees, so bounding box and
+    radius queries only look at the activities that touch the cells of the
+    query area.
+
+    Activities can be added or removed one by one, so the index can be
+    updated incrementally while ingesting and persisted with save/load.
+
+    :cell_size float: size in degrees of the grid cells.
+    :tolerance float: minimum distance in degrees between two consecutive
+                      points of the simplified track.
+    """
+    def __init__(
+            self, cell_size: float = DEFAULT_CELL_SIZE, tolerance: float | None = None
+    ) -> None:
+        self.cell_size: float = cell_size
+        self.tolerance: float = tolerance if tolerance is not None else cell_size / 10
+        self._entries: dict[str, GeoEntry] = {}
+        self._track_cells: dict[Cell, set[str]] = {}
+        self._start_cells: dict[Cell, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> GeoEntry | None:
+        return self._entries.get(key)
+
+    def add_activity(self, activity: FitModel) -> bool:
+        """Add (or replace) an activity model into the index.
+
+        Positions are taken from the session(s) start/end positions and from
+        the records, if any (from their record_table if the model has it, so
+        the records received by columns aren't built).
+
+        :return: False if the activity has no position at all so it is not
+                 indexed.
+        """
+        sessions: list[Session] = (
+            getattr(activity, "sessions", None) or
+            ([activity.session] if getattr(activity, "session", None) else [])
+        )
+        points: list[GeoPoint]
+        if isinstance(activity, DistanceActivity):
+            table: RecordTable = activity.record_table
+            points = [
+                GeoPoint(lat, lon) for lat, lon in zip(
+                    semicircles_to_degrees_array(table["position_lat"]),
+                    semicircles_to_degrees_array(table["position_long"])
+                )
+                if lat == lat and lon == lon
+            ]
+        else:
+            records: list[Record] = getattr(activity, "records", None) or []
+            points = [
+                GeoPoint(semicircles_to_degrees(r.position_lat),
+                         semicircles_to_degrees(r.position_long))
+                for r in records
+                if r.position_lat is not None and r.position_long is not None
+            ]
+        start: GeoPoint | None = None
+        end: GeoPoint | None = None
+        for session in sessions:
+            if start is None and session.start_position_lat is not None and \
+               session.start_position_long is not None:
+                start = GeoPoint(semicircles_to_degrees(session.start_position_lat),
+                                 semicircles_to_degrees(session.start_position_long))
+            if session.end_position_lat is not None and \
+               session.end_position_long is not None:
+                end = GeoPoint(semicircles_to_degrees(session.end_position_lat),
+                               semicircles_to_degrees(session.end_position_long))
+
+        return self.add(activity.fit_file_path, points, start, end)
+
+    def add(
+            self,
+            key: str,
+            points: list[GeoPoint],
+            start: GeoPoint | None = None,
+            end: GeoPoint | None = None
+    ) -> bool:
+        """Add (or replace) an activity given its track points in degrees."""
+        start = start or (points[0] if points else None)
+        end = end or (points[-1] if points else None)
+        track: list[GeoPoint] = self._simplify(points)
+        if not track:
+            track = [p for p in (start, end) if p is not None]
+        if not track:
+            self.remove(key)
+            return False
+
+        self.remove(key)
+        lats = [p.lat for p in track]
+        lons = [p.lon for p in track]
+        bbox = BoundingBox(min(lats), min(lons), max(lats), max(lons))
+        entry = GeoEntry(bbox, start, end, track)
+        self._entries[key] = entry
+        self._index_entry(key, entry)
+        return True
+
+    def remove(self, key: str) -> bool:
+        entry: GeoEntry | None = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        for cell in self._cells_of(entry.track):
+            self._discard(self._track_cells, cell, key)
+        if entry.start is not None:
+            self._discard(self._start_cells, self._cell(entry.start), key)
+        return True
+
+    def query_bbox(self, bbox: BoundingBox) -> list[str]:
+        """Return the activities whose track (its segments) passes through bbox."""
+        candidates: set[str] = self._candidates(self._track_cells, bbox)
+        return sorted(
+            key for key in candidates
+            if self._intersects(self._entries[key].bbox, bbox) and any(
+                    self._segment_intersects(a, b, bbox)
+                    for a, b in self._segments(self._entries[key].track)
+            )
+        )
+
+    def query_radius(self, lat: float, lon: float, radius: float) -> list[str]:
+        """Return the activities whose track (its segments) passes within radius
+        meters."""
+        bbox: BoundingBox = self._bbox_around(lat, lon, radius)
+        return sorted(
+            key for key in self._candidates(self._track_cells, bbox)
+            if any(
+                    point_segment_distance(lat, lon, *a, *b) <= radius
+                    for a, b in self._segments(self._entries[key].track)
+                    if self._segment_intersects(a, b, bbox)
+            )
+        )
+
+    def query_start_radius(self, lat: float, lon: float, radius: float) -> list[str]:
+        """Return the activities starting within radius meters."""
+        bbox: BoundingBox = self._bbox_around(lat, lon, radius)
+        return sorted(
+            key for key in self._candidates(self._start_cells, bbox)
+            if haversine_distance(
+                    lat, lon, self._entries[key].start.lat, self._entries[key].start.lon
+            ) <= radius
+        )
+
+    def save(self, path: str) -> None:
+        """Persist the index as a JSON file (written atomically)."""
+        data = {
+            "version": GEO_INDEX_VERSION,
+            "cell_size": self.cell_size,
+            "tolerance": self.tolerance,
+            "entries": {
+                key: {
+                    "start": list(e.start) if e.start else None,
+                    "end": list(e.end) if e.end else None,
+                    "track": [[p.lat, p.lon] for p in e.track]
+                } for key, e in self._entries.items()
+            }
+        }
+        tmp_path: str = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "GeoIndex":
+        with open(path) as f:
+            data = json.load(f)
+        index = cls(cell_size=data["cell_size"], tolerance=data["tolerance"])
+        for key, e in data["entries"].items():
+            track = [GeoPoint(*p) for p in e["track"]]
+            lats = [p.lat for p in track]
+            lons = [p.lon for p in track]
+            entry = GeoEntry(
+                BoundingBox(min(lats), min(lons), max(lats), max(lons)),
+                GeoPoint(*e["start"]) if e["start"] else None,
+                GeoPoint(*e["end"]) if e["end"] else None,
+                track
+            )
+            index._entries[key] = entry
+            index._index_entry(key, entry)
+        return index
+
+    def _simplify(self, points: list[GeoPoint]) -> list[GeoPoint]:
+        if not points:
+            return []
+        tolerance: float = self.tolerance
+        track: list[GeoPoint] = [points[0]]
+        last: GeoPoint = points[0]
+        for p in points[1:]:
+            if abs(p.lat - last.lat) >= tolerance or abs(p.lon - last.lon) >= tolerance:
+                track.append(p)
+                last = p
+        if track[-1] != points[-1]:
+            track.append(points[-1])
+        return track
+
+    def _index_entry(self, key: str, entry: GeoEntry) -> None:
+        for cell in self._cells_of(entry.track):
+            self._track_cells.setdefault(cell, set()).add(key)
+        if entry.start is not None:
+            self._start_cells.setdefault(self._cell(entry.start), set()).add(key)
+
+    def _cell(self, point: GeoPoint) -> Cell:
+        return floor(point.lat / self.cell_size), floor(point.lon / self.cell_size)
+
+    def _cells_of(self, track: list[GeoPoint]) -> set[Cell]:
+        cells: set[Cell] = set()
+        for a, b in zip(track, track[1:] + track[-1:]):
+            cells.add(self._cell(a))
+            # Consecutive points far apart (GPS gaps) also cover the cells of
+            # the bounding box of the segment.
+            (i1, j1), (i2, j2) = self._cell(a), self._cell(b)
+            for i in range(min(i1, i2), max(i1, i2) + 1):
+                for j in range(min(j1, j2), max(j1, j2) + 1):
+                    cells.add((i, j))
+        return cells
+
+    def _candidates(self, cells: dict[Cell, set[str]], bbox: BoundingBox) -> set[str]:
+        i_min, j_min = self._cell(GeoPoint(bbox.min_lat, bbox.min_lon))
+        i_max, j_max = self._cell(GeoPoint(bbox.max_lat, bbox.max_lon))
+        candidates: set[str] = set()
+        if (i_max - i_min + 1) * (j_max - j_min + 1) > len(cells):
+            for (i, j), keys in cells.items():
+                if i_min <= i <= i_max and j_min <= j <= j_max:
+                    candidates.update(keys)
+            return candidates
+        for i in range(i_min, i_max + 1):
+            for j in range(j_min, j_max + 1):
+                candidates.update(cells.get((i, j), ()))
+        return candidates
+
+    @staticmethod
+    def _bbox_around(lat: float, lon: float, radius: float) -> BoundingBox:
+        d_lat, d_lon = degrees_around(lat, radius)
+        return BoundingBox(lat - d_lat, lon - d_lon, lat + d_lat, lon + d_lon)
+
+    @staticmethod
+    def _segments(track: list[GeoPoint]) -> list[tuple[GeoPoint, GeoPoint]]:
+        """The segments between consecutive points (a point if there's one)."""
+        return list(zip(track, track[1:] or track))
+
+    @staticmethod
+    def _segment_intersects(a: GeoPoint, b: GeoPoint, bbox: BoundingBox) -> bool:
+        """Whether the segment from a to b crosses bbox (Liang-Barsky clipping)."""
+        t_in, t_out = 0.0, 1.0
+        d_lat, d_lon = b.lat - a.lat, b.lon - a.lon
+        for p, q in (
+                (-d_lat, a.lat - bbox.min_lat), (d_lat, bbox.max_lat - a.lat),
+                (-d_lon, a.lon - bbox.min_lon), (d_lon, bbox.max_lon - a.lon)
+        ):
+            if p == 0:
+                if q < 0:
+                    return False
+                continue
+            t: float = q / p
+            if p < 0:
+                t_in = max(t_in, t)
+            else:
+                t_out = min(t_out, t)
+            if t_in > t_out:
+                return False
+        return True
+
+    @staticmethod
+    def _intersects(a: BoundingBox, b: BoundingBox) -> bool:
+        return not (
+            a.max_lat < b.min_lat or a.min_lat > b.max_lat or
+            a.max_lon < b.min_lon or a.min_lon > b.max_lon
+        )
+
+    @staticmethod
+    def _discard(cells: dict[Cell, set[str]], cell: Cell, key: str) -> None:
+        keys: set[str] | None = cells.get(cell)
+        if keys is None:
+            return
+        keys.discard(key)
+        if not keys:
+            del cells[cell]
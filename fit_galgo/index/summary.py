@@ -0,0 +1,365 @@
+import sqlite3
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from typing import NamedTuple
+from zoneinfo import ZoneInfo
+
+from fit_galgo.fit.models import FitModel, Session
+
+SUMMARY_INDEX_VERSION = 1
+
+# Periods of the materialized aggregates: the format of their keys (over the
+# local start time of the sessions). "all" has a single period.
+PERIODS: dict[str, str] = {
+    "week": "%G-W%V",
+    "month": "%Y-%m",
+    "year": "%Y",
+    "all": "all"
+}
+
+# Metrics that can be totaled, ranked (top) and accumulated.
+METRICS: tuple[str, ...] = (
+    "distance", "elapsed", "timer", "ascent", "descent", "calories"
+)
+
+# Metrics that can only be ranked.
+RANK_METRICS: tuple[str, ...] = METRICS + ("avg_speed", "max_speed", "max_heart_rate")
+
+GROUPS: tuple[str, ...] = ("sport", "sub_sport")
+
+_SCHEMA: str = f"""
+CREATE TABLE IF NOT EXISTS sessions (
+    path TEXT NOT NULL,
+    session_index INTEGER NOT NULL,
+    sport TEXT NOT NULL,
+    sub_sport TEXT NOT NULL,
+    start_time INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    week TEXT NOT NULL,
+    month TEXT NOT NULL,
+    year TEXT NOT NULL,
+    {", ".join(f"{m} REAL" for m in RANK_METRICS)},
+    PRIMARY KEY (path, session_index)
+);
+CREATE INDEX IF NOT EXISTS sessions_start_time ON sessions (start_time);
+CREATE TABLE IF NOT EXISTS aggregates (
+    period_kind TEXT NOT NULL,
+    period TEXT NOT NULL,
+    sport TEXT NOT NULL,
+    sub_sport TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    {", ".join(f"{m} REAL NOT NULL" for m in METRICS)},
+    PRIMARY KEY (period_kind, period, sport, sub_sport)
+);
+"""
+
+_UPSERT_AGGREGATE: str = f"""
+INSERT INTO aggregates VALUES (?, ?, ?, ?, ?, {", ".join("?" for _ in METRICS)})
+ON CONFLICT (period_kind, period, sport, sub_sport) DO UPDATE SET
+    count = count + excluded.count,
+    {", ".join(f"{m} = {m} + excluded.{m}" for m in METRICS)}
+"""
+
+
+class SessionSummary(NamedTuple):
+    path: str
+    session_index: int
+    sport: str
+    sub_sport: str
+    start_time: int  # Unix epoch seconds
+    timestamp: int  # Unix epoch seconds
+    week: str
+    month: str
+    year: str
+    distance: float | None  # in meters
+    elapsed: float | None  # in seconds
+    timer: float | None  # in seconds
+    ascent: float | None  # in meters
+    descent: float | None  # in meters
+    calories: float | None
+    avg_speed: float | None  # in m/s
+    max_speed: float | None  # in m/s
+    max_heart_rate: float | None
+
+
+_INSERT_SESSION: str = (
+    f"INSERT INTO sessions VALUES ({', '.join('?' for _ in SessionSummary._fields)})"
+)
+
+
+class Totals(NamedTuple):
+    period: str
+    sport: str | None
+    sub_sport: str | None
+    count: int
+    distance: float
+    elapsed: float
+    timer: float
+    ascent: float
+    descent: float
+    calories: float
+
+
+class RunningTotal(NamedTuple):
+    period: str
+    value: float
+    total: float
+
+
+def session_summary(
+        path: str, session: Session, zone_info: str | None = None
+) -> SessionSummary:
+    """Return the summary of session (its periods are in the zone_info time)."""
+    start_time: datetime = session.start_time
+    if start_time.tzinfo is None:
+        start_time = start_time.replace(tzinfo=timezone.utc)
+    local: datetime = start_time.astimezone(
+        ZoneInfo(zone_info) if zone_info else timezone.utc
+    )
+    return SessionSummary(
+        path=path,
+        session_index=session.message_index,
+        sport=session.sport,
+        sub_sport=session.sub_sport,
+        start_time=int(start_time.timestamp()),
+        timestamp=int(session.timestamp.timestamp()),
+        week=local.strftime(PERIODS["week"]),
+        month=local.strftime(PERIODS["month"]),
+        year=local.strftime(PERIODS["year"]),
+        distance=session.total_distance,
+        elapsed=session.total_elapsed_time,
+        timer=session.total_timer_time,
+        ascent=session.total_ascent,
+        descent=session.total_descent,
+        calories=session.total_calories,
+        avg_speed=session.enhanced_avg_speed or session.avg_speed,
+        max_speed=session.enhanced_max_speed or session.max_speed,
+        max_heart_rate=session.max_heart_rate
+    )
+
+
+def model_summaries(model: FitModel) -> list[SessionSummary]:
+    """Return the summary of each session of model (none if it isn't an activity)."""
+    sessions: list[Session] = (
+        getattr(model, "sessions", None) or
+        ([model.session] if getattr(model, "session", None) else [])
+    )
+    return [
+        session_summary(model.fit_file_path, session, model.zone_info)
+        for session in sessions
+    ]
+
+
+class SummaryIndex:
+    """Summary of the activities of an archive persisted in a SQLite database.
+
+    It stores a row per session (see SessionSummary) and the totals of the
+    sessions by period (see PERIODS), sport and sub_sport. The totals are
+    materialized: they're updated when the activities are added or removed,
+    so totals queries don't look at the sessions.
+
+    Activities are keyed by their FIT file path, so adding an activity again
+    replaces it.
+
+    :path str: the SQLite database (":memory:" to not persist it).
+    """
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path: str = path
+        self._db = sqlite3.connect(path)
+        version: int = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SUMMARY_INDEX_VERSION):
+            self._db.close()
+            raise ValueError(
+                f"Summary index version {version} of {path} is not supported"
+            )
+        with self._db:
+            self._db.executescript(_SCHEMA)
+            self._db.execute(f"PRAGMA user_version = {SUMMARY_INDEX_VERSION}")
+
+    def __enter__(self) -> "SummaryIndex":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def __contains__(self, path: str) -> bool:
+        return self._db.execute(
+            "SELECT 1 FROM sessions WHERE path = ? LIMIT 1", (path,)
+        ).fetchone() is not None
+
+    def close(self) -> None:
+        self._db.close()
+
+    def add_activity(self, model: FitModel) -> int:
+        """Add (or replace) the sessions of model.
+
+        :return: the number of sessions added (0 if model isn't an activity).
+        """
+        return self.add(model.fit_file_path, model_summaries(model))
+
+    def add(self, path: str, summaries: list[SessionSummary]) -> int:
+        """Add (or replace) the sessions of the activity of path."""
+        return self.add_many([(path, summaries)])
+
+    def add_many(self, activities: Iterable[tuple[str, list[SessionSummary]]]) -> int:
+        """Add (or replace) the sessions of several activities in a transaction.
+
+        :activities Iterable: the path and the sessions of each activity.
+        :return: the number of sessions added.
+        """
+        added: int = 0
+        with self._db:
+            for path, summaries in activities:
+                self._remove(path)
+                self._db.executemany(_INSERT_SESSION, summaries)
+                self._update_aggregates(summaries, 1)
+                added += len(summaries)
+        return added
+
+    def remove(self, path: str) -> bool:
+        with self._db:
+            return self._remove(path)
+
+    def sessions(
+            self,
+            sport: str | None = None,
+            start: datetime | None = None,
+            end: datetime | None = None
+    ) -> list[SessionSummary]:
+        """Return the sessions (of sport) started between start and end (exclusive)."""
+        where, params = self._where(sport=sport, start=start, end=end)
+        return [
+            SessionSummary(*row) for row in self._db.execute(
+                f"SELECT * FROM sessions {where} ORDER BY start_time, session_index",
+                params
+            )
+        ]
+
+    def totals(
+            self,
+            period: str = "all",
+            group_by: tuple[str, ...] = ("sport",),
+            sport: str | None = None,
+            sub_sport: str | None = None
+    ) -> list[Totals]:
+        """Return the totals by period and group_by (from the aggregates).
+
+        :period str: one of PERIODS.
+        :group_by tuple[str, ...]: some of GROUPS. The ones not given are None
+                                   in the totals.
+        :return: the totals sorted by period and groups.
+        """
+        self._check(period, PERIODS, "period")
+        for group in group_by:
+            self._check(group, GROUPS, "group")
+        where, params = self._where(sport=sport, sub_sport=sub_sport)
+        where = f"{where} {'AND' if where else 'WHERE'} period_kind = ?"
+        columns: list[str] = [
+            group if group in group_by else "NULL" for group in GROUPS
+        ]
+        keys: str = ", ".join(["period", *group_by])
+        rows = self._db.execute(
+            f"SELECT period, {', '.join(columns)}, SUM(count), "
+            f"{', '.join(f'SUM({m})' for m in METRICS)} FROM aggregates {where} "
+            f"GROUP BY {keys} ORDER BY {keys}",
+            (*params, period)
+        )
+        return [Totals(*row) for row in rows]
+
+    def top(
+            self,
+            metric: str,
+            k: int = 10,
+            sport: str | None = None,
+            sub_sport: str | None = None,
+            ascending: bool = False
+    ) -> list[SessionSummary]:
+        """Return the k sessions with the highest (or lowest) metric."""
+        self._check(metric, RANK_METRICS, "metric")
+        where, params = self._where(sport=sport, sub_sport=sub_sport)
+        where = f"{where} {'AND' if where else 'WHERE'} {metric} IS NOT NULL"
+        rows = self._db.execute(
+            f"SELECT * FROM sessions {where} "
+            f"ORDER BY {metric} {'ASC' if ascending else 'DESC'}, start_time LIMIT ?",
+            (*params, k)
+        )
+        return [SessionSummary(*row) for row in rows]
+
+    def running_totals(
+            self, metric: str, period: str = "month", sport: str | None = None
+    ) -> list[RunningTotal]:
+        """Return the metric of each period and its total up to the period."""
+        self._check(metric, METRICS, "metric")
+        self._check(period, PERIODS, "period")
+        where, params = self._where(sport=sport)
+        where = f"{where} {'AND' if where else 'WHERE'} period_kind = ?"
+        rows = self._db.execute(
+            f"SELECT period, SUM({metric}), "
+            f"SUM(SUM({metric})) OVER (ORDER BY period) "
+            f"FROM aggregates {where} GROUP BY period ORDER BY period",
+            (*params, period)
+        )
+        return [RunningTotal(*row) for row in rows]
+
+    def rebuild_aggregates(self) -> None:
+        """Compute the aggregates again from the sessions."""
+        with self._db:
+            self._db.execute("DELETE FROM aggregates")
+            rows = self._db.execute("SELECT * FROM sessions")
+            self._update_aggregates([SessionSummary(*row) for row in rows], 1)
+
+    def _remove(self, path: str) -> bool:
+        summaries: list[SessionSummary] = [
+            SessionSummary(*row) for row in self._db.execute(
+                "SELECT * FROM sessions WHERE path = ?", (path,)
+            )
+        ]
+        if not summaries:
+            return False
+        self._db.execute("DELETE FROM sessions WHERE path = ?", (path,))
+        self._update_aggregates(summaries, -1)
+        return True
+
+    def _update_aggregates(self, summaries: list[SessionSummary], sign: int) -> None:
+        rows: list[tuple] = []
+        for summary in summaries:
+            values: tuple = tuple(sign * (getattr(summary, m) or 0.0) for m in METRICS)
+            for kind in PERIODS:
+                period: str = getattr(summary, kind) if kind != "all" else PERIODS[kind]
+                rows.append(
+                    (kind, period, summary.sport, summary.sub_sport, sign, *values)
+                )
+        self._db.executemany(_UPSERT_AGGREGATE, rows)
+        if sign < 0:
+            self._db.execute("DELETE FROM aggregates WHERE count <= 0")
+
+    @staticmethod
+    def _where(
+            sport: str | None = None,
+            sub_sport: str | None = None,
+            start: datetime | None = None,
+            end: datetime | None = None
+    ) -> tuple[str, tuple]:
+        conditions: list[str] = []
+        params: list = []
+        for column, value in (("sport", sport), ("sub_sport", sub_sport)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if start is not None:
+            conditions.append("start_time >= ?")
+            params.append(int(start.timestamp()))
+        if end is not None:
+            conditions.append("start_time < ?")
+            params.append(int(end.timestamp()))
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else "", tuple(params))
+
+    @staticmethod
+    def _check(value: str, allowed, name: str) -> None:
+        if value not in allowed:
+            raise ValueError(
+                f"Unknown {name} '{value}': it must be one of {list(allowed)}"
+            )
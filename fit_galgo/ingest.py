@@ -0,0 +1,326 @@
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from collections.abc import Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import NamedTuple, TextIO
+
+from fit_galgo.fit.exceptions import ErrorCode, FitException
+from fit_galgo.pool import FitPool, parse_file
+
+# Files whose results are written in the same transaction (and journaled).
+BATCH_SIZE = 500
+# Files submitted to the pool per worker (the rest wait to be submitted).
+FILES_PER_WORKER = 4
+# Seconds between progress reports.
+PROGRESS_INTERVAL = 2.0
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+
+class IngestResult(NamedTuple):
+    """What a worker returns for a file: its sessions or its error."""
+    path: str
+    size: int
+    mtime_ns: int
+    summaries: list  # SessionSummary of each session
+    error_code: str | None = None
+    error: str | None = None
+
+
+class IngestStats(NamedTuple):
+    files: int  # found
+    skipped: int  # already in the journal
+    ingested: int  # without errors
+    errors: int
+    sessions: int
+    bytes: int  # of the files ingested now
+    seconds: float
+    error_codes: dict[str, int]  # files by the code of their first error
+    interrupted: bool = False
+
+    @property
+    def files_per_second(self) -> float:
+        return (self.ingested + self.errors) / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.bytes / 1024 / 1024 / self.seconds if self.seconds else 0.0
+
+
+def ingest_file(
+        fit_file_path: str, zone_info: str | None = None, options: dict | None = None
+) -> IngestResult:
+    """Parse a FIT file and return the summaries of its sessions (the task of
+    the workers, so only the summaries are sent back)."""
+    from fit_galgo.fit.models import FitError
+    from fit_galgo.index.summary import model_summaries
+
+    try:
+        st = os.stat(fit_file_path)
+        model = parse_file(fit_file_path, zone_info, options)
+    except Exception as error:
+        code: str = error.code if isinstance(error, FitException) else ErrorCode.INTERNAL
+        return IngestResult(fit_file_path, 0, 0, [], str(code), str(error))
+    if isinstance(model, FitError):
+        record = model.records[0] if model.records else None
+        return IngestResult(
+            fit_file_path, st.st_size, st.st_mtime_ns, [],
+            str(record.code) if record else str(ErrorCode.FIT),
+            record.message if record else None
+        )
+    return IngestResult(
+        fit_file_path, st.st_size, st.st_mtime_ns, model_summaries(model)
+    )
+
+
+def failed_file(fit_file_path: str, code: str, error: str) -> IngestResult:
+    """The result of a file whose worker failed."""
+    try:
+        st = os.stat(fit_file_path)
+    except OSError:
+        return IngestResult(fit_file_path, 0, 0, [], code, error)
+    return IngestResult(fit_file_path, st.st_size, st.st_mtime_ns, [], code, error)
+
+
+class Journal:
+    """A checkpoint log of the files already ingested.
+
+    Each line is a JSON object with the path, size and modification time of a
+    file and its status, appended once its results are committed. A file is
+    done if it's in the journal with the same size and modification time, so
+    the files that change are ingested again. A line cut by a crash is
+    ignored.
+
+    :path str: the journal (created if it doesn't exist).
+    """
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.done: dict[str, tuple[int, int]] = {}
+        line: str = "\n"
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as journal:
+                for line in journal:
+                    try:
+                        entry: dict = json.loads(line)
+                        self.done[entry["path"]] = (entry["size"], entry["mtime_ns"])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        self._file: TextIO = open(path, "a", encoding="utf-8")
+        if not line.endswith("\n"):
+            # The next entries don't follow the cut line.
+            self._file.write("\n")
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.done)
+
+    def is_done(self, fit_file_path: str) -> bool:
+        checkpoint: tuple[int, int] | None = self.done.get(fit_file_path)
+        if checkpoint is None:
+            return False
+        try:
+            st = os.stat(fit_file_path)
+        except OSError:
+            return False
+        return checkpoint == (st.st_size, st.st_mtime_ns)
+
+    def record(self, results: Iterable[IngestResult]) -> None:
+        """Append the results and write them to disk."""
+        for result in results:
+            self._file.write(json.dumps({
+                "path": result.path,
+                "size": result.size,
+                "mtime_ns": result.mtime_ns,
+                "status": STATUS_OK if result.error_code is None else STATUS_ERROR,
+                "error_code": result.error_code
+            }) + "\n")
+            self.done[result.path] = (result.size, result.mtime_ns)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class Progress:
+    """Report the files done, the rate and the ETA every interval seconds."""
+    def __init__(
+            self,
+            total: int = 0,
+            out: TextIO | None = None,
+            interval: float = PROGRESS_INTERVAL
+    ) -> None:
+        self.total: int = total
+        self.out: TextIO = out or sys.stderr
+        self.interval: float = interval
+        self.start: float = time.perf_counter()
+        self._last: float = self.start
+
+    def update(self, done: int, force: bool = False) -> None:
+        now: float = time.perf_counter()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        elapsed: float = now - self.start
+        rate: float = done / elapsed if elapsed > 0 else 0.0
+        eta: str = (
+            format_seconds((self.total - done) / rate) if rate > 0 else "unknown"
+        )
+        self.out.write(
+            f"{done}/{self.total} files ({rate:.1f} files/s, ETA {eta})\n"
+        )
+        self.out.flush()
+
+
+def format_seconds(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def ingest(
+        fit_file_paths: Iterable[str],
+        store_path: str,
+        journal_path: str | None = None,
+        zone_info: str | None = None,
+        pool: FitPool | None = None,
+        max_workers: int | None = None,
+        batch_size: int = BATCH_SIZE,
+        progress: Progress | None = None
+) -> IngestStats:
+    """Ingest the sessions of the FIT files into a SummaryIndex.
+
+    The files are parsed by the workers of a FitPool and their sessions are
+    written to the store in transactions of batch_size files. After each
+    transaction the files are appended to the journal, so if the ingestion
+    is stopped (even by a crash) it goes on from the last batch when it's
+    run again: the files in the journal are skipped. A file ingested again
+    replaces its sessions.
+
+    If a worker dies (e.g. killed for running out of memory) the pool is
+    restarted and the files that were running are parsed again one by one,
+    so the file that kills its worker is found and journaled with an
+    internal error instead of stopping every run.
+
+    :store_path str: the SQLite database of the SummaryIndex.
+    :journal_path str: the Journal (store_path + ".journal" if None).
+    :pool FitPool: the pool (a new one, closed at the end, if None).
+    :progress Progress: where the progress is reported (none if None).
+    :return: the stats of the ingestion (interrupted if it was stopped by
+             KeyboardInterrupt: the batches done are kept).
+    """
+    from fit_galgo.index.summary import SummaryIndex
+
+    start: float = time.perf_counter()
+    paths: list[str] = [os.path.abspath(path) for path in fit_file_paths]
+    pending: list[IngestResult] = []
+    error_codes: Counter = Counter()
+    ingested: int = 0
+    errors: int = 0
+    sessions: int = 0
+    size: int = 0
+    interrupted: bool = False
+
+    own_pool: bool = pool is None
+    with Journal(journal_path or store_path + ".journal") as journal, \
+            SummaryIndex(store_path) as store:
+        todo: list[str] = [path for path in paths if not journal.is_done(path)]
+        if progress is not None:
+            progress.total = len(todo)
+
+        def commit() -> None:
+            store.add_many(
+                (result.path, result.summaries) for result in pending
+                if result.error_code is None
+            )
+            journal.record(pending)
+            pending.clear()
+
+        pool = pool or FitPool(max_workers=max_workers, fast=True)
+        window: int = pool.max_workers * FILES_PER_WORKER
+        queue: deque[str] = deque(todo)
+        # Files that were running when a worker died (parsed again alone).
+        suspects: deque[str] = deque()
+        # The path of each future and whether it's parsed alone.
+        running: dict[Future, tuple[str, bool]] = {}
+        broken: bool = False
+
+        def submit(path: str, alone: bool) -> None:
+            try:
+                future: Future = pool.submit(ingest_file, path, zone_info, pool.options)
+            except BrokenProcessPool:
+                # A worker died before its futures were done.
+                pool.restart()
+                future = pool.submit(ingest_file, path, zone_info, pool.options)
+            running[future] = (path, alone)
+
+        try:
+            while queue or suspects or running:
+                if suspects:
+                    if not running:
+                        submit(suspects.popleft(), True)
+                else:
+                    while queue and len(running) < window:
+                        submit(queue.popleft(), False)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, alone = running.pop(future)
+                    try:
+                        result: IngestResult = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        if not alone:
+                            suspects.append(path)
+                            continue
+                        result = failed_file(
+                            path, ErrorCode.INTERNAL, "the worker process died"
+                        )
+                    except Exception as error:
+                        result = failed_file(path, ErrorCode.INTERNAL, str(error))
+                    pending.append(result)
+                    size += result.size
+                    if result.error_code is None:
+                        ingested += 1
+                        sessions += len(result.summaries)
+                    else:
+                        errors += 1
+                        error_codes[result.error_code] += 1
+                if broken and not running:
+                    pool.restart()
+                    broken = False
+                if len(pending) >= batch_size:
+                    commit()
+                if progress is not None:
+                    progress.update(ingested + errors)
+        except KeyboardInterrupt:
+            interrupted = True
+            for future in running:
+                future.cancel()
+        finally:
+            commit()
+            if own_pool:
+                pool.close(wait=not interrupted)
+        if progress is not None:
+            progress.update(ingested + errors, force=True)
+
+    return IngestStats(
+        files=len(paths),
+        skipped=len(paths) - len(todo),
+        ingested=ingested,
+        errors=errors,
+        sessions=sessions,
+        bytes=size,
+        seconds=time.perf_counter() - start,
+        error_codes=dict(error_codes.most_common()),
+        interrupted=interrupted
+    )
@@ -4,6 +4,10 @@ from enum import IntEnum
 
 APP_ID = "fit_data_whiz"
 
+# fit_galgo doesn't configure the logging: it's up to the application (for
+# example, calling initialize). Until then, the records are discarded.
+logging.getLogger(APP_ID).addHandler(logging.NullHandler())
+
 
 class LogLevel(IntEnum):
     DEBUG = 1
@@ -16,6 +20,9 @@ class LogLevel(IntEnum):
 def initialize(loglevel: LogLevel):
     """Initialize logger and return the logger.
 
+    It can be called more than once: the handler added by a previous call is
+    replaced, so records are not written twice.
+
     Arguments:
     loglevel -- a LogLevel indicating the level of the logging:
                 5 -> logging.CRITICAL
@@ -37,6 +44,9 @@ def initialize(loglevel: LogLevel):
     handler.setFormatter(formatter)
 
     # Add the handlers to the logger.
+    for previous in [h for h in logger.handlers if getattr(h, "fit_galgo", False)]:
+        logger.removeHandler(previous)
+    handler.fit_galgo = True
     logger.addHandler(handler)
 
     return logger
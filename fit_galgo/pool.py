@@ -0,0 +1,242 @@
+import atexit
+import importlib
+import multiprocessing
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from fit_galgo.logging.logging import initialize, LogLevel
+
+# Modules every worker needs to parse FIT files.
+WARM_UP_MODULES = (
+    "garmin_fit_sdk",
+    "fit_galgo.fit.models",
+    "fit_galgo.fit.messages",
+    "fit_galgo.fit.parsers",
+    "fit_galgo.galgo"
+)
+
+# Per process state. With the fork start method the workers inherit the
+# state (and the modules) warmed up by the parent process.
+_worker_state: dict = {"warmed_up": False, "log_level": None}
+
+
+def warm_up(log_level: LogLevel | None = None) -> None:
+    """Prepare the current process to parse FIT files.
+
+    It imports the heavy modules, loads the parsers of the registry (built-in
+    and entry points) and configures the logging. It only does the work the
+    first time it's called in a process, so it is cheap to call it again.
+    """
+    if log_level is not None and _worker_state["log_level"] != log_level:
+        initialize(log_level)
+        _worker_state["log_level"] = log_level
+    if _worker_state["warmed_up"]:
+        return
+
+    for module in WARM_UP_MODULES:
+        importlib.import_module(module)
+
+    from fit_galgo.fit.registry import registry
+    registry.file_types()
+
+    _worker_state["warmed_up"] = True
+
+
+def parse_file(
+        fit_file_path: str,
+        zone_info: str | None = None,
+        options: dict | None = None,
+        transport: str = "pickle"
+):
+    """Parse a FIT file in the current process (the task of the workers).
+
+    :options dict: keyword arguments of FitGalgo.
+    :transport str: the Transport of the result (see fit_galgo.transport).
+    """
+    from fit_galgo.galgo import FitGalgo
+
+    result = FitGalgo(fit_file_path, zone_info, **(options or {})).parse()
+    if transport == "shared_memory":
+        from fit_galgo.transport import share
+        return share(result)
+    return result
+
+
+def is_warmed_up(_=None) -> bool:
+    return _worker_state["warmed_up"]
+
+
+class FitPool:
+    """A long-lived pool of pre-warmed processes to parse FIT files.
+
+    All workers are started and warmed up (see warm_up) when the pool is
+    built, so the cost of starting processes, importing modules and loading
+    parsers is paid once and not per batch. The pool can be reused across
+    requests until close is called.
+
+    :max_workers int: number of processes (os.cpu_count() if None).
+    :log_level LogLevel: if given, the logging of the workers is initialized
+                         with this level.
+    :start_method str: multiprocessing start method. By default it's "fork"
+                       where available because workers inherit the modules
+                       already imported by the parent.
+    :max_errors int: errors allowed in a file before its decoding stops (see
+                     FitGalgo).
+    :integrity str: the IntegrityMode used to verify the files.
+    :columnar bool: if True, the messages are stored into tables when the
+                    parser supports it (see FitGalgo). They are smaller to
+                    send from the workers.
+    :fast bool: if True, the messages are built as fast classes when the
+                parser supports it (see FitGalgo). They are smaller to send
+                from the workers.
+    :transport str: how the results are sent from the workers (see
+                    fit_galgo.transport.Transport). With "shared_memory" the
+                    monitors come with monitoring_table (and monitorings
+                    empty).
+    """
+    def __init__(
+            self,
+            max_workers: int | None = None,
+            log_level: LogLevel | None = None,
+            start_method: str | None = None,
+            max_errors: int | None = None,
+            integrity: str = "strict",
+            columnar: bool = False,
+            transport: str = "pickle",
+            fast: bool = False
+    ) -> None:
+        if start_method is None and "fork" in multiprocessing.get_all_start_methods():
+            start_method = "fork"
+        if start_method == "fork":
+            warm_up()
+        self.transport: str = transport
+        if transport == "shared_memory":
+            from fit_galgo.transport import ensure_tracker
+            ensure_tracker()
+
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        # Options of FitGalgo.
+        self.options: dict = {
+            "max_errors": max_errors,
+            "integrity": integrity,
+            "columnar": columnar,
+            "fast": fast
+        }
+        self._start_method: str | None = start_method
+        self._log_level: LogLevel | None = log_level
+        self._closed: bool = False
+        self._start()
+
+    def _start(self) -> None:
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(self._start_method),
+            initializer=warm_up,
+            initargs=(self._log_level,)
+        )
+        # Start the workers now instead of on the first batch.
+        list(self._executor.map(is_warmed_up, range(self.max_workers)))
+
+    def __enter__(self) -> "FitPool":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Run fn(*args, **kwargs) in a worker."""
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def submit_file(self, fit_file_path: str, zone_info: str | None = None) -> Future:
+        future: Future = self._executor.submit(
+            parse_file, fit_file_path, zone_info, self.options, self.transport
+        )
+        if self.transport == "shared_memory":
+            from fit_galgo.transport import received
+            return received(future)
+        return future
+
+    def parse(self, fit_file_path: str, zone_info: str | None = None):
+        return self.submit_file(fit_file_path, zone_info).result()
+
+    def parse_large(self, fit_file_path: str, zone_info: str | None = None):
+        """Parse a big FIT file here decoding its chunks in the workers.
+
+        See the pool argument of FitGalgo. Small files and files that can't
+        be split are decoded here.
+        """
+        from fit_galgo.galgo import FitGalgo
+
+        return FitGalgo(fit_file_path, zone_info, pool=self, **self.options).parse()
+
+    def map(
+            self,
+            fit_file_paths: Iterable[str],
+            zone_info: str | None = None,
+            chunksize: int = 1
+    ) -> Iterator[tuple[str, object]]:
+        """Parse the files and yield (path, result) in the same order.
+
+        With the shared memory transport each file is a task (chunksize is
+        ignored) so its result is received as soon as it's parsed.
+        """
+        paths: list[str] = list(fit_file_paths)
+        if self.transport == "shared_memory":
+            futures: list[Future] = [self.submit_file(p, zone_info) for p in paths]
+            return zip(paths, (future.result() for future in futures))
+        results = self._executor.map(
+            parse_file,
+            paths,
+            [zone_info] * len(paths),
+            [self.options] * len(paths),
+            chunksize=chunksize
+        )
+        return zip(paths, results)
+
+    def restart(self) -> None:
+        """Replace the workers by new ones.
+
+        A pool is broken (its futures raise BrokenProcessPool) when a worker
+        dies (e.g. killed for running out of memory). The tasks not done are
+        lost.
+        """
+        if self._closed:
+            raise RuntimeError("the pool is closed")
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._start()
+
+    def close(self, wait: bool = True) -> None:
+        if not self._closed:
+            self._closed = True
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+_shared_pool: FitPool | None = None
+
+
+def get_pool(
+        max_workers: int | None = None, log_level: LogLevel | None = None
+) -> FitPool:
+    """Return the pool shared by the whole process, building it the first time.
+
+    The arguments only apply when the pool is built. It's closed at exit.
+    """
+    global _shared_pool
+    if _shared_pool is None or _shared_pool.closed:
+        _shared_pool = FitPool(max_workers=max_workers, log_level=log_level)
+    return _shared_pool
+
+
+def close_pool() -> None:
+    global _shared_pool
+    if _shared_pool is not None:
+        _shared_pool.close()
+        _shared_pool = None
+
+
+atexit.register(close_pool)
@@ -0,0 +1,273 @@
+from array import array
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from enum import StrEnum
+from functools import partial
+from multiprocessing import resource_tracker, shared_memory
+from typing import NamedTuple
+
+from fit_galgo.fit.columnar import NAN, LazyList, MonitoringTable, RecordTable
+from fit_galgo.utils.date_utils import epoch_to_datetime
+
+# Offsets of the buffers in a block are aligned to this size.
+ALIGNMENT = 8
+# Value of the int columns of the records where a record hasn't the field.
+INT_MISSING = -2**63
+# Prefix of the buffers of the record fields.
+RECORDS = "records."
+
+
+class Transport(StrEnum):
+    """How the results are sent from the workers to the coordinator.
+
+    PICKLE: the whole model is pickled.
+    SHARED_MEMORY: the records (or monitorings) are written by columns into a
+                   shared memory block and only the rest of the model (and
+                   where the columns are) is pickled. See share and receive.
+    """
+    PICKLE = "pickle"
+    SHARED_MEMORY = "shared_memory"
+
+
+class BufferLayout(NamedTuple):
+    name: str
+    typecode: str
+    offset: int
+    length: int
+
+
+class SharedBuffers:
+    """Arrays written into a shared memory block.
+
+    Only this object, the layout of the arrays and the values that aren't
+    arrays (lists of Python objects) are pickled. The block is created by
+    the worker and it's unlinked by the coordinator when the arrays are
+    received, so it only lives while the result is in transit.
+
+    :buffers dict: arrays (written into the block) or lists (pickled).
+    """
+    def __init__(self, buffers: dict[str, array | list]) -> None:
+        self.layout: list[BufferLayout] = []
+        self.objects: dict[str, list] = {}
+        size: int = 0
+        for name, values in buffers.items():
+            if isinstance(values, array):
+                self.layout.append(
+                    BufferLayout(name, values.typecode, size, len(values))
+                )
+                size += -(-len(values) * values.itemsize // ALIGNMENT) * ALIGNMENT
+            else:
+                self.objects[name] = values
+
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        try:
+            for layout in self.layout:
+                data = memoryview(buffers[layout.name]).cast("B")
+                block.buf[layout.offset:layout.offset + len(data)] = data
+                data.release()
+        except BaseException:
+            block.close()
+            block.unlink()
+            raise
+        self.name: str = block.name
+        block.close()
+
+    def receive(self) -> dict[str, array | list]:
+        """Copy the arrays out of the block and unlink it.
+
+        :raise: FileNotFoundError if the block was already received or released.
+        """
+        block = shared_memory.SharedMemory(name=self.name)
+        try:
+            buffers: dict[str, array | list] = {}
+            for layout in self.layout:
+                values = array(layout.typecode)
+                end: int = layout.offset + layout.length * values.itemsize
+                values.frombytes(block.buf[layout.offset:end])
+                buffers[layout.name] = values
+        finally:
+            block.close()
+            block.unlink()
+        buffers.update(self.objects)
+        return buffers
+
+    def release(self) -> None:
+        """Unlink the block without receiving it."""
+        try:
+            block = shared_memory.SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return
+        block.close()
+        block.unlink()
+
+
+def record_columns(records: list) -> dict[str, array | list]:
+    """The fields given to records by columns (see records_from_columns).
+
+    A column is an array if all its values are ints (INT_MISSING where a
+    record hasn't the field), floats (NaN) or UTC datetimes of whole seconds
+    (epoch seconds), or a list otherwise. Its name tells which it is.
+    """
+    from fit_galgo.fit.fast import is_fast
+
+    values_by_name: dict[str, list] = {}
+    for i, record in enumerate(records):
+        for name in record.model_fields_set:
+            values = values_by_name.get(name)
+            if values is None:
+                values = values_by_name[name] = [None] * len(records)
+            values[i] = getattr(record, name)
+
+    columns: dict[str, array | list] = {f"{RECORDS}fast": [is_fast(records)]}
+    for name, values in values_by_name.items():
+        present: list = [v for v in values if v is not None]
+        kinds: set[type] = {v.__class__ for v in present}
+        if not kinds:
+            continue
+        if kinds == {int}:
+            columns[f"{RECORDS}int.{name}"] = array(
+                "q", (INT_MISSING if v is None else v for v in values)
+            )
+        elif kinds == {float}:
+            columns[f"{RECORDS}float.{name}"] = array(
+                "d", (NAN if v is None else v for v in values)
+            )
+        elif kinds == {datetime} and all(
+            v.tzinfo is timezone.utc and not v.microsecond for v in present
+        ):
+            columns[f"{RECORDS}time.{name}"] = array(
+                "q", (INT_MISSING if v is None else int(v.timestamp()) for v in values)
+            )
+        else:
+            columns[f"{RECORDS}object.{name}"] = values
+    return columns
+
+
+def records_from_columns(buffers: dict[str, array | list]) -> list:
+    """Build the records from their columns (see record_columns).
+
+    They're Record models or, if they were fast messages, fast messages.
+    """
+    from fit_galgo.fit.fast import compact_model
+    from fit_galgo.fit.models import Record
+
+    columns: list[tuple[str, str, array | list]] = []
+    size: int = 0
+    for key, values in buffers.items():
+        if key.startswith(RECORDS) and key != f"{RECORDS}fast":
+            kind, name = key[len(RECORDS):].split(".", 1)
+            columns.append((kind, name, values))
+            size = len(values)
+
+    fast: bool = buffers[f"{RECORDS}fast"][0]
+    records: list = []
+    for i in range(size):
+        fields: dict = {}
+        for kind, name, values in columns:
+            value = values[i]
+            if kind == "int" or kind == "time":
+                if value != INT_MISSING:
+                    fields[name] = epoch_to_datetime(value) if kind == "time" else value
+            elif kind == "float":
+                if value == value:
+                    fields[name] = value
+            elif value is not None:
+                fields[name] = value
+        if fast:
+            records.append(compact_model(Record, fields)(**fields))
+        else:
+            records.append(Record.model_construct(**fields))
+    return records
+
+
+class SharedResult(NamedTuple):
+    """A model whose records (or monitorings) travel in shared memory."""
+    model: object
+    buffers: SharedBuffers
+
+
+def share(result) -> object:
+    """Return what a worker sends for result (see Transport.SHARED_MEMORY).
+
+    DistanceActivity and Monitor models are sent as a SharedResult: the
+    model without records (or monitorings) and their columns in a block (the
+    columns of the record_table and every field given to the records). Any
+    other result is returned as is.
+    """
+    from fit_galgo.fit.models import DistanceActivity, Monitor
+
+    if isinstance(result, DistanceActivity):
+        buffers = SharedBuffers({
+            **result.record_table.to_arrays(), **record_columns(result.records)
+        })
+        model = result.model_copy(update={"records": []})
+    elif isinstance(result, Monitor):
+        buffers = SharedBuffers(result.table.buffers())
+        model = result.model_copy(update={"monitorings": [], "monitoring_table": None})
+    else:
+        return result
+    # The cached tables and profiles are not sent.
+    for name in ("_record_table", "_table"):
+        if hasattr(model, name):
+            setattr(model, name, None)
+    if hasattr(model, "_elevations"):
+        model._elevations = {}
+    return SharedResult(model, buffers)
+
+
+def receive(result) -> object:
+    """Return the model sent by a worker (see share).
+
+    The records of a DistanceActivity are in its record_table and its
+    records are a LazyList: they're only built from their columns (see
+    records_from_columns) when they're used. The monitorings of a Monitor
+    are in its monitoring_table.
+    """
+    if not isinstance(result, SharedResult):
+        return result
+    model = result.model
+    buffers: dict[str, array | list] = result.buffers.receive()
+    if hasattr(model, "_record_table"):
+        model._record_table = RecordTable.from_arrays(buffers)
+        model.records = LazyList(len(model._record_table), partial(
+            records_from_columns,
+            {key: values for key, values in buffers.items() if key.startswith(RECORDS)}
+        ))
+    else:
+        model.monitoring_table = MonitoringTable.from_buffers(buffers)
+    return model
+
+
+def received(future: Future) -> Future:
+    """Return a future with the received result of future.
+
+    The result is received (and its block unlinked) as soon as it arrives,
+    even if nobody waits for it.
+    """
+    receiver: Future = Future()
+
+    def done(future: Future) -> None:
+        if future.cancelled():
+            receiver.cancel()
+            receiver.set_running_or_notify_cancel()
+            return
+        error: BaseException | None = future.exception()
+        if error is not None:
+            receiver.set_exception(error)
+            return
+        try:
+            receiver.set_result(receive(future.result()))
+        except Exception as error:
+            receiver.set_exception(error)
+
+    future.add_done_callback(done)
+    return receiver
+
+
+def ensure_tracker() -> None:
+    """Start the resource tracker so the workers forked later share it.
+
+    Otherwise each worker would start its own tracker, which would unlink the
+    blocks not received yet when the worker exits.
+    """
+    resource_tracker.ensure_running()
@@ -1,4 +1,6 @@
-from datetime import datetime, tzinfo, timedelta, time, date
+from array import array
+from collections.abc import Callable, Sequence
+from datetime import datetime, tzinfo, timedelta, timezone
 
 
 def try_to_compute_local_datetime(dt_utc: datetime) -> datetime:
@@ -21,5 +23,84 @@ def try_to_compute_local_datetime(dt_utc: datetime) -> datetime:
     return datetime_local
 
 
-def combine_date_and_seconds(d: date, s: int) -> datetime:
-    return datetime.combine(d, time.min) + timedelta(seconds=s)
+# Seconds between the Unix epoch and the FIT epoch (1989-12-31T00:00:00Z).
+FIT_EPOCH_S = 631065600
+
+
+def epoch_to_datetime(s: int) -> datetime:
+    return datetime.fromtimestamp(s, timezone.utc)
+
+
+def timestamp_16_to_epoch(last: int, timestamp_16: int) -> int:
+    """Resolve a timestamp_16 into Unix epoch seconds.
+
+    A timestamp_16 holds the 16 lower bits of a FIT timestamp, so it is
+    relative to the last timestamp decoded before it (a full timestamp or
+    another timestamp_16, resolved) and it rolls over every 65536 seconds.
+
+    :last int: the last timestamp (Unix epoch seconds).
+    """
+    return last + ((timestamp_16 - ((last - FIT_EPOCH_S) & 0xFFFF)) & 0xFFFF)
+
+
+def timestamp_min_8_to_epoch(last: int, timestamp_min_8: int) -> int:
+    """Resolve a timestamp_min_8 into Unix epoch seconds.
+
+    A timestamp_min_8 holds the 8 lower bits of a FIT timestamp in minutes,
+    so it is relative to the last timestamp decoded before it and it rolls
+    over every 256 minutes. The seconds of the result are always 0.
+
+    :last int: the last timestamp (Unix epoch seconds).
+    """
+    fit_last_min: int = (last - FIT_EPOCH_S) // 60
+    fit_min: int = fit_last_min + ((timestamp_min_8 - (fit_last_min & 0xFF)) & 0xFF)
+    return fit_min * 60 + FIT_EPOCH_S
+
+
+def resolve_timestamp_16(
+        last_timestamps: Sequence[int], timestamps_16: Sequence[int]
+) -> array:
+    """Resolve timestamp_16 values, in the order they were decoded, into Unix
+    epoch seconds (see timestamp_16_to_epoch).
+
+    Each value is the reference of the next one unless the last timestamp
+    of the next one is another (a new full timestamp was decoded between
+    them).
+
+    :last_timestamps Sequence[int]: last timestamp (Unix epoch seconds)
+                                    decoded before each timestamp_16.
+    :timestamps_16 Sequence[int]: the timestamp_16 values.
+    :return: an array('q') with the epoch seconds of each value.
+    """
+    return _resolve_chain(last_timestamps, timestamps_16, timestamp_16_to_epoch)
+
+
+def resolve_timestamp_min_8(
+        last_timestamps: Sequence[int], timestamps_min_8: Sequence[int]
+) -> array:
+    """Resolve timestamp_min_8 values, in the order they were decoded, into
+    Unix epoch seconds (see timestamp_min_8_to_epoch).
+
+    The values are chained as in resolve_timestamp_16.
+
+    :last_timestamps Sequence[int]: last timestamp (Unix epoch seconds)
+                                    decoded before each timestamp_min_8.
+    :timestamps_min_8 Sequence[int]: the timestamp_min_8 values.
+    :return: an array('q') with the epoch seconds of each value.
+    """
+    return _resolve_chain(last_timestamps, timestamps_min_8, timestamp_min_8_to_epoch)
+
+
+def _resolve_chain(
+        last_timestamps: Sequence[int],
+        values: Sequence[int],
+        to_epoch: Callable[[int, int], int]
+) -> array:
+    resolved = array("q", bytes(8 * len(values)))
+    previous_last: int | None = None
+    reference: int = 0
+    for i, (last, value) in enumerate(zip(last_timestamps, values)):
+        if last != previous_last:
+            reference = previous_last = last
+        reference = resolved[i] = to_epoch(reference, value)
+    return resolved
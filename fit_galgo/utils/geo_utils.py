@@ -0,0 +1,52 @@
+from array import array
+from collections.abc import Iterable
+from math import radians, sin, cos, asin, sqrt, hypot
+
+# FIT positions are stored as semicircles: 2^31 semicircles are 180 degrees.
+SEMICIRCLES_TO_DEGREES = 180.0 / 2**31
+EARTH_RADIUS = 6371008.8  # in meters
+METERS_PER_LAT_DEGREE = 111320.0
+
+
+def semicircles_to_degrees(value: int | None) -> float | None:
+    return value * SEMICIRCLES_TO_DEGREES if value is not None else None
+
+
+def semicircles_to_degrees_array(values: Iterable[float]) -> array:
+    """Convert semicircles (NaN if unknown) to degrees in bulk."""
+    return array("d", [value * SEMICIRCLES_TO_DEGREES for value in values])
+
+
+def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Return the great-circle distance in meters between two points in degrees."""
+    d_lat = radians(lat2 - lat1)
+    d_lon = radians(lon2 - lon1)
+    a = (
+        sin(d_lat / 2) ** 2 +
+        cos(radians(lat1)) * cos(radians(lat2)) * sin(d_lon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * asin(sqrt(a))
+
+
+def point_segment_distance(
+        lat: float, lon: float, lat1: float, lon1: float, lat2: float, lon2: float
+) -> float:
+    """Return the distance in meters between a point and a segment in degrees.
+
+    The segment is projected on the plane tangent at the point
+    (equirectangular), which is accurate for segments of a few kilometers.
+    """
+    scale: float = cos(radians(lat))
+    x1, y1 = (lon1 - lon) * scale, lat1 - lat
+    dx, dy = (lon2 - lon1) * scale, lat2 - lat1
+    length: float = dx * dx + dy * dy
+    t: float = max(0.0, min(1.0, -(x1 * dx + y1 * dy) / length)) if length else 0.0
+    return radians(hypot(x1 + t * dx, y1 + t * dy)) * EARTH_RADIUS
+
+
+def degrees_around(lat: float, radius: float) -> tuple[float, float]:
+    """Return the (lat, lon) deltas in degrees that cover radius meters at lat."""
+    d_lat = radius / METERS_PER_LAT_DEGREE
+    lat_cos = cos(radians(lat))
+    d_lon = radius / (METERS_PER_LAT_DEGREE * lat_cos) if lat_cos > 1e-9 else 180.0
+    return d_lat, min(d_lon, 180.0)
@@ -0,0 +1,33 @@
+import os
+import sys
+import time
+import tracemalloc
+
+from fit_galgo.galgo import FitGalgo
+
+
+def parse_all(path_files: list[str], fast: bool) -> tuple[float, int]:
+    """Parse the files keeping the results: seconds and bytes allocated."""
+    tracemalloc.start()
+    start: float = time.perf_counter()
+    results = [FitGalgo(path_file, fast=fast).parse() for path_file in path_files]
+    elapsed: float = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return elapsed, size
+
+
+if __name__ == "__main__":
+    folder_files: str = sys.argv[1] if len(sys.argv) > 1 else "tests/files"
+    path_files: list[str] = [
+        os.path.join(folder_files, file) for file in os.listdir(folder_files)
+        if file.lower().endswith(".fit")
+    ]
+
+    for fast in (False, True):
+        elapsed, size = parse_all(path_files, fast)
+        print(
+            f"{'fast models' if fast else 'pydantic models'}: "
+            f"{elapsed:.2f} s, {size / 1024 / 1024:.1f} MiB"
+        )
@@ -0,0 +1,25 @@
+import subprocess
+import sys
+
+IMPORT_SCRIPT = """
+import time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+"""
+
+
+def import_time(module: str, runs: int = 5) -> float:
+    """Best seconds to import module in a new interpreter."""
+    return min(
+        float(subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT.format(module=module)],
+            capture_output=True, check=True, text=True
+        ).stdout)
+        for _ in range(runs)
+    )
+
+
+if __name__ == "__main__":
+    for module in ("fit_galgo.galgo", "fit_galgo.fit.parsers, garmin_fit_sdk"):
+        print(f"import {module}: {import_time(module) * 1000:.1f} ms")
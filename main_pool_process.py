@@ -1,24 +1,19 @@
 import os
-from concurrent.futures import ProcessPoolExecutor
+import sys
 
-from .parse import FitActivityParser
+from fit_galgo.pool import FitPool
 
 
 if __name__ == "__main__":
-    fit_parse = FitActivityParser()
-    folder_files: str = "pyfittest/tests/files"
-
-    def parse(path_file: str) -> None:
-        global fit_parse
-        fit_parse.parse(path_file)
+    folder_files: str = sys.argv[1] if len(sys.argv) > 1 else "tests/files"
+    path_files: list[str] = [
+        os.path.join(folder_files, file) for file in os.listdir(folder_files)
+        if file.lower().endswith(".fit")
+    ]
 
     cpu_count: int | None = os.cpu_count()
     num_process: int = 4 if cpu_count is None else cpu_count // 2
-    with ProcessPoolExecutor(num_process) as ppe:
+    with FitPool(num_process) as pool:
         for _ in range(25):
-            for file in os.listdir(folder_files):
-                path_file = os.path.join(folder_files, file)
-                if not os.path.isfile(path_file):
-                    continue
-
-                ppe.submit(parse, path_file)
+            for path_file, result in pool.map(path_files):
+                print(f"{path_file}: {type(result).__name__}")
@@ -0,0 +1,48 @@
+import pickle
+import sys
+import tempfile
+import time
+
+from fit_galgo.galgo import FitGalgo
+from fit_galgo.transport import ensure_tracker, receive, share
+
+
+def best_time(setup, fn, runs: int = 5) -> float:
+    """Best seconds of fn(setup()) (setup isn't timed)."""
+    times: list[float] = []
+    for _ in range(runs):
+        argument = setup()
+        start: float = time.perf_counter()
+        fn(argument)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def coordinator_times(fit_file_path: str, fast: bool) -> tuple[float, float]:
+    """Seconds the coordinator spends on a result: unpickling it whole and
+    receiving it from shared memory (the worker pickles and shares it)."""
+    activity = FitGalgo(fit_file_path, fast=fast).parse()
+    pickle_time: float = best_time(lambda: pickle.dumps(activity), pickle.loads)
+    receive_time: float = best_time(
+        lambda: pickle.dumps(share(activity)),
+        lambda payload: receive(pickle.loads(payload))
+    )
+    return pickle_time, receive_time
+
+
+if __name__ == "__main__":
+    ensure_tracker()
+    with tempfile.TemporaryDirectory() as folder:
+        if len(sys.argv) > 1:
+            fit_file_path: str = sys.argv[1]
+        else:
+            from tests.fit_builder import write_activity
+
+            fit_file_path = write_activity(f"{folder}/activity.fit", 20000, laps=20)
+        for fast in (False, True):
+            pickle_time, receive_time = coordinator_times(fit_file_path, fast)
+            print(
+                f"{'fast models' if fast else 'pydantic models'}: "
+                f"pickle.loads {pickle_time * 1000:.1f} ms, "
+                f"shared memory receive {receive_time * 1000:.1f} ms"
+            )
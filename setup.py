@@ -13,4 +13,11 @@ setup(
         "pydantic~=2.4",
         "pytest~=7.4",
     ],
+    extras_require={
+        "arrow": ["pyarrow"],
+        "pandas": ["pandas"],
+    },
+    entry_points={
+        "console_scripts": ["fit_galgo = fit_galgo.cli:main"],
+    },
 )
@@ -0,0 +1,125 @@
+"""Helpers to write small FIT files for the tests with the SDK's Encoder."""
+from datetime import datetime, timedelta, timezone
+
+import garmin_fit_sdk
+import pytest
+from garmin_fit_sdk import Profile
+
+from fit_galgo.utils.date_utils import FIT_EPOCH_S
+
+Encoder = getattr(garmin_fit_sdk, "Encoder", None)
+
+START = datetime(2023, 9, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def encode(messages: list[tuple[str, dict]]) -> bytes:
+    if Encoder is None:
+        pytest.skip("This garmin_fit_sdk version has no Encoder")
+    encoder = Encoder()
+    for name, mesg in messages:
+        encoder.write_mesg({"mesg_num": Profile["mesg_num"][name], **mesg})
+    return bytes(encoder.close())
+
+
+def write_fit_file(path, messages: list[tuple[str, dict]]) -> str:
+    with open(path, "wb") as f:
+        f.write(encode(messages))
+    return str(path)
+
+
+def file_id(file_type: str | int) -> tuple[str, dict]:
+    return ("FILE_ID", {
+        "type": file_type, "manufacturer": "garmin", "time_created": START
+    })
+
+
+def record(i: int, **fields) -> tuple[str, dict]:
+    return ("RECORD", {
+        "timestamp": START + timedelta(seconds=i),
+        "position_lat": 470000000 + i * 1000,
+        "position_long": -4700000 + i * 1000,
+        "heart_rate": 120 + i % 30,
+        "enhanced_altitude": 100.0 + i % 20,
+        "distance": i * 3.0,
+        "enhanced_speed": 3.0,
+        **fields
+    })
+
+
+def lap(index: int, start: int, end: int) -> tuple[str, dict]:
+    return ("LAP", {
+        "message_index": index,
+        "timestamp": START + timedelta(seconds=end),
+        "start_time": START + timedelta(seconds=start),
+        "total_elapsed_time": float(end - start),
+        "total_timer_time": float(end - start),
+        "total_distance": (end - start) * 3.0
+    })
+
+
+def session(n_records: int, sport: str = "running", **fields) -> tuple[str, dict]:
+    return ("SESSION", {
+        "message_index": 0,
+        "timestamp": START + timedelta(seconds=n_records),
+        "start_time": START,
+        "total_elapsed_time": float(n_records),
+        "total_timer_time": float(n_records),
+        "sport": sport,
+        "sub_sport": "generic",
+        "start_position_lat": 470000000,
+        "start_position_long": -4700000,
+        "total_distance": n_records * 3.0,
+        "enhanced_avg_speed": 3.0,
+        "enhanced_max_speed": 4.0,
+        **fields
+    })
+
+
+def activity_messages(n_records: int = 60, laps: int = 2) -> list[tuple[str, dict]]:
+    step = n_records // laps
+    return [
+        file_id("activity"),
+        *[record(i) for i in range(n_records)],
+        *[lap(i, i * step, (i + 1) * step) for i in range(laps)],
+        session(n_records)
+    ]
+
+
+def write_activity(path, n_records: int = 60, laps: int = 2) -> str:
+    return write_fit_file(path, activity_messages(n_records, laps))
+
+
+# Midnight in Europe/Madrid.
+DAY = datetime(2023, 9, 26, 22, 0, tzinfo=timezone.utc)
+
+
+def timestamp_16(dt: datetime) -> int:
+    return (int(dt.timestamp()) - FIT_EPOCH_S) & 0xFFFF
+
+
+def monitoring_messages(n_heart_rates: int = 30) -> list[tuple[str, dict]]:
+    return [
+        file_id("monitoring_b"),
+        ("MONITORING_INFO", {
+            "timestamp": DAY,
+            "activity_type": ["walking", "running"],
+            "resting_metabolic_rate": 1500
+        }),
+        ("MONITORING", {
+            "timestamp": DAY, "activity_type": "walking", "cycles": 1000,
+            "distance": 800.0, "active_calories": 50
+        }),
+        ("MONITORING", {"timestamp": DAY, "calories": 20, "activity_type": "running"}),
+        *[
+            ("MONITORING", {
+                "timestamp_16": timestamp_16(DAY + timedelta(minutes=i)),
+                "heart_rate": 60 + i % 40
+            }) for i in range(n_heart_rates)
+        ],
+        ("MONITORING", {
+            "timestamp_16": timestamp_16(DAY + timedelta(hours=1)),
+            "moderate_activity_minutes": 3,
+            "vigorous_activity_minutes": 1
+        }),
+        ("MONITORING", {"timestamp": DAY + timedelta(hours=2), "ascent": 3.0})
+    ]
@@ -0,0 +1,114 @@
+import pickle
+import tracemalloc
+from datetime import timedelta
+
+import pytest
+
+from fit_galgo.galgo import FitGalgo
+from fit_galgo.fit.columnar import MonitoringKind, MonitoringTable, RecordTable
+from fit_galgo.fit.exceptions import UnexpectedDataMessageException
+from fit_galgo.fit.definitions import VOCABULARY
+from fit_galgo.fit.models import Monitor, Monitoring
+from .fit_builder import DAY, monitoring_messages, write_fit_file
+
+
+def test_monitoring_table():
+    table = MonitoringTable()
+    table.append({"timestamp": DAY, "steps": 10, "activity_type": "walking"})
+    table.append({"timestamp_16": 100, "heart_rate": 61, "unknown": 1}, 1000)
+    table.append({"heart_rate": 62, "ascent": 2})
+
+    assert len(table) == 3
+    assert list(table.kinds) == [
+        MonitoringKind.STEPS,
+        MonitoringKind.HEART_RATE,
+        MonitoringKind.HEART_RATE | MonitoringKind.ASCENT
+    ]
+    assert len(table["heart_rate"]) == 2
+    assert len(table["temperature"]) == 0
+    assert table["heart_rate"].take([0, 1, 2]) == [None, 61, 62]
+    assert table.rows(MonitoringKind.HEART_RATE) == [1, 2]
+    assert table.rows(MonitoringKind.HEART_RATE, "timestamp_16") == [1]
+    assert table.row(0) == {
+        "timestamp": int(DAY.timestamp()), "steps": 10, "activity_type": "walking"
+    }
+    assert table.row(2) == {"heart_rate": 62, "ascent": 2.0}
+
+    loaded = pickle.loads(pickle.dumps(table))
+    assert [loaded.row(i) for i in range(3)] == [table.row(i) for i in range(3)]
+
+
+def test_columnar_monitor_matches_models(tmp_path):
+    path = write_fit_file(tmp_path / "monitor.fit", monitoring_messages())
+    monitor = FitGalgo(path, "Europe/Madrid").parse()
+    columnar = FitGalgo(path, "Europe/Madrid", columnar=True).parse()
+
+    assert isinstance(monitor, Monitor)
+    assert isinstance(columnar, Monitor)
+    assert len(monitor.monitorings) == 34
+    assert columnar.monitorings == []
+    assert len(columnar.monitoring_table) == 34
+
+    assert monitor.total_steps == columnar.total_steps == 2000
+    assert monitor.active_calories == columnar.active_calories == 70
+    assert monitor.heart_rates == columnar.heart_rates
+    assert len(columnar.heart_rates) == 30
+    assert columnar.heart_rates[-1].datetime_utc == DAY + timedelta(minutes=29)
+    assert monitor.activity_intensities == columnar.activity_intensities
+    assert columnar.activity_intensities[0].datetime_utc == DAY + timedelta(hours=1)
+    assert (
+        monitor.model_dump(exclude={"monitorings"}) ==
+        columnar.model_dump(exclude={"monitorings"})
+    )
+
+
+def test_monitoring_table_memory():
+    mesgs = [
+        {"timestamp_16": i & 0xFFFF, "heart_rate": 60 + i % 40, "last_timestamp": i}
+        for i in range(5000)
+    ]
+
+    tracemalloc.start()
+    models = [Monitoring(**mesg) for mesg in mesgs]
+    models_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    table = MonitoringTable()
+    for mesg in mesgs:
+        table.append(mesg)
+    table_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert len(models) == len(table)
+    assert table_size * 10 < models_size
+
+
+def test_category_columns():
+    table = MonitoringTable()
+    for i in range(100):
+        table.append({"timestamp": DAY, "activity_type": "".join(["walk", "ing"])})
+    table.append({"timestamp": DAY, "activity_type": 7})
+
+    column = table["activity_type"]
+    assert list(column.values) == [0] * 100 + [1]
+    assert column.categories == ["walking", 7]
+    assert column.categories[0] is VOCABULARY.intern("walking")
+    assert column.nbytes == 101 * (4 + 2)
+    assert column.take([0, 100]) == ["walking", 7]
+    assert table.to_arrays()["activity_type"] == ["walking"] * 100 + [7]
+
+    loaded = MonitoringTable.from_buffers(
+        pickle.loads(pickle.dumps(table.buffers()))
+    )
+    assert loaded["activity_type"].categories[0] is VOCABULARY.intern("walking")
+    assert loaded.to_arrays()["activity_type"] == table.to_arrays()["activity_type"]
+    loaded.append({"timestamp": DAY, "activity_type": 7})
+    assert loaded["activity_type"].values[-1] == 1
+
+
+def test_record_table_without_timestamp():
+    table = RecordTable()
+    with pytest.raises(UnexpectedDataMessageException):
+        table.append_mesg({"distance": 3.0})
+    assert len(table) == 0
@@ -0,0 +1,144 @@
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from fit_galgo import daemon as daemon_module
+from fit_galgo.daemon import (
+    DaemonBusyException,
+    DaemonClient,
+    DaemonException,
+    DeadlineExceededException,
+    Job,
+    ParseDaemon,
+    ResultCache
+)
+from fit_galgo.fit.fast import FastMessage, to_pydantic
+from fit_galgo.fit.models import DistanceActivity, FitError
+from fit_galgo.galgo import FitGalgo
+from fit_galgo.pool import FitPool
+from .fit_builder import write_activity
+
+
+def test_result_cache(tmp_path):
+    cache = ResultCache(size=2)
+    path = write_activity(tmp_path / "running.fit", 10)
+    key = ResultCache.key(path, None)
+    assert cache.get(key) is None
+    cache.put(key, b"1")
+    cache.put(("b",), b"2")
+    assert cache.get(key) == b"1"
+    cache.put(("c",), b"3")
+    assert cache.get(("b",)) is None
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    write_activity(path, 11)
+    assert ResultCache.key(path, None) != key
+
+
+def test_daemon_parses_files(tmp_path):
+    paths = [write_activity(tmp_path / f"running{i}.fit", 20 + i) for i in range(3)]
+    socket_path = str(tmp_path / "daemon.sock")
+    with ParseDaemon(socket_path, max_workers=1) as daemon:
+        daemon.start()
+        with DaemonClient(socket_path, timeout=30) as client:
+            for path in paths:
+                activity = client.parse(path)
+                assert isinstance(activity, DistanceActivity)
+                assert isinstance(activity.records[0], FastMessage)
+                assert to_pydantic(activity).model_dump() == (
+                    FitGalgo(path).parse().model_dump()
+                )
+            assert len(client.parse(paths[0]).records) == 20
+            stats = client.stats()
+            assert stats["cache_hits"] == 1 and stats["cached"] == 3
+
+            not_fit_path = tmp_path / "not_a_fit.fit"
+            not_fit_path.write_text("timestamp,heart_rate\n")
+            assert isinstance(client.parse(str(not_fit_path)), FitError)
+            with pytest.raises(DaemonException, match="FileNotFoundError"):
+                client.parse(str(tmp_path / "missing.fit"))
+            assert client.request({"priority": 1})[0]["status"] == "error"
+
+
+def test_daemon_priorities_deadlines_and_backpressure(tmp_path):
+    paths = [write_activity(tmp_path / f"running{i}.fit", 20 + i) for i in range(4)]
+    with FitPool(max_workers=1, fast=True) as pool:
+        submitted: list[str] = []
+        submit = pool.submit
+        pool.submit = lambda fn, path, *args: submitted.append(path) or submit(
+            fn, path, *args
+        )
+        with ParseDaemon(("127.0.0.1", 0), pool=pool, max_queue=3) as daemon:
+            daemon.start()
+            # The dispatcher waits while the only slot is taken.
+            with daemon._condition:
+                daemon._running = 1
+            threads = [
+                threading.Thread(target=daemon.parse, args=(path, None, priority))
+                for path, priority in ((paths[0], 1), (paths[1], -1))
+            ]
+            for thread in threads:
+                thread.start()
+            while len(daemon._queue) < 2:
+                time.sleep(0.01)
+            with pytest.raises(DeadlineExceededException):
+                daemon.parse(paths[2], timeout=0.05)
+            with pytest.raises(DaemonBusyException):
+                daemon.parse(paths[3])
+
+            with daemon._condition:
+                daemon._running = 0
+                daemon._condition.notify_all()
+            for thread in threads:
+                thread.join()
+            # The lowest priority first and the expired request is skipped.
+            assert submitted == [paths[1], paths[0]]
+
+            with DaemonClient(daemon.address) as client:
+                assert isinstance(client.parse(paths[3], deadline=30), DistanceActivity)
+                assert client.stats()["queued"] == 0
+
+    assert Job(paths[0], None, 0, time.monotonic() - 1, ()).expired()
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="the workers must inherit the patched parser"
+)
+def test_daemon_survives_dead_workers(tmp_path, monkeypatch):
+    paths = [write_activity(tmp_path / f"running{i}.fit", 20 + i) for i in range(3)]
+    crash_path = paths[0]
+    parse_file = daemon_module.parse_file
+
+    def parse_or_die(path, *args):
+        if path == crash_path:
+            os._exit(1)  # as if the worker was killed
+        return parse_file(path, *args)
+
+    monkeypatch.setattr(daemon_module, "parse_file", parse_or_die)
+    with FitPool(max_workers=1, fast=True) as pool:
+        with ParseDaemon(("127.0.0.1", 0), pool=pool, max_concurrency=2) as daemon:
+            results: dict = {}
+
+            def parse(path):
+                try:
+                    results[path] = daemon.parse(path, timeout=60)
+                except DaemonException as error:
+                    results[path] = error
+
+            # The file parsed with the one that kills the worker is parsed again.
+            threads = [threading.Thread(target=parse, args=(p,)) for p in paths[:2]]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert "The worker died" in str(results[crash_path])
+            assert isinstance(results[paths[1]], bytes)
+
+            # The pool was restarted.
+            assert isinstance(daemon.parse(paths[2], timeout=60), bytes)
+            assert daemon.stats()["running"] == 0
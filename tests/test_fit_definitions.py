@@ -0,0 +1,56 @@
+from fit_galgo.fit.definitions import (
+    ACTIVITY_TYPE_NAMES,
+    EXERCISE_CATEGORIES,
+    EXERCISE_CATEGORY_NAMES,
+    SLEEP_LEVEL,
+    SLEEP_LEVEL_NAMES,
+    VOCABULARY,
+    CodeTable,
+    Vocabulary
+)
+from fit_galgo.fit.models import Monitor, Set, SleepLevel
+
+
+def test_vocabulary():
+    vocabulary = Vocabulary(["walking"])
+    running = "".join(["run", "ning"])
+
+    assert vocabulary.code("walking") == 0
+    assert vocabulary.code(running) == 1
+    assert vocabulary.intern("".join(["run", "ning"])) is running
+    assert len(vocabulary) == 2
+    assert "running" in vocabulary
+    assert "cycling" not in vocabulary
+
+
+def test_code_tables():
+    table = CodeTable({0: "a", 2: "c", 65534: "unknown"})
+
+    assert table.names == ("a", None, "c")
+    assert table.name(2) == "c"
+    assert table.name(65534) == "unknown"
+    assert table.name(1) is None
+    assert table.name(3, "default") == "default"
+    assert table.name("c", "default") == "default"
+    assert table.code("c") == 2
+    assert 65534 in table and 1 not in table
+
+    for code, name in EXERCISE_CATEGORIES.items():
+        assert EXERCISE_CATEGORY_NAMES.name(code) is VOCABULARY.intern(name)
+    assert SLEEP_LEVEL_NAMES.name(4) == SLEEP_LEVEL[4]
+    assert ACTIVITY_TYPE_NAMES.name(254) == "all"
+    assert ACTIVITY_TYPE_NAMES.name(7) is None
+
+
+def test_models_use_code_tables():
+    assert SleepLevel(timestamp=0, sleep_level=3).level == "deep"
+    assert SleepLevel(timestamp=0, sleep_level=9).level == "unmeasurable"
+    assert SleepLevel(timestamp=0, sleep_level="rem").level == "rem"
+    category = [28, None, 70000, "curl"]
+    exercise = Set(timestamp=0, set_type="active", category=category).exercise
+    assert exercise == "squat, 70000, curl"
+
+    monitor = Monitor.model_construct(
+        monitoring_info=type("Info", (), {"activity_type": [1, "custom", 7]})()
+    )
+    assert monitor._activity_types_as_str() == ["running", "custom", "unknown"]
@@ -0,0 +1,75 @@
+import math
+
+from fit_galgo.galgo import FitGalgo
+from fit_galgo.analytics.elevation import elevation_by_ranges, elevation_profile
+from fit_galgo.analytics.splits import activity_elevations
+from fit_galgo.fit.models import DistanceActivity
+from .fit_builder import activity_messages, write_fit_file
+
+NAN = float("nan")
+
+
+def test_gain_loss_and_grades():
+    altitudes = [float(i) for i in range(11)] + [float(i) for i in range(9, -1, -1)]
+    distances = [i * 10.0 for i in range(len(altitudes))]
+    profile = elevation_profile(altitudes, distances, window=1, threshold=3.0)
+
+    assert profile.stats == (10.0, 0.0, 9.0, 9.0)
+    assert math.isnan(profile.grades[0])
+    assert list(profile.grades[1:11]) == [10.0] * 10
+    assert list(profile.grades[11:]) == [-10.0] * 10
+
+    # The gain and loss of the ranges add up to the ones of the whole profile.
+    ranges = elevation_by_ranges(profile, [11, len(altitudes)])
+    assert [(r.max, r.min) for r in ranges] == [(10.0, 0.0), (9.0, 0.0)]
+    assert sum(r.gain for r in ranges) == profile.stats.gain
+    assert sum(r.loss for r in ranges) == profile.stats.loss
+
+
+def test_grades_skip_missing_distances():
+    altitudes = [float(i) for i in range(11)]
+    distances = [NAN, NAN] + [i * 10.0 for i in range(2, 11)]
+    profile = elevation_profile(altitudes, distances, window=1)
+    assert [math.isnan(g) for g in profile.grades[:3]] == [True] * 3
+    assert list(profile.grades[3:]) == [10.0] * 8
+
+    distances[5] = NAN
+    grades = elevation_profile(altitudes, distances, window=1).grades
+    assert grades[5] == grades[4] == 10.0 and grades[6] == 10.0
+
+
+def test_smoothing_removes_noise_and_skips_missing_values():
+    noisy = [100.0 + (i % 2) * 2 for i in range(50)]
+    assert elevation_profile(noisy, window=1, threshold=1.0).stats.gain == 50.0
+    smoothed = elevation_profile(noisy, window=5, threshold=1.0)
+    assert smoothed.stats == (102.0, 100.0, 0.0, 0.0)
+    assert len(smoothed.smoothed) == len(noisy)
+
+    missing = [NAN, 100.0, NAN, NAN, 110.0, NAN]
+    profile = elevation_profile(missing, window=1)
+    assert profile.stats == (110.0, 100.0, 10.0, 0.0)
+    assert math.isnan(profile.smoothed[0])
+    assert math.isnan(elevation_profile([NAN, NAN]).stats.max)
+
+
+def test_activity_elevation(tmp_path):
+    # Altitude from 100 to 119 (and back) every 20 records and no total_ascent.
+    path = write_fit_file(tmp_path / "running.fit", activity_messages(200, laps=4))
+    activity = FitGalgo(path).parse()
+    assert isinstance(activity, DistanceActivity)
+    assert activity.session.total_ascent is None
+
+    profile = activity.elevation(window=1)
+    assert activity.elevation(window=1) is profile
+    assert activity.elevation() is not profile
+    assert profile.stats.max == 119.0 and profile.stats.min == 100.0
+    assert profile.stats.gain == 10 * 18.0
+
+    altitude = activity.altitude
+    assert (altitude.max, altitude.min) == (119.0, 100.0)
+    assert altitude.gain == activity.elevation().stats.gain > 0
+
+    laps = activity_elevations(activity, window=1)
+    assert len(laps) == 4
+    assert sum(lap.gain for lap in laps) == profile.stats.gain
+    assert len(activity_elevations(activity, distance=200.0)) == 3
@@ -0,0 +1,160 @@
+import logging
+import pickle
+
+from pydantic import BaseModel, ValidationError, model_validator
+
+from fit_galgo.galgo import FitGalgo
+from fit_galgo.fit.errors import ErrorCollector, FitErrorRecord, LOG_LIMIT
+from fit_galgo.fit.exceptions import (
+    ErrorCode,
+    FitMessageValidationException,
+    NotSupportedFitFileException,
+    UncompleteMessageException
+)
+from fit_galgo.fit.messages import MESSAGES
+from fit_galgo.fit.models import FitError
+from .fit_builder import activity_messages, file_id, record, write_fit_file
+
+
+class Heart(BaseModel):
+    heart_rate: int
+
+
+def validation_error() -> ValidationError:
+    try:
+        Heart(heart_rate="high")
+    except ValidationError as error:
+        return error
+
+
+def test_errors_are_aggregated_and_logging_is_limited(caplog):
+    collector = ErrorCollector("monitor.fit")
+    with caplog.at_level(logging.WARNING, logger="fit_data_whiz"):
+        for _ in range(1000):
+            try:
+                raise UncompleteMessageException("monitoring", ["cycles"])
+            except UncompleteMessageException as error:
+                collector.add(error)
+        collector.add(FitMessageValidationException(validation_error(), "monitoring"))
+        collector.add(RuntimeError("Bad CRC"), code=ErrorCode.DECODE)
+        collector.log_summary()
+
+    assert len(collector) == 1002
+    assert len(collector.errors) == 3
+    assert all(e.__traceback__ is None for e in collector.errors)
+    assert collector.records() == [
+        FitErrorRecord(
+            ErrorCode.UNCOMPLETE_MESSAGE,
+            "Uncomplete data to build 'monitoring' message: cycles",
+            "monitoring",
+            "cycles",
+            1000
+        ),
+        FitErrorRecord(
+            ErrorCode.VALIDATION,
+            str(collector.errors[1]),
+            "monitoring",
+            "heart_rate",
+            1
+        ),
+        FitErrorRecord(ErrorCode.DECODE, "Bad CRC", None, None, 1)
+    ]
+    assert len(caplog.records) == LOG_LIMIT + 2 + 1
+    assert "1002 errors" in caplog.records[-1].getMessage()
+    assert all(r.exc_info is None for r in caplog.records)
+
+
+def test_fit_error_can_be_pickled():
+    error = FitError(
+        fit_file_path="monitor.fit",
+        errors=[
+            UncompleteMessageException("monitoring", ["cycles", "steps"]),
+            FitMessageValidationException(validation_error()),
+            NotSupportedFitFileException("settings"),
+            RuntimeError("Bad CRC")
+        ]
+    )
+    assert [r.code for r in error.records] == [
+        ErrorCode.UNCOMPLETE_MESSAGE,
+        ErrorCode.VALIDATION,
+        ErrorCode.NOT_SUPPORTED_FILE,
+        ErrorCode.DECODE
+    ]
+
+    loaded = pickle.loads(pickle.dumps(error))
+    assert loaded.records == error.records
+    assert [type(e) for e in loaded.errors] == [type(e) for e in error.errors]
+    assert [str(e) for e in loaded.errors] == [str(e) for e in error.errors]
+    assert loaded.errors[0].mesg_name == "monitoring"
+    assert loaded.errors[0].field == "cycles, steps"
+
+
+def test_not_supported_file_records(tmp_path):
+    path = write_fit_file(
+        tmp_path / "settings.fit", [file_id("settings"), *[record(i) for i in range(5)]]
+    )
+    result = FitGalgo(path).parse()
+    assert isinstance(result, FitError)
+    assert [(r.code, r.mesg_name, r.count) for r in result.records] == [
+        (ErrorCode.NOT_SUPPORTED_FILE, "file_id", 1)
+    ]
+
+
+class ListenedFitGalgo(FitGalgo):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.listened: int = 0
+
+    def _mesg_listener(self, mesg_num: int, mesg: dict) -> None:
+        self.listened += 1
+        super()._mesg_listener(mesg_num, mesg)
+
+
+class UncompleteRecord(BaseModel):
+    @model_validator(mode="before")
+    @classmethod
+    def uncomplete_validator(cls, data: dict) -> dict:
+        raise UncompleteMessageException("record", ["timestamp"])
+
+
+def test_decoding_stops_on_critical_error(tmp_path):
+    messages = [file_id("settings"), *[record(i) for i in range(500)]]
+    path = write_fit_file(tmp_path / "settings.fit", messages)
+    galgo = ListenedFitGalgo(path)
+    result = galgo.parse()
+    assert isinstance(result, FitError)
+    assert galgo.listened == 1
+    assert [type(e) for e in result.errors] == [NotSupportedFitFileException]
+
+
+def test_clean_file_without_errors_allowed(tmp_path):
+    path = write_fit_file(tmp_path / "running.fit", activity_messages(50))
+    assert not isinstance(FitGalgo(path, max_errors=0).parse(), FitError)
+
+
+def test_decoding_stops_after_max_errors(tmp_path, monkeypatch):
+    monkeypatch.setitem(MESSAGES["RECORD"], "model_cls", UncompleteRecord)
+    path = write_fit_file(tmp_path / "running.fit", activity_messages(500))
+
+    galgo = ListenedFitGalgo(path, max_errors=10)
+    result = galgo.parse()
+    assert isinstance(result, FitError)
+    assert galgo.listened == 11
+    assert [(r.code, r.count) for r in result.records] == [
+        (ErrorCode.UNCOMPLETE_MESSAGE, 10), (ErrorCode.TOO_MANY_ERRORS, 1)
+    ]
+
+    galgo = ListenedFitGalgo(path, max_errors=0)
+    result = galgo.parse()
+    assert galgo.listened == 2
+    assert [(r.code, r.count) for r in result.records] == [
+        (ErrorCode.UNCOMPLETE_MESSAGE, 1), (ErrorCode.TOO_MANY_ERRORS, 1)
+    ]
+
+    galgo = ListenedFitGalgo(path)
+    result = galgo.parse()
+    assert isinstance(result, FitError)
+    assert galgo.listened > 500
+    assert [(r.code, r.count) for r in result.records] == [
+        (ErrorCode.UNCOMPLETE_MESSAGE, 500)
+    ]
@@ -0,0 +1,142 @@
+import csv
+import io
+from datetime import timedelta
+import xml.etree.ElementTree as ElementTree
+
+import pytest
+
+from fit_galgo.galgo import FitGalgo
+from fit_galgo.export.exporter import export_archive, export_file, export_model
+from fit_galgo.export.writers import CsvWriter, GpxWriter, TcxWriter
+from fit_galgo.fit.exceptions import NotSupportedFitFileException
+from fit_galgo.fit.models import DistanceActivity
+from .fit_builder import START, file_id, lap, record, session, write_fit_file
+
+GPX = "{http://www.topografix.com/GPX/1/1}"
+TCX = "{http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2}"
+
+
+def running_file(path, n_records: int = 90, laps: int = 3) -> str:
+    # As devices write them: each lap after its records and with the
+    # timestamp of its last record.
+    step = n_records // laps
+    messages = [file_id("activity"), ("SPORT", {"sport": "running"})]
+    for i in range(laps):
+        end = (i + 1) * step if i < laps - 1 else n_records
+        messages.extend(record(j) for j in range(i * step, end))
+        last = {"timestamp": START + timedelta(seconds=end - 1)}
+        messages.append(("LAP", {**lap(i, i * step, (i + 1) * step)[1], **last}))
+    return write_fit_file(path, [*messages, session(n_records)])
+
+
+def export(path: str, writer_cls, **kwargs) -> str:
+    out = io.StringIO()
+    export_file(path, writer_cls(out, "morning run"), **kwargs)
+    return out.getvalue()
+
+
+def test_gpx_tcx_and_csv(tmp_path):
+    path = running_file(tmp_path / "running.fit")
+
+    gpx = ElementTree.fromstring(export(path, GpxWriter, batch_size=7))
+    (track,) = gpx.findall(f"{GPX}trk")
+    assert track.find(f"{GPX}type").text == "running"
+    points = track.findall(f"{GPX}trkseg/{GPX}trkpt")
+    assert len(points) == 90
+    assert float(points[0].get("lat")) == pytest.approx(470000000 * 180 / 2**31)
+    assert points[1].find(f"{GPX}time").text == "2023-09-01T08:00:01Z"
+    assert points[1].find(f"{GPX}ele").text == "101.0"
+
+    tcx = ElementTree.fromstring(export(path, TcxWriter))
+    (activity,) = tcx.findall(f"{TCX}Activities/{TCX}Activity")
+    assert activity.get("Sport") == "Running"
+    laps = activity.findall(f"{TCX}Lap")
+    assert [len(lap.findall(f"{TCX}Track/{TCX}Trackpoint")) for lap in laps] == [
+        30, 30, 30
+    ]
+    assert laps[1].find(f"{TCX}DistanceMeters").text == "90.0"
+
+    rows = list(csv.DictReader(io.StringIO(export(path, CsvWriter))))
+    assert len(rows) == 90
+    assert [rows[i]["lap"] for i in (0, 30, 31, 89)] == ["0", "1", "1", "2"]
+    assert rows[5]["distance"] == "15.00" and rows[5]["heart_rate"] == "125.00"
+
+
+def test_streamed_and_model_exports_are_equal(tmp_path):
+    path = running_file(tmp_path / "running.fit", 200, laps=4)
+    activity = FitGalgo(path).parse()
+    assert isinstance(activity, DistanceActivity)
+    for writer_cls in (GpxWriter, TcxWriter, CsvWriter):
+        out = io.StringIO()
+        export_model(activity, writer_cls(out, "morning run"))
+        assert out.getvalue() == export(path, writer_cls, batch_size=16)
+
+
+def multisport_file(path) -> str:
+    # Only the laps tell the sport of each leg.
+    return write_fit_file(path, [
+        file_id("activity"),
+        *[record(i) for i in range(10)],
+        ("LAP", {**lap(0, 0, 9)[1], "sport": "running"}),
+        *[record(i) for i in range(10, 20)],
+        ("LAP", {**lap(1, 9, 19)[1], "sport": "cycling"})
+    ])
+
+
+def test_multisport_sessions(tmp_path):
+    path = multisport_file(tmp_path / "multisport.fit")
+    tcx = ElementTree.fromstring(export(path, TcxWriter))
+    activities = tcx.findall(f"{TCX}Activities/{TCX}Activity")
+    assert [a.get("Sport") for a in activities] == ["Running", "Biking"]
+    points = [len(a.findall(f"{TCX}Lap/{TCX}Track/{TCX}Trackpoint")) for a in activities]
+    assert points == [10, 10]
+
+
+def test_multisport_gpx_and_csv(tmp_path):
+    path = multisport_file(tmp_path / "multisport.fit")
+
+    gpx = ElementTree.fromstring(export(path, GpxWriter, batch_size=4))
+    tracks = gpx.findall(f"{GPX}trk")
+    assert [track.find(f"{GPX}type").text for track in tracks] == [
+        "running", "cycling"
+    ]
+    assert [len(track.findall(f"{GPX}trkseg/{GPX}trkpt")) for track in tracks] == [
+        10, 10
+    ]
+
+    rows = list(csv.DictReader(io.StringIO(export(path, CsvWriter, batch_size=4))))
+    assert [row["sport"] for row in rows] == ["running"] * 10 + ["cycling"] * 10
+    assert rows[10]["session"] == "1" and rows[10]["timestamp"].endswith("08:00:10Z")
+
+
+def test_sport_messages_sessions(tmp_path):
+    messages = [file_id("activity")]
+    for i, sport in enumerate(("running", "cycling")):
+        messages.append(("SPORT", {"sport": sport}))
+        messages.extend(record(j) for j in range(i * 10, i * 10 + 10))
+        messages.append(("LAP", {**lap(0, i * 10, i * 10 + 9)[1]}))
+        messages.append(session(10, sport, start_time=START + timedelta(seconds=i * 10)))
+    path = write_fit_file(tmp_path / "multisport.fit", messages)
+
+    rows = list(csv.DictReader(io.StringIO(export(path, CsvWriter, batch_size=4))))
+    assert [row["sport"] for row in rows] == ["running"] * 10 + ["cycling"] * 10
+    assert [row["session"] for row in rows] == ["0"] * 10 + ["1"] * 10
+
+
+def test_export_archive(tmp_path):
+    paths = [running_file(tmp_path / f"run{i}.fit", 30 + i) for i in range(3)]
+    paths.append(write_fit_file(
+        tmp_path / "settings.fit", [file_id("settings"), record(0)]
+    ))
+    with pytest.raises(NotSupportedFitFileException):
+        export(paths[-1], GpxWriter)
+
+    out_dir = tmp_path / "gpx"
+    results = list(export_archive(paths, str(out_dir), "gpx"))
+    assert [path for path, _ in results] == paths
+    for i, (_, exported) in enumerate(results[:-1]):
+        assert exported == str(out_dir / f"run{i}.gpx")
+        gpx = ElementTree.parse(exported).getroot()
+        assert len(gpx.findall(f"{GPX}trk/{GPX}trkseg/{GPX}trkpt")) == 30 + i
+    assert isinstance(results[-1][1], NotSupportedFitFileException)
+    assert not (out_dir / "settings.gpx").exists()
@@ -0,0 +1,175 @@
+import pickle
+import warnings
+from datetime import timedelta
+
+from fit_galgo.galgo import FitGalgo
+from fit_galgo.pool import FitPool
+from fit_galgo.fit import fast
+from fit_galgo.fit.fast import (
+    FastMessage,
+    build_model,
+    compact_model,
+    fast_model,
+    to_pydantic
+)
+from fit_galgo.fit.models import (
+    DistanceActivity,
+    FitError,
+    Lap,
+    Monitor,
+    Record,
+    Session,
+    Set,
+    SetActivity
+)
+from .fit_builder import (
+    START,
+    file_id,
+    monitoring_messages,
+    session,
+    write_activity,
+    write_fit_file
+)
+
+
+def test_fast_classes_behave_like_the_models():
+    mesg = {
+        "timestamp": START, "position_lat": 1, "position_long": 2,
+        "enhanced_altitude": 10, "gps_accuracy": 3, "unknown": 1
+    }
+    record = fast_model(Record)(**mesg)
+    assert not hasattr(record, "__dict__")
+    assert record.location == Record(**mesg).location
+    assert isinstance(record.enhanced_altitude, float)
+    assert record.to_model() == Record(**mesg)
+    assert pickle.loads(pickle.dumps(record)) == record
+
+    lap = {"message_index": 0, "timestamp": START, "enhanced_max_speed": 4.0}
+    assert fast_model(Lap)(**lap).speed == Lap(**lap).speed
+
+    mesg = {"timestamp": START, "set_type": "active", "category": ["curl", None]}
+    fast_set = fast_model(Set)(**mesg)
+    assert fast_set.exercise == Set(**mesg).exercise == "curl"
+    assert fast_set.set_type == Set(**mesg).set_type
+    assert fast_set.is_active_set()
+    assert fast_model(Set)(**{**mesg, "set_type": "foo"}).set_type == Set(
+        **{**mesg, "set_type": "foo"}
+    ).set_type
+
+
+def test_compact_classes_only_store_the_given_fields():
+    mesg = {"timestamp": START, "heart_rate": 120, "enhanced_speed": 3, "unknown": 1}
+    compact_cls = compact_model(Record, mesg)
+    assert compact_model(Record, tuple(mesg)) is compact_cls
+    record = compact_cls(**mesg)
+    assert record.__slots__ == ("timestamp", "heart_rate", "enhanced_speed")
+    assert record.power is None
+    assert record.enhanced_speed == 3.0
+    assert record == fast_model(Record)(**mesg)
+    assert record.model_fields_set == {"timestamp", "heart_rate", "enhanced_speed"}
+    assert record.model_dump(exclude_unset=True) == {
+        "timestamp": START, "heart_rate": 120, "enhanced_speed": 3.0
+    }
+    assert record.model_dump() == Record(**mesg).model_dump()
+    assert record.to_model().model_dump(exclude_unset=True) == (
+        record.model_dump(exclude_unset=True)
+    )
+    loaded = pickle.loads(pickle.dumps(record))
+    assert loaded.__slots__ == record.__slots__
+    assert loaded == record
+
+    lap = {"message_index": 0, "timestamp": START}
+    assert compact_model(Lap, lap)(**lap).speed == Lap(**lap).speed
+
+
+def test_compact_classes_are_shared_and_bounded(monkeypatch):
+    fields = ("timestamp", "heart_rate")
+    compact_cls = compact_model(Record, fields)
+    # Neither the order nor the names that aren't fields make a new class.
+    assert compact_model(Record, ("heart_rate", "timestamp", "unknown")) is compact_cls
+    assert compact_model(Record, (*fields, "last_timestamp")) is compact_cls
+
+    monkeypatch.setattr(fast, "COMPACT_MODELS_SIZE", 4)
+    for name in ("power", "cadence", "distance", "altitude", "speed"):
+        compact_model(Record, (*fields, name))
+    assert len(fast._compact_models) == 4
+    assert compact_model(Record, fields) is not compact_cls
+
+
+def test_fast_parse(tmp_path):
+    path = write_activity(tmp_path / "running.fit", 500, laps=4)
+    activity = FitGalgo(path, fast=True).parse()
+    assert isinstance(activity, DistanceActivity)
+    assert isinstance(activity.records[0], FastMessage)
+    assert isinstance(activity.session, FastMessage)
+    assert activity.records[0].__slots__ == tuple(
+        activity.records[0].model_dump(exclude_unset=True)
+    )
+
+    model = FitGalgo(path).parse()
+    assert activity.altitude == model.altitude
+    assert activity.speed == model.speed
+    assert activity.time == model.time
+    assert to_pydantic(activity).model_dump() == model.model_dump()
+    with FitPool(max_workers=1, fast=True) as pool:
+        assert pool.parse(path).records == activity.records
+
+    path = write_fit_file(tmp_path / "monitor.fit", monitoring_messages())
+    monitor = FitGalgo(path, "Europe/Madrid", fast=True).parse()
+    assert isinstance(monitor, Monitor)
+    assert monitor.total_steps == 2000
+    assert to_pydantic(monitor).model_dump() == FitGalgo(
+        path, "Europe/Madrid"
+    ).parse().model_dump()
+
+
+def test_fast_results_serialize_themselves(tmp_path):
+    path = write_activity(tmp_path / "running.fit", 50)
+    activity = FitGalgo(path, fast=True).parse()
+    model = FitGalgo(path).parse()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert activity.model_dump() == model.model_dump()
+        assert activity.model_dump_json() == model.model_dump_json()
+        assert activity.model_dump(exclude={"records"}) == model.model_dump(
+            exclude={"records"}
+        )
+    assert isinstance(activity.records[0], FastMessage)
+    # Without fast messages the model serializes itself, not a copy.
+    assert model._serializable() is model
+
+    path = write_fit_file(tmp_path / "monitor.fit", monitoring_messages())
+    monitor = FitGalgo(path, "Europe/Madrid", fast=True).parse()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert monitor.model_dump() == FitGalgo(
+            path, "Europe/Madrid"
+        ).parse().model_dump()
+
+
+def test_fast_parse_errors(tmp_path):
+    path = write_fit_file(tmp_path / "running.fit", [
+        file_id("activity"), ("LAP", {"timestamp": START}), session(10)
+    ])
+    fast = FitGalgo(path, fast=True).parse()
+    assert isinstance(fast, FitError)
+    model = FitGalgo(path).parse()
+    assert [(r.code, r.mesg_name, r.field) for r in fast.records] == [
+        (r.code, r.mesg_name, r.field) for r in model.records
+    ]
+
+
+def test_build_model():
+    sets = [
+        fast_model(Set)(timestamp=START + timedelta(seconds=i), set_type="rest")
+        for i in range(2)
+    ]
+    activity = build_model(
+        SetActivity,
+        fit_file_path="training.fit",
+        file_id={"type": "activity"},
+        session=fast_model(Session)(**session(10, sport="training")[1]),
+        sets=sets
+    )
+    assert activity.sets == sets
+    assert activity.sport == "training"
@@ -0,0 +1,123 @@
+import importlib.util
+import math
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from fit_galgo.galgo import FitGalgo
+from fit_galgo.fit.models import (
+    DistanceActivity,
+    FileId,
+    FitModel,
+    Hrv,
+    HrvStatusSummary,
+    HrvValue,
+    Monitor,
+    MultisportActivity,
+    Sleep,
+    SleepAssessment,
+    SleepLevel
+)
+from .fit_builder import (
+    START,
+    activity_messages,
+    file_id,
+    lap,
+    monitoring_messages,
+    record,
+    session,
+    write_fit_file
+)
+
+NIGHT = datetime(2023, 9, 26, 23, 0, tzinfo=timezone.utc)
+
+
+def parse_activity(tmp_path) -> DistanceActivity:
+    path = write_fit_file(tmp_path / "running.fit", activity_messages(50, laps=2))
+    activity = FitGalgo(path).parse()
+    assert isinstance(activity, DistanceActivity)
+    return activity
+
+
+def test_activity_arrays_are_not_copied(tmp_path):
+    activity = parse_activity(tmp_path)
+    arrays = activity.to_arrays()
+    assert arrays["timestamp"] is activity.record_table["timestamp"]
+    assert arrays["altitude"] is activity.record_table["altitude"]
+    assert arrays["timestamp"][1] == int(START.timestamp()) + 1
+    assert list(arrays["distance"][:3]) == [0.0, 3.0, 6.0]
+    assert math.isnan(arrays["power"][0])
+
+
+def test_multisport_arrays(tmp_path):
+    messages = [file_id("activity")]
+    for i, sport in enumerate(("running", "cycling")):
+        start = START + timedelta(seconds=i * 10)
+        messages.extend(record(j) for j in range(i * 10, i * 10 + 10))
+        messages.append(lap(i, i * 10, i * 10 + 9))
+        messages.append(session(
+            9, sport, message_index=i, start_time=start,
+            timestamp=start + timedelta(seconds=9)
+        ))
+    path = write_fit_file(tmp_path / "multisport.fit", messages)
+    activity = FitGalgo(path).parse()
+    assert isinstance(activity, MultisportActivity)
+
+    arrays = activity.to_arrays()
+    assert list(arrays)[:2] == ["session", "timestamp"]
+    assert list(arrays["session"]) == [0] * 10 + [1] * 10
+    assert list(arrays["distance"]) == [i * 3.0 for i in range(20)]
+    assert all(len(values) == 20 for values in arrays.values())
+    assert not hasattr(FitModel, "to_arrays")
+
+
+def test_monitor_hrv_and_sleep_arrays(tmp_path):
+    path = write_fit_file(tmp_path / "monitor.fit", monitoring_messages(5))
+    monitor = FitGalgo(path, "Europe/Madrid", columnar=True).parse()
+    assert isinstance(monitor, Monitor)
+    arrays = monitor.to_arrays()
+    assert len(arrays["kind"]) == 9
+    assert all(len(values) == 9 for values in arrays.values())
+    assert list(arrays["heart_rate"][2:7]) == [60.0, 61.0, 62.0, 63.0, 64.0]
+    assert math.isnan(arrays["heart_rate"][0])
+    assert arrays["activity_type"][:3] == ["walking", "running", None]
+
+    hrv = Hrv(
+        fit_file_path="hrv.fit",
+        file_id=FileId(type="hrv_status"),
+        summary=HrvStatusSummary(timestamp=NIGHT),
+        values=[
+            HrvValue(timestamp=NIGHT + timedelta(minutes=5 * i), value=value)
+            for i, value in enumerate([40, None, 44])
+        ]
+    )
+    arrays = hrv.to_arrays()
+    assert list(arrays["timestamp"]) == [
+        int(NIGHT.timestamp()) + 300 * i for i in range(3)
+    ]
+    assert arrays["value"][0] == 40.0 and math.isnan(arrays["value"][1])
+
+    sleep = Sleep(
+        fit_file_path="sleep.fit",
+        file_id=FileId(type="sleep"),
+        assessment=SleepAssessment(),
+        levels=[SleepLevel(timestamp=NIGHT, sleep_level=level) for level in (1, 2)]
+    )
+    assert sleep.to_arrays()["level"] == ["awake", "light"]
+
+
+@pytest.mark.parametrize("module, method", [
+    ("pyarrow", "to_arrow"), ("pandas", "to_pandas")
+])
+def test_optional_conversions(tmp_path, module, method):
+    activity = parse_activity(tmp_path)
+    if importlib.util.find_spec(module) is None:
+        with pytest.raises(ImportError, match=f"pip install {module}"):
+            getattr(activity, method)()
+        return
+
+    frame = getattr(activity, method)()
+    assert len(frame) == 50
+    assert list(frame.column_names if module == "pyarrow" else frame.columns)[:2] == [
+        "timestamp", "distance"
+    ]
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from fit_galgo.fit.models import DistanceActivity, FileId, Record, Session
+from fit_galgo.index.geo import GeoIndex, BoundingBox, GeoPoint
+from fit_galgo.utils.geo_utils import (
+    SEMICIRCLES_TO_DEGREES, haversine_distance, point_segment_distance
+)
+
+
+def semicircles(degrees: float) -> int:
+    return round(degrees / SEMICIRCLES_TO_DEGREES)
+
+
+def build_activity(path: str, points: list[tuple[float, float]]) -> DistanceActivity:
+    start = datetime(2023, 9, 1, 8, 0, tzinfo=timezone.utc)
+    return DistanceActivity(
+        fit_file_path=path,
+        file_id=FileId(type="activity"),
+        session=Session(
+            message_index=0, timestamp=start, start_time=start,
+            total_elapsed_time=1.0, total_timer_time=1.0,
+            sport="running", sub_sport="generic",
+            start_position_lat=semicircles(points[0][0]),
+            start_position_long=semicircles(points[0][1])
+        ),
+        records=[
+            Record(
+                timestamp=start + timedelta(seconds=i),
+                position_lat=semicircles(lat),
+                position_long=semicircles(lon)
+            ) for i, (lat, lon) in enumerate(points)
+        ]
+    )
+
+
+def line(
+        lat: float, lon_from: float, lon_to: float, n: int = 50
+) -> list[tuple[float, float]]:
+    step = (lon_to - lon_from) / (n - 1)
+    return [(lat, lon_from + i * step) for i in range(n)]
+
+
+def build_index() -> GeoIndex:
+    index = GeoIndex()
+    assert index.add_activity(build_activity("valencia.fit", line(39.47, -0.40, -0.35)))
+    assert index.add_activity(build_activity("madrid.fit", line(40.41, -3.72, -3.68)))
+    assert index.add_activity(build_activity("cross.fit", line(39.47, -0.36, -0.30)))
+    return index
+
+
+def test_haversine_distance():
+    assert haversine_distance(0, 0, 0, 0) == 0
+    assert 111000 < haversine_distance(0, 0, 1, 0) < 111400
+
+
+def test_query_bbox():
+    index = build_index()
+    assert len(index) == 3
+    assert index.query_bbox(BoundingBox(39.4, -0.38, 39.5, -0.37)) == ["valencia.fit"]
+    assert index.query_bbox(BoundingBox(39.4, -0.355, 39.5, -0.34)) == [
+        "cross.fit", "valencia.fit"
+    ]
+    assert index.query_bbox(BoundingBox(40.0, -3.70, 41.0, -3.69)) == ["madrid.fit"]
+    assert index.query_bbox(BoundingBox(50.0, 1.0, 51.0, 2.0)) == []
+
+
+def test_query_radius_and_start():
+    index = build_index()
+    assert index.query_radius(39.47, -0.38, 200) == ["valencia.fit"]
+    assert index.query_radius(39.48, -0.38, 200) == []
+    assert index.query_start_radius(39.47, -0.40, 100) == ["valencia.fit"]
+    assert index.query_start_radius(39.47, -0.36, 100) == ["cross.fit"]
+
+
+def test_queries_between_track_points():
+    # A diagonal GPS gap: no point of the track is near the queries.
+    index = GeoIndex()
+    index.add("gap.fit", [GeoPoint(39.0, -1.0), GeoPoint(39.1, -0.9)])
+    assert index.query_bbox(BoundingBox(39.04, -0.96, 39.06, -0.94)) == ["gap.fit"]
+    # Inside the bounding box of the segment but away from it.
+    assert index.query_bbox(BoundingBox(39.07, -0.99, 39.09, -0.97)) == []
+
+    middle = GeoPoint(39.05, -0.95)
+    assert index.query_radius(middle.lat, middle.lon, 50) == ["gap.fit"]
+    assert index.query_radius(39.06, -0.96, 1300) == []
+    assert index.query_radius(39.06, -0.96, 1400) == ["gap.fit"]
+    assert point_segment_distance(39.0, -1.1, 39.0, -1.0, 39.1, -0.9) == (
+        pytest.approx(haversine_distance(39.0, -1.1, 39.0, -1.0), rel=1e-3)
+    )
+
+
+def test_incremental_update():
+    index = build_index()
+    assert index.remove("cross.fit")
+    assert not index.remove("cross.fit")
+    assert index.query_bbox(BoundingBox(39.4, -0.32, 39.5, -0.30)) == []
+
+    index.add("cross.fit", [GeoPoint(40.41, -3.71), GeoPoint(40.42, -3.71)])
+    assert index.query_bbox(BoundingBox(40.0, -3.715, 41.0, -3.705)) == [
+        "cross.fit", "madrid.fit"
+    ]
+    assert "cross.fit" not in index.query_radius(39.47, -0.33, 500)
+
+
+def test_save_and_load(tmp_path):
+    index = build_index()
+    path = str(tmp_path / "geo.json")
+    index.save(path)
+
+    loaded = GeoIndex.load(path)
+    assert len(loaded) == len(index)
+    assert loaded.get("valencia.fit") == index.get("valencia.fit")
+    assert loaded.query_radius(39.47, -0.38, 200) == ["valencia.fit"]
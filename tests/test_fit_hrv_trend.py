@@ -0,0 +1,65 @@
+import math
+from datetime import datetime, timedelta, timezone
+
+from fit_galgo.analytics.hrv import HrvTrend
+from fit_galgo.fit.models import FileId, Hrv, HrvStatusSummary, HrvValue
+
+NIGHT = datetime(2023, 9, 1, 4, 0, tzinfo=timezone.utc)
+
+
+def hrv(day: int, average: float | None) -> Hrv:
+    night = NIGHT + timedelta(days=day)
+    return Hrv(
+        fit_file_path=f"hrv{day}.fit",
+        file_id=FileId(type="hrv_status"),
+        summary=HrvStatusSummary(timestamp=night, last_night_average=average),
+        values=[
+            HrvValue(timestamp=night - timedelta(minutes=5 * i), value=40 + i)
+            for i in range(3)
+        ]
+    )
+
+
+def averages(day: int) -> float | None:
+    if day == 25:
+        return 70.0
+    return None if day == 10 else 40.0 + day % 3
+
+
+def test_hrv_trend():
+    trend = HrvTrend()
+    for day in range(30):
+        trend.add(hrv(day, averages(day)))
+
+    nights = trend.nights
+    assert len(trend) == 30
+    assert nights.rolling_averages[6] == sum(40 + d % 3 for d in range(7)) / 7
+    assert math.isnan(nights.baseline_lows[0])
+    assert nights.baseline_lows[25] < 41 < nights.baseline_highs[25]
+    assert trend.outliers() == [int((NIGHT + timedelta(days=25)).timestamp())]
+
+    week = trend.between(NIGHT + timedelta(days=7), NIGHT + timedelta(days=13))
+    assert len(week.timestamps) == 7
+    assert math.isnan(week.averages[3])
+
+    timestamps, values = trend.values_between(NIGHT, NIGHT + timedelta(days=1))
+    assert list(values) == [40, 42, 41, 40]
+    assert len(trend.values) == 90
+
+
+def test_hrv_trend_out_of_order():
+    trend = HrvTrend()
+    for day in reversed(range(30)):
+        trend.add(hrv(day, averages(day)))
+    trend.add(hrv(3, 50.0))
+
+    in_order = HrvTrend()
+    for day in range(30):
+        in_order.add(hrv(day, 50.0 if day == 3 else averages(day)))
+
+    assert list(trend.nights.timestamps) == list(in_order.nights.timestamps)
+    assert list(trend.nights.rolling_averages) == list(in_order.nights.rolling_averages)
+    assert list(trend.values) == list(in_order.values)
+
+    trend.recompute(rolling_days=1)
+    assert list(trend.nights.rolling_averages)[:3] == [40.0, 41.0, 42.0]
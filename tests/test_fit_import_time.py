@@ -0,0 +1,42 @@
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ("pydantic", "garmin_fit_sdk", "fit_galgo.fit.models")
+
+IMPORT_SCRIPT = """
+import json, sys
+import {module}
+print(json.dumps([m for m in {heavy!r} if m in sys.modules]))
+"""
+
+
+def loaded_by_import(module: str) -> list[str]:
+    """The heavy modules loaded by importing module in a new interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True, check=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def test_galgo_import_does_not_load_heavy_modules():
+    # The import times are measured by main_import.py.
+    assert loaded_by_import("fit_galgo.galgo") == []
+
+
+def test_logging_is_not_configured_on_import():
+    output = subprocess.run(
+        [
+            sys.executable, "-c",
+            "import logging, fit_galgo.galgo; from fit_galgo.logging.logging import "
+            "APP_ID, initialize, LogLevel; logger = logging.getLogger(APP_ID); "
+            "print([type(h).__name__ for h in logger.handlers]); "
+            "initialize(LogLevel.INFO); initialize(LogLevel.DEBUG); "
+            "print([type(h).__name__ for h in logger.handlers])"
+        ],
+        capture_output=True, check=True, text=True
+    ).stdout
+    assert output.splitlines() == [
+        "['NullHandler']", "['NullHandler', 'StreamHandler']"
+    ]
@@ -0,0 +1,141 @@
+import struct
+
+import pytest
+
+from fit_galgo.galgo import FitGalgo
+from fit_galgo.fit.exceptions import FitIntegrityException
+from fit_galgo.fit.incremental import IncrementalDecoder, LiveActivity
+from fit_galgo.fit.models import DistanceActivity
+from .fit_builder import encode, file_id, lap, record, session
+
+
+def running_messages(n_records: int, laps: int) -> list[tuple[str, dict]]:
+    step: int = n_records // laps
+    messages: list[tuple[str, dict]] = [
+        file_id("activity"), ("SPORT", {"sport": "running", "sub_sport": "generic"})
+    ]
+    for i in range(laps):
+        messages.extend(record(j) for j in range(i * step, (i + 1) * step))
+        messages.append(lap(i, i * step, (i + 1) * step - 1))
+    messages.append(session(n_records))
+    return messages
+
+
+def unfinished(data: bytes) -> bytes:
+    """The header of a file being written: without data size nor CRC."""
+    header_size: int = data[0]
+    header = bytearray(data[:header_size])
+    struct.pack_into("<I", header, 4, 0)
+    if header_size == 14:
+        struct.pack_into("<H", header, 12, 0)
+    return bytes(header)
+
+
+def test_live_activity_grows(tmp_path):
+    data: bytes = encode(running_messages(300, 3))
+    header_size: int = data[0]
+    path = tmp_path / "live.fit"
+    live = LiveActivity(str(path))
+    assert live.update() == [] and live.activity() is None
+
+    path.write_bytes(unfinished(data))
+    assert live.update() == []
+    written: int = header_size
+    new_records: int = 0
+    # Messages are split between updates.
+    for end in range(header_size + 7, len(data) - 2, 997):
+        with open(path, "ab") as f:
+            f.write(data[written:end])
+        written = end
+        new_records += len(live.update())
+        assert not live.finished
+        assert len(live.records) == new_records == len(live.table)
+
+    activity = live.activity()
+    assert isinstance(activity, DistanceActivity)
+    assert activity.session.sport == "running"
+    assert activity.session.total_distance == live.stats.distance
+    assert live.stats.max_heart_rate == 149
+    assert live.stats.ascent > 0
+
+    # The device writes the rest, the data size and the CRC.
+    path.write_bytes(data)
+    live.update()
+    assert live.finished
+    assert live.update() == []
+    activity = live.activity()
+    parsed = FitGalgo(str(path)).parse()
+    assert activity.model_dump() == parsed.model_dump()
+    assert {k: v.tobytes() for k, v in activity.to_arrays().items()} == {
+        k: v.tobytes() for k, v in parsed.to_arrays().items()
+    }
+
+
+def test_incremental_decoder_accumulates(tmp_path):
+    messages = [
+        file_id("activity"),
+        *[record(i, compressed_speed_distance=[0, 0, i % 16]) for i in range(40)]
+    ]
+    data: bytes = encode(messages)
+    path = tmp_path / "accumulated.fit"
+    path.write_bytes(data[:len(data) // 2])
+    decoder = IncrementalDecoder(str(path))
+    decoded = decoder.update()
+    path.write_bytes(data)
+    decoded.extend(decoder.update())
+    assert decoder.finished
+    assert decoder.last_timestamp == int(messages[-1][1]["timestamp"].timestamp())
+
+    from garmin_fit_sdk import Decoder, Stream
+    sequential, _ = Decoder(Stream.from_byte_array(data)).read(merge_heart_rates=False)
+    assert [m for _, m in decoded if "distance" in m] == sequential["record_mesgs"]
+
+
+def compressed_distance(distance_16: int) -> list[int]:
+    """compressed_speed_distance with no speed and the 12 lower bits of the
+    distance (in 1/16 m)."""
+    bits: int = distance_16 & 0xFFF
+    return [0, (bits & 0xF) << 4, bits >> 4]
+
+
+def test_incremental_decoder_accumulates_across_updates(tmp_path):
+    # The compressed distances and the cycles roll over between updates and
+    # some records have the whole distance (it restarts the accumulation).
+    messages: list[tuple[str, dict]] = [file_id("activity")]
+    distance_16: int = 0
+    for i in range(200):
+        distance_16 += 37 * 16 + i
+        fields: dict = {
+            "distance": distance_16 / 16 + 5 if i % 50 == 49 else None,
+            "compressed_speed_distance": compressed_distance(distance_16),
+            "cycles": i * 97 % 256
+        }
+        messages.append(record(i, **fields))
+        if i % 30 == 0:
+            messages.append(("HR", {
+                "event_timestamp_12": [(i * 13 + k * 7) % 256 for k in range(12)]
+            }))
+    data: bytes = encode(messages)
+
+    from garmin_fit_sdk import Decoder, Stream
+    sequential: list[tuple[int, dict]] = []
+    Decoder(Stream.from_byte_array(data)).read(
+        mesg_listener=lambda mesg_num, mesg: sequential.append((mesg_num, mesg)),
+        merge_heart_rates=False
+    )
+    path = tmp_path / "accumulated.fit"
+    for step in (17, 301, 3333):
+        path.write_bytes(b"")
+        decoder = IncrementalDecoder(str(path))
+        decoded: list[tuple[int, dict]] = []
+        for end in [*range(data[0], len(data), step), len(data)]:
+            path.write_bytes(data[:end])
+            decoded.extend(decoder.update())
+        assert decoded == sequential
+
+
+def test_incremental_decoder_not_fit_file(tmp_path):
+    path = tmp_path / "bad.fit"
+    path.write_bytes(b"\x0e" + b"\0" * 20)
+    with pytest.raises(FitIntegrityException):
+        IncrementalDecoder(str(path)).update()
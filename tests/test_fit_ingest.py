@@ -0,0 +1,97 @@
+import io
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from fit_galgo.cli import main
+from fit_galgo.index.summary import SummaryIndex
+from fit_galgo import ingest as ingest_module
+from fit_galgo.ingest import Journal, Progress, ingest
+from fit_galgo.pool import FitPool
+from .fit_builder import monitoring_messages, write_activity, write_fit_file
+
+
+def write_archive(folder) -> list[str]:
+    folder.mkdir()
+    paths = [write_activity(folder / f"running{i}.fit", 20 + i) for i in range(5)]
+    paths.append(write_fit_file(folder / "monitor.fit", monitoring_messages()))
+    not_fit_path = folder / "not_a_fit.fit"
+    not_fit_path.write_text("timestamp,heart_rate\n")
+    return paths + [str(not_fit_path)]
+
+
+def test_ingest_resumes_from_the_journal(tmp_path):
+    paths = write_archive(tmp_path / "archive")
+    store = str(tmp_path / "summary.db")
+    out = io.StringIO()
+    with FitPool(max_workers=1, fast=True) as pool:
+        stats = ingest(paths[:4], store, pool=pool, batch_size=2)
+        assert (stats.files, stats.skipped, stats.ingested, stats.errors) == (4, 0, 4, 0)
+        assert stats.sessions == 4
+
+        # A crash cut the last line of the journal.
+        with open(store + ".journal", "a") as journal:
+            journal.write('{"path": "')
+        write_activity(paths[0], 30)
+        stats = ingest(
+            paths, store, pool=pool, progress=Progress(out=out, interval=0)
+        )
+    assert (stats.files, stats.skipped, stats.ingested, stats.errors) == (7, 3, 3, 1)
+    assert stats.sessions == 2
+    assert stats.error_codes == {"integrity": 1}
+    assert "4/4 files" in out.getvalue()
+
+    with SummaryIndex(store) as index:
+        assert len(index) == 5
+        assert index.totals()[0].count == 5
+    journal = Journal(store + ".journal")
+    assert all(journal.is_done(path) for path in paths)
+    journal.close()
+    with open(store + ".journal") as lines:
+        entries = [json.loads(line) for line in lines if line.endswith("}\n")]
+    assert len(entries) == 8
+    assert [e["status"] for e in entries].count("error") == 1
+
+
+def test_ingest_command(tmp_path, capsys):
+    write_archive(tmp_path / "archive")
+    store = str(tmp_path / "summary.db")
+    arguments = ["ingest", str(tmp_path / "archive"), "-s", store, "-w", "1", "-q"]
+    assert main(arguments) == 1
+    out = capsys.readouterr().out
+    assert "7 files, 0 already ingested, 6 ingested, 1 with errors, 5 sessions" in out
+    assert "integrity: 1 files" in out
+
+    assert main(arguments) == 0
+    assert "7 files, 7 already ingested" in capsys.readouterr().out
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="the workers must inherit the patched parser"
+)
+def test_ingest_survives_dead_workers(tmp_path, monkeypatch):
+    paths = write_archive(tmp_path / "archive")[:5]
+    crash_path = paths[2]
+    parse_file = ingest_module.parse_file
+
+    def parse_or_die(path, *args):
+        if path == crash_path:
+            os._exit(1)  # as if the worker was killed
+        return parse_file(path, *args)
+
+    monkeypatch.setattr(ingest_module, "parse_file", parse_or_die)
+    store = str(tmp_path / "summary.db")
+    with FitPool(max_workers=1, fast=True) as pool:
+        stats = ingest(paths, store, pool=pool)
+        assert (stats.ingested, stats.errors) == (4, 1)
+        assert stats.error_codes == {"internal": 1}
+
+        # The file is journaled: the next run doesn't parse it again.
+        stats = ingest(paths, store, pool=pool)
+        assert (stats.skipped, stats.ingested, stats.errors) == (5, 0, 0)
+        assert pool.parse(paths[0]) is not None
+    with SummaryIndex(store) as index:
+        assert len(index) == 4
@@ -0,0 +1,89 @@
+import os
+from io import BytesIO
+
+import pytest
+from garmin_fit_sdk import CrcCalculator
+
+from fit_galgo.cli import main
+from fit_galgo.galgo import FitGalgo
+from fit_galgo.fit.crc import IntegrityMode, crc16, verify_file, verify_stream
+from fit_galgo.fit.exceptions import ErrorCode, FitIntegrityException
+from fit_galgo.fit.models import DistanceActivity, FitError
+from .fit_builder import activity_messages, encode, write_activity
+
+
+def write_bytes(path, data: bytes) -> str:
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def encode_activity() -> bytes:
+    return encode(activity_messages(30))
+
+
+def test_crc16():
+    data = os.urandom(4097)
+    for size in (0, 1, 2, 3, 4096, 4097):
+        assert crc16(data[:size]) == CrcCalculator.calculate_crc(data, 0, size)
+    assert crc16(data[1000:], crc16(data[:1000])) == crc16(data)
+
+
+def test_verify_file(tmp_path):
+    data = bytearray(open(write_activity(tmp_path / "good.fit", 30), "rb").read())
+    verify_file(str(tmp_path / "good.fit"))
+    verify_file(write_bytes(tmp_path / "chained.fit", bytes(data) * 2), chunk_size=64)
+
+    data[-1] ^= 0xFF
+    bad_crc = write_bytes(tmp_path / "bad_crc.fit", data)
+    verify_file(bad_crc, IntegrityMode.HEADER)
+    with pytest.raises(FitIntegrityException, match="CRC Error"):
+        verify_file(bad_crc, chunk_size=64)
+
+    truncated = write_bytes(tmp_path / "truncated.fit", data[:-10])
+    with pytest.raises(FitIntegrityException, match="Truncated"):
+        verify_file(truncated, IntegrityMode.HEADER)
+
+    # The stream ends before the size given (e.g. the file is being written).
+    with pytest.raises(FitIntegrityException, match="Truncated"):
+        verify_stream(BytesIO(data[:-10]), len(data), chunk_size=64)
+
+    data[2] ^= 0xFF
+    bad_header = write_bytes(tmp_path / "bad_header.fit", data)
+    with pytest.raises(FitIntegrityException, match="Header CRC"):
+        verify_file(bad_header, IntegrityMode.HEADER)
+
+    not_fit = write_bytes(tmp_path / "not_fit.fit", b"timestamp,heart_rate\n")
+    with pytest.raises(FitIntegrityException, match="not a fit file"):
+        verify_file(not_fit)
+
+
+def test_integrity_modes(tmp_path):
+    data = bytearray(encode_activity())
+    data[-1] ^= 0xFF
+    path = write_bytes(tmp_path / "bad_crc.fit", data)
+
+    result = FitGalgo(path).parse()
+    assert isinstance(result, FitError)
+    assert [r.code for r in result.records] == [ErrorCode.INTEGRITY]
+    assert isinstance(result.errors[0], RuntimeError)
+
+    assert isinstance(FitGalgo(path, integrity="header").parse(), DistanceActivity)
+    assert isinstance(
+        FitGalgo(path, integrity=IntegrityMode.NONE).parse(), DistanceActivity
+    )
+
+
+def test_verify_command(tmp_path, capsys):
+    write_activity(tmp_path / "good.fit", 30)
+    assert main(["verify", str(tmp_path)]) == 0
+    assert "1 files, 0 wrong" in capsys.readouterr().out
+
+    data = bytearray(encode_activity())
+    data[-2] ^= 0xFF
+    write_bytes(tmp_path / "bad.fit", data)
+    assert main(["verify", str(tmp_path)]) == 1
+    out = capsys.readouterr().out
+    assert "bad.fit: CRC Error" in out
+    assert "2 files, 1 wrong" in out
+    assert "MB/s" in out
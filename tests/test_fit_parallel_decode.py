@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from fit_galgo.galgo import FitGalgo
+from fit_galgo.fit import messages
+from fit_galgo.fit.chunks import prescan
+from fit_galgo.fit.models import DistanceActivity, FitError, Monitor
+from fit_galgo.pool import FitPool
+from .fit_builder import (
+    DAY,
+    activity_messages,
+    encode,
+    file_id,
+    lap,
+    monitoring_messages,
+    record,
+    session,
+    timestamp_16,
+    write_fit_file
+)
+
+
+def interleaved_activity(n_records: int, laps: int) -> list[tuple[str, dict]]:
+    step: int = n_records // laps
+    messages: list[tuple[str, dict]] = [file_id("activity")]
+    for i in range(laps):
+        messages.extend(record(j) for j in range(i * step, (i + 1) * step))
+        messages.append(lap(i, i * step, (i + 1) * step - 1))
+    messages.append(session(n_records))
+    return messages
+
+
+def test_prescan_chunks_cover_the_messages():
+    data = encode(activity_messages(500, 4))
+    scan = prescan(data, 8)
+    assert scan.parallel
+    assert len(scan.chunks) >= 8
+    assert scan.chunks[0].start == data[0] and scan.chunks[0].definitions == b""
+    assert scan.chunks[-1].end == len(data) - 2
+    for previous, chunk in zip(scan.chunks, scan.chunks[1:]):
+        assert previous.end == chunk.start
+        assert chunk.definitions
+
+
+def test_prescan_falls_back():
+    data = encode(activity_messages(10, 1))
+    assert prescan(data + data, 4).reason == "chained FIT files"
+    accumulated = encode([file_id("activity"), record(0, cycles=10)])
+    assert prescan(accumulated, 4).reason == "accumulated fields"
+
+
+def test_parallel_decoding_is_the_same(tmp_path):
+    activity_path = write_fit_file(
+        tmp_path / "running.fit", interleaved_activity(3000, 6)
+    )
+    monitor_path = write_fit_file(tmp_path / "monitor.fit", monitoring_messages(500))
+    with FitPool(max_workers=2) as pool:
+        parallel = FitGalgo(activity_path, pool=pool, parallel_min_size=0).parse()
+        assert isinstance(parallel, DistanceActivity)
+        assert parallel == FitGalgo(activity_path).parse()
+
+        monitor = FitGalgo(
+            monitor_path, "Europe/Madrid", pool=pool, parallel_min_size=0
+        ).parse()
+        assert isinstance(monitor, Monitor)
+        assert monitor == FitGalgo(monitor_path, "Europe/Madrid").parse()
+
+        # Small files are decoded here.
+        assert pool.parse_large(activity_path) == parallel
+
+
+def test_parallel_decoding_errors(tmp_path):
+    path = write_fit_file(
+        tmp_path / "settings.fit",
+        [file_id("settings"), *[record(i) for i in range(200)]]
+    )
+    with FitPool(max_workers=2) as pool:
+        result = FitGalgo(path, pool=pool, parallel_min_size=0).parse()
+    assert isinstance(result, FitError)
+    assert result.records == FitGalgo(path).parse().records
+
+
+def test_parallel_decoding_tracks_unrequested_timestamp_16(tmp_path, monkeypatch):
+    # Every 10 hours: each timestamp_16 is resolved with the previous one.
+    later = [DAY + timedelta(hours=10 * i) for i in range(1, 400)]
+    path = write_fit_file(tmp_path / "monitor.fit", [
+        file_id("monitoring_b"),
+        ("MONITORING_INFO", {"timestamp": DAY, "activity_type": ["walking", "running"]}),
+        *[("MONITORING", {"timestamp_16": timestamp_16(dt)}) for dt in later]
+    ])
+    # MONITORING messages aren't requested: only their timestamp_16 is used.
+    monkeypatch.setattr(messages, "MESSAGES_BY_NUM", {
+        num: name for num, name in messages.MESSAGES_BY_NUM.items()
+        if name != "MONITORING"
+    })
+    sequential = FitGalgo(path, "Europe/Madrid")
+    sequential.parse()
+    assert sequential._last_timestamp == int(later[-1].timestamp())
+    with FitPool(max_workers=2) as pool:
+        parallel = FitGalgo(path, "Europe/Madrid", pool=pool, parallel_min_size=0)
+        parallel.parse()
+    assert parallel._last_timestamp == sequential._last_timestamp
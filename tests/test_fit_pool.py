@@ -0,0 +1,38 @@
+from fit_galgo.fit.models import DistanceActivity, FitError
+from fit_galgo.pool import FitPool, get_pool, close_pool, is_warmed_up, warm_up
+from .fit_builder import write_activity
+
+
+def test_warm_up_is_idempotent():
+    warm_up()
+    warm_up()
+    assert is_warmed_up()
+
+
+def test_pool_parses_files_in_order(tmp_path):
+    paths = [write_activity(tmp_path / f"activity{i}.fit", 10 + i) for i in range(4)]
+    not_fit_path = tmp_path / "not_a_fit.fit"
+    not_fit_path.write_text("timestamp,heart_rate\n")
+    paths.append(str(not_fit_path))
+
+    with FitPool(max_workers=2) as pool:
+        assert all(pool.submit(is_warmed_up).result() for _ in range(4))
+
+        results = list(pool.map(paths))
+        assert [path for path, _ in results] == paths
+        for i, (_, activity) in enumerate(results[:-1]):
+            assert isinstance(activity, DistanceActivity)
+            assert len(activity.records) == 10 + i
+        assert isinstance(results[-1][1], FitError)
+
+        # The pool can be reused for other requests.
+        assert isinstance(pool.parse(paths[0]), DistanceActivity)
+
+    assert pool.closed
+
+
+def test_shared_pool():
+    pool = get_pool(max_workers=1)
+    assert get_pool() is pool
+    close_pool()
+    assert pool.closed
@@ -0,0 +1,88 @@
+from pydantic import BaseModel
+
+from fit_galgo.galgo import FitGalgo
+from fit_galgo.fit.exceptions import NotSupportedFitFileException
+from fit_galgo.fit.models import DistanceActivity, FitError, FitModel
+from fit_galgo.fit.parsers import (
+    FitAbstractParser,
+    FitActivityParser,
+    FitHrvParser,
+    FitMonitoringParser,
+    FitSleepParser
+)
+from fit_galgo.fit.registry import ParserRegistry, registry
+from .fit_builder import activity_messages, file_id, record, write_fit_file
+
+
+class CourseParser(FitAbstractParser):
+    FILE_TYPES = ("course",)
+    MESSAGE_NAMES = frozenset({"FILE_ID", "RECORD"})
+
+    def __init__(
+            self,
+            fit_file_path: str,
+            messages: dict[str, list[BaseModel]],
+            zone_info: str | None = None
+    ) -> None:
+        self.fit_file_path = fit_file_path
+        self.messages = messages
+
+    def parse(self) -> FitModel:
+        return CourseParser.Course(
+            fit_file_path=self.fit_file_path,
+            file_id=self.messages["FILE_ID"][0],
+            built={name: len(models) for name, models in self.messages.items() if models}
+        )
+
+    class Course(FitModel):
+        built: dict[str, int]
+
+
+def test_builtin_parsers_by_name_and_number():
+    assert registry.get("activity") is FitActivityParser
+    assert registry.get(4) is FitActivityParser
+    assert registry.get("monitoring_a") is FitMonitoringParser
+    assert registry.get(32) is FitMonitoringParser
+    assert registry.get(68) is FitHrvParser
+    assert registry.get("hrv_status") is FitHrvParser
+    assert registry.get(49) is FitSleepParser
+    assert registry.get("settings") is None
+    assert "SESSION" in registry.message_names("activity")
+
+
+def test_explicit_registration_wins_over_builtins():
+    custom = ParserRegistry(load_entry_points=False)
+    custom.register(CourseParser, ("activity",))
+    assert custom.get("activity") is CourseParser
+    assert custom.get("monitoring_b") is FitMonitoringParser
+    custom.unregister("activity")
+    assert custom.get("activity") is None
+
+
+def test_only_needed_messages_are_built(tmp_path):
+    custom = ParserRegistry(load_entry_points=False)
+    custom.register(CourseParser)
+    messages = activity_messages(10, laps=1)
+    messages[0] = file_id("course")
+    path = write_fit_file(tmp_path / "course.fit", messages)
+
+    result = FitGalgo(path, registry=custom).parse()
+    assert isinstance(result, CourseParser.Course)
+    assert result.built == {"FILE_ID": 1, "RECORD": 10}
+
+
+def test_not_supported_file_type(tmp_path):
+    path = write_fit_file(
+        tmp_path / "settings.fit", [file_id("settings"), *[record(i) for i in range(5)]]
+    )
+    result = FitGalgo(path).parse()
+    assert isinstance(result, FitError)
+    assert [e for e in result.errors if isinstance(e, NotSupportedFitFileException)]
+
+
+def test_activity_from_default_registry(tmp_path):
+    path = write_fit_file(tmp_path / "running.fit", activity_messages(30, laps=3))
+    activity = FitGalgo(path).parse()
+    assert isinstance(activity, DistanceActivity)
+    assert len(activity.records) == 30
+    assert len(activity.laps) == 3
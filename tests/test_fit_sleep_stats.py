@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone
+
+from fit_galgo.analytics.sleep import NightlySleepTable, SleepRun, sleep_stats
+from fit_galgo.fit.models import FileId, Sleep, SleepAssessment, SleepLevel
+
+NIGHT = datetime(2023, 9, 26, 22, 0, tzinfo=timezone.utc)
+
+# (minute, level): awake, light, deep, light, awake, rem, light, awake.
+LEVELS = [
+    (0, 1), (10, 2), (20, 2), (30, 3), (90, 2), (120, 1), (125, 4), (185, 2), (300, 1)
+]
+
+
+def build_sleep(night: datetime, score: int | None = None, levels=LEVELS) -> Sleep:
+    return Sleep(
+        fit_file_path="sleep.fit",
+        file_id=FileId(type="sleep"),
+        assessment=SleepAssessment(overall_sleep_score=score),
+        levels=[
+            SleepLevel(timestamp=night + timedelta(minutes=m), sleep_level=level)
+            for m, level in reversed(levels)
+        ]
+    )
+
+
+def test_sleep_stats():
+    sleep = build_sleep(NIGHT)
+    assert sleep.dates == [NIGHT, NIGHT + timedelta(minutes=300)]
+
+    stats = sleep_stats(sleep)
+    start = int(NIGHT.timestamp())
+    assert stats.hypnogram == [
+        SleepRun("awake", start, 600),
+        SleepRun("light", start + 600, 1200),
+        SleepRun("deep", start + 1800, 3600),
+        SleepRun("light", start + 5400, 1800),
+        SleepRun("awake", start + 7200, 300),
+        SleepRun("rem", start + 7500, 3600),
+        SleepRun("light", start + 11100, 6900),
+        SleepRun("awake", start + 18000, 60)
+    ]
+    assert stats.durations == {
+        "unmeasurable": 0, "awake": 960, "light": 9900, "deep": 3600, "rem": 3600
+    }
+    assert stats.transitions[("light", "deep")] == 1
+    assert stats.transitions[("awake", "light")] == 1
+    assert stats.transitions[("light", "awake")] == 2
+    assert stats.onset == NIGHT + timedelta(minutes=10)
+    assert stats.wake == NIGHT + timedelta(minutes=300)
+    assert stats.awakenings == 1
+    assert stats.asleep == 17100
+    assert stats.in_bed == 18060
+
+
+def test_empty_night():
+    sleep = build_sleep(NIGHT, levels=[])
+    assert sleep.dates == []
+    stats = sleep_stats(sleep)
+    assert stats.start is None
+    assert stats.hypnogram == []
+    assert stats.asleep == 0
+
+    one_level = build_sleep(NIGHT, levels=[(0, 2)])
+    assert one_level.dates == [NIGHT, NIGHT]
+    assert sleep_stats(one_level).asleep == 60
+
+
+def test_nightly_sleep_table():
+    table = NightlySleepTable.from_sleeps(
+        build_sleep(NIGHT + timedelta(days=day), score)
+        for day, score in ((2, 80), (0, None), (1, 70))
+    )
+    assert len(table) == 3
+    assert list(table["start"]) == [
+        int((NIGHT + timedelta(days=day)).timestamp()) for day in range(3)
+    ]
+    assert list(table["overall_sleep_score"]) == [-1, 70, 80]
+    assert list(table["deep"]) == [3600] * 3
+    averages = table.averages()
+    assert averages["asleep"] == 17100
+    assert averages["overall_sleep_score"] == 75
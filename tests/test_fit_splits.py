@@ -0,0 +1,76 @@
+import math
+
+from fit_galgo.galgo import FitGalgo
+from fit_galgo.analytics.splits import (
+    activity_splits,
+    boundaries_by_distance,
+    boundaries_by_time,
+    compute_splits
+)
+from fit_galgo.fit.columnar import RecordTable
+from fit_galgo.fit.models import DistanceActivity
+from .fit_builder import activity_messages, record, write_fit_file
+
+
+def assert_split_totals(splits, n_records: int) -> None:
+    assert sum(s.records for s in splits) == n_records
+    assert sum(s.distance for s in splits) == (n_records - 1) * 3.0
+    assert sum(s.elapsed for s in splits) == n_records - 1
+
+
+def test_splits_by_distance_and_time(tmp_path):
+    # Records every second and 3 meters, altitude from 100 to 119 (and back).
+    path = write_fit_file(tmp_path / "running.fit", activity_messages(600, laps=3))
+    activity = FitGalgo(path).parse()
+    assert isinstance(activity, DistanceActivity)
+    table: RecordTable = activity.record_table
+    assert len(table) == 600
+    assert activity.record_table is table
+
+    ends = boundaries_by_distance(table, 1000.0)
+    assert ends == [335, 600]
+    splits = activity_splits(activity, distance=1000.0)
+    assert [s.distance for s in splits] == [1002.0, 795.0]
+    assert splits[0].elapsed == 334
+    assert splits[0].pace == 334 / 1002.0 * 1000
+    assert_split_totals(splits, 600)
+
+    assert boundaries_by_time(table, 60) == [61 + 60 * i for i in range(9)] + [600]
+    splits = activity_splits(activity, time=60)
+    assert len(splits) == 10
+    assert splits[0].elapsed == 60
+    assert splits[0].avg_heart_rate == sum(120 + i % 30 for i in range(61)) / 61
+    assert splits[0].max_heart_rate == 149
+    assert_split_totals(splits, 600)
+
+    # The altitude goes up 19 meters and falls 19 meters every 20 records.
+    splits = activity_splits(activity, time=60, elevation_threshold=3.0)
+    assert sum(s.gain for s in splits) == 29 * 18 + 18
+    assert sum(s.loss for s in splits) == 29 * 18 + 18 - 18
+    no_threshold = activity_splits(activity, time=60, elevation_threshold=20.0)
+    assert sum(s.gain for s in no_threshold) == 0
+
+
+def test_splits_by_laps(tmp_path):
+    path = write_fit_file(tmp_path / "running.fit", activity_messages(90, laps=3))
+    activity = FitGalgo(path).parse()
+
+    splits = activity_splits(activity)
+    assert [s.records for s in splits] == [31, 30, 29]
+    assert [s.elapsed for s in splits] == [30, 30, 29]
+    assert_split_totals(splits, 90)
+
+
+def test_splits_with_missing_values(tmp_path):
+    messages = activity_messages(10, laps=1)
+    messages[1:11] = [
+        record(i, heart_rate=None, enhanced_altitude=None) if i % 2 else record(i)
+        for i in range(10)
+    ]
+    activity = FitGalgo(write_fit_file(tmp_path / "running.fit", messages)).parse()
+    table = activity.record_table
+    assert math.isnan(table["heart_rate"][1])
+
+    splits = compute_splits(table, [5, 10])
+    assert splits[0].avg_heart_rate == (120 + 122 + 124) / 3
+    assert splits[1].max_heart_rate == 128
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from fit_galgo.fit.models import Activity, FileId, Session
+from fit_galgo.index.summary import SummaryIndex
+
+START = datetime(2023, 12, 30, 8, 0, tzinfo=timezone.utc)
+
+
+def build_activity(
+        path: str, days: int, sport: str = "running", distance: float = 10000.0,
+        ascent: float | None = None
+) -> Activity:
+    start = START + timedelta(days=days)
+    return Activity(
+        fit_file_path=path,
+        file_id=FileId(type="activity"),
+        session=Session(
+            message_index=0, timestamp=start + timedelta(hours=1), start_time=start,
+            total_elapsed_time=3600.0, total_timer_time=3500.0,
+            sport=sport, sub_sport="generic", total_distance=distance,
+            total_ascent=ascent
+        )
+    )
+
+
+def build_index(path: str = ":memory:") -> SummaryIndex:
+    index = SummaryIndex(path)
+    index.add_activity(build_activity("a.fit", 0, distance=5000.0, ascent=50.0))
+    index.add_activity(build_activity("b.fit", 3, distance=21097.0))
+    index.add_activity(build_activity("c.fit", 4, sport="cycling", distance=60000.0))
+    index.add_activity(build_activity("d.fit", 40, distance=10000.0, ascent=120.0))
+    return index
+
+
+def test_totals_by_period_and_sport():
+    index = build_index()
+    assert len(index) == 4 and "a.fit" in index
+
+    totals = index.totals("year")
+    assert [(t.period, t.sport, t.count, t.distance) for t in totals] == [
+        ("2023", "running", 1, 5000.0),
+        ("2024", "cycling", 1, 60000.0),
+        ("2024", "running", 2, 31097.0)
+    ]
+    assert totals[0].sub_sport is None
+    # 2023-12-30 is in the ISO week 52 of 2023, 2024-01-02 in the week 1 of 2024.
+    assert [t.period for t in index.totals("week", group_by=())] == [
+        "2023-W52", "2024-W01", "2024-W06"
+    ]
+    (total,) = index.totals(group_by=(), sport="running")
+    assert (total.count, total.distance, total.ascent, total.elapsed) == (
+        3, 36097.0, 170.0, 3 * 3600.0
+    )
+    with pytest.raises(ValueError):
+        index.totals("day")
+
+
+def test_top_and_running_totals():
+    index = build_index()
+    assert [s.path for s in index.top("distance", k=2)] == ["c.fit", "b.fit"]
+    assert [s.path for s in index.top("distance", k=2, sport="running")] == [
+        "b.fit", "d.fit"
+    ]
+    assert [s.path for s in index.top("ascent", ascending=True)] == ["a.fit", "d.fit"]
+    assert [tuple(r) for r in index.running_totals("distance", sport="running")] == [
+        ("2023-12", 5000.0, 5000.0),
+        ("2024-01", 21097.0, 26097.0),
+        ("2024-02", 10000.0, 36097.0)
+    ]
+
+
+def test_aggregates_are_updated_incrementally(tmp_path):
+    path = str(tmp_path / "summary.db")
+    with build_index(path) as index:
+        # Replacing an activity changes the totals instead of adding them.
+        index.add_activity(build_activity("b.fit", 3, distance=42195.0))
+        assert index.remove("c.fit")
+        assert not index.remove("c.fit")
+        expected = index.totals("month", group_by=("sport", "sub_sport"))
+        assert [(t.period, t.sport, t.distance) for t in expected] == [
+            ("2023-12", "running", 5000.0),
+            ("2024-01", "running", 42195.0),
+            ("2024-02", "running", 10000.0)
+        ]
+
+    with SummaryIndex(path) as index:
+        assert len(index) == 3
+        assert index.totals("month", group_by=("sport", "sub_sport")) == expected
+        index.rebuild_aggregates()
+        assert index.totals("month", group_by=("sport", "sub_sport")) == expected
+        assert [s.path for s in index.sessions(start=START + timedelta(days=1))] == [
+            "b.fit", "d.fit"
+        ]
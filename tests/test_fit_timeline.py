@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+
+from fit_galgo.analytics.timeline import MergeRule, Timeline, merge_streams
+from fit_galgo.fit.models import (
+    FileId,
+    Hrv,
+    HrvStatusSummary,
+    Monitor,
+    Monitoring,
+    MonitoringInfo,
+    Sleep,
+    SleepAssessment,
+    SleepLevel,
+    StressLevel
+)
+from fit_galgo.utils.date_utils import FIT_EPOCH_S
+
+# Midnight in Europe/Madrid.
+DAY = datetime(2023, 9, 26, 22, 0, tzinfo=timezone.utc)
+
+
+def epoch(dt: datetime) -> int:
+    return int(dt.timestamp())
+
+
+def file_id(file_type: str, created: datetime) -> FileId:
+    return FileId(type=file_type, time_created=created)
+
+
+def timestamp_16(dt: datetime) -> int:
+    return (epoch(dt) - FIT_EPOCH_S) & 0xFFFF
+
+
+def monitor(day: datetime, created: datetime, heart_rates: list[int], steps: int):
+    return Monitor(
+        fit_file_path=f"{created}.fit",
+        file_id=file_id("monitoring_b", created),
+        zone_info="Europe/Madrid",
+        monitoring_info=MonitoringInfo(timestamp=day),
+        monitorings=[
+            Monitoring(timestamp=day, steps=steps, activity_type="walking"),
+            Monitoring(timestamp=day, steps=100, activity_type="running"),
+            *[
+                Monitoring(
+                    heart_rate=hr,
+                    timestamp_16=timestamp_16(day + timedelta(minutes=i)),
+                    last_timestamp=epoch(day)
+                ) for i, hr in enumerate(heart_rates)
+            ]
+        ],
+        stress_levels=[StressLevel(
+            stress_level_value=20, stress_level_time=day + timedelta(hours=1)
+        )]
+    )
+
+
+def hrv(night: datetime, created: datetime, average: float) -> Hrv:
+    return Hrv(
+        fit_file_path=f"hrv{created}.fit",
+        file_id=file_id("hrv_status", created),
+        summary=HrvStatusSummary(timestamp=night, last_night_average=average)
+    )
+
+
+def test_merge_streams():
+    a = [(1, 0, 10.0), (2, 0, 20.0), (4, 0, 40.0)]
+    b = [(2, 1, 25.0), (3, 1, 30.0)]
+    assert merge_streams([a, b], MergeRule.NEWEST) == [
+        (1, 0, 10.0), (2, 0, 20.0), (3, 1, 30.0), (4, 0, 40.0)
+    ]
+    assert [e[2] for e in merge_streams([a, b], MergeRule.MAX)] == [10, 25, 30, 40]
+
+
+def test_timeline_deduplicates_overlapping_files():
+    next_day = DAY + timedelta(days=1)
+    first_sync = monitor(DAY, DAY + timedelta(hours=12), [60, 61, 62], 1000)
+    second_sync = monitor(DAY, DAY + timedelta(hours=20), [60, 65, 62, 63], 3000)
+    timeline = Timeline()
+    timeline.extend([
+        monitor(next_day, next_day + timedelta(hours=20), [70, 71], 500),
+        second_sync,
+        first_sync,
+        hrv(DAY, DAY + timedelta(hours=8), 40.0),
+        hrv(DAY, DAY + timedelta(hours=9), 42.0),
+        hrv(next_day, next_day + timedelta(hours=8), 45.0)
+    ])
+
+    heart_rate = timeline.series("heart_rate")
+    minutes = [(ts - epoch(DAY)) // 60 for ts in heart_rate.timestamps]
+    assert minutes == [0, 1, 2, 3, 24 * 60, 24 * 60 + 1]
+    assert list(heart_rate.values) == [60, 65, 62, 63, 70, 71]
+
+    steps = timeline.series("steps")
+    assert list(steps.timestamps) == [epoch(DAY), epoch(next_day)]
+    assert list(steps.values) == [3100, 600]
+    assert len(timeline.series("stress_level")) == 2
+
+    first_day = timeline.between("heart_rate", DAY, DAY + timedelta(hours=23))
+    assert list(first_day.values) == [60, 65, 62, 63]
+
+    assert [h.last_night_average for h in timeline.hrvs] == [42.0, 45.0]
+
+    # New files are merged with the merged data.
+    timeline.add(monitor(DAY, DAY + timedelta(hours=22), [60, 66], 3500))
+    assert list(timeline.series("heart_rate").values)[:4] == [60, 66, 62, 63]
+    assert list(timeline.series("steps").values) == [3600, 600]
+
+
+def test_timeline_sleeps():
+    night = DAY + timedelta(hours=1)
+    sleeps = [
+        Sleep(
+            fit_file_path=f"sleep{i}.fit",
+            file_id=file_id("sleep", night + timedelta(hours=8 + i)),
+            assessment=SleepAssessment(overall_sleep_score=80 + i),
+            levels=[
+                SleepLevel(timestamp=night + timedelta(minutes=m), sleep_level=1)
+                for m in (30, 0, 60)
+            ]
+        ) for i in range(2)
+    ]
+    timeline = Timeline()
+    timeline.extend([sleeps[1], sleeps[0], None])
+    assert [s.overall_sleep_score for s in timeline.sleeps] == [81]
@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta, timezone
+
+from fit_galgo.galgo import FitGalgo
+from fit_galgo.fit.models import FileId, Monitor, Monitoring, MonitoringInfo
+from fit_galgo.utils.date_utils import (
+    FIT_EPOCH_S,
+    epoch_to_datetime,
+    resolve_timestamp_16,
+    resolve_timestamp_min_8
+)
+from .fit_builder import file_id, write_fit_file
+
+
+def epoch(dt: datetime) -> int:
+    return int(dt.timestamp())
+
+
+def fit_low_bits(dt: datetime, mask: int, unit: int = 1) -> int:
+    return ((epoch(dt) - FIT_EPOCH_S) // unit) & mask
+
+
+def test_resolve_timestamp_16():
+    last = datetime(2023, 9, 26, 22, 0, tzinfo=timezone.utc)
+    same = datetime(2023, 9, 26, 23, 30, tzinfo=timezone.utc)
+    next_day = datetime(2023, 9, 27, 1, 15, 20, tzinfo=timezone.utc)
+
+    resolved = resolve_timestamp_16(
+        [epoch(last), epoch(last), epoch(last)],
+        [fit_low_bits(last, 0xFFFF), fit_low_bits(same, 0xFFFF),
+         fit_low_bits(next_day, 0xFFFF)]
+    )
+    assert list(resolved) == [epoch(last), epoch(same), epoch(next_day)]
+
+
+def test_resolve_timestamp_16_rollover():
+    # The 16 lower bits overflow between last and ts.
+    fit_last = 0x12345FFF0
+    last = FIT_EPOCH_S + fit_last
+    resolved = resolve_timestamp_16([last], [(fit_last + 0x20) & 0xFFFF])
+    assert resolved[0] == last + 0x20
+
+
+def test_resolve_timestamp_16_chain():
+    # Each value is the reference of the next one (they span more than the
+    # 18 hours of a timestamp_16) until there's a new full timestamp.
+    last = datetime(2023, 9, 26, 22, 0, tzinfo=timezone.utc)
+    later = [last + timedelta(hours=10 * i) for i in range(1, 5)]
+    new_last = later[-1] + timedelta(days=3)
+    resolved = resolve_timestamp_16(
+        [epoch(last)] * 4 + [epoch(new_last)],
+        [fit_low_bits(dt, 0xFFFF) for dt in [*later, new_last]]
+    )
+    assert list(resolved) == [epoch(dt) for dt in [*later, new_last]]
+
+
+def test_resolve_timestamp_min_8_rollover():
+    # The 8 lower bits of the minutes overflow between last and ts.
+    last = datetime(2023, 9, 26, 22, 0, 30, tzinfo=timezone.utc)
+    later = datetime(2023, 9, 27, 1, 0, tzinfo=timezone.utc)
+    assert fit_low_bits(later, 0xFF, 60) < fit_low_bits(last, 0xFF, 60)
+    resolved = resolve_timestamp_min_8([epoch(last)], [fit_low_bits(later, 0xFF, 60)])
+    assert resolved[0] == epoch(later)
+
+
+def test_resolve_timestamp_min_8_chain():
+    # 3 hours apart: the third is more than 256 minutes after last.
+    last = datetime(2023, 9, 26, 22, 0, tzinfo=timezone.utc)
+    later = [last + timedelta(hours=3 * i) for i in range(1, 4)]
+    resolved = resolve_timestamp_min_8(
+        [epoch(last)] * 3, [fit_low_bits(dt, 0xFF, 60) for dt in later]
+    )
+    assert list(resolved) == [epoch(dt) for dt in later]
+
+
+def test_monitor_heart_rates_timestamp_min_8():
+    # The timestamp_16 decoded between them is the reference of the last one
+    # (more than 256 minutes after the full timestamp).
+    last = datetime(2023, 9, 26, 22, 0, tzinfo=timezone.utc)
+    hr_datetimes = [
+        last + timedelta(minutes=1),
+        last + timedelta(hours=2, minutes=10),
+        last + timedelta(hours=5)
+    ]
+    monitor = Monitor(
+        fit_file_path="monitor.fit",
+        file_id=FileId(type="monitoring_b"),
+        zone_info="Europe/Madrid",
+        monitoring_info=MonitoringInfo(timestamp=last),
+        monitorings=[
+            Monitoring(
+                heart_rate=60,
+                timestamp_min_8=fit_low_bits(hr_datetimes[0], 0xFF, 60),
+                last_timestamp=epoch(last)
+            ),
+            Monitoring(
+                heart_rate=61,
+                timestamp_16=fit_low_bits(hr_datetimes[1], 0xFFFF),
+                last_timestamp=epoch(last)
+            ),
+            Monitoring(
+                heart_rate=62,
+                timestamp_min_8=fit_low_bits(hr_datetimes[2], 0xFF, 60),
+                last_timestamp=epoch(hr_datetimes[1])
+            )
+        ]
+    )
+    assert [hr.datetime_utc for hr in monitor.heart_rates] == hr_datetimes
+    assert [hr.heart_rate for hr in monitor.heart_rates] == [60, 61, 62]
+
+
+def test_decoded_timestamp_16_chain(tmp_path):
+    # Heart rates and intensities every 10 hours: the ones of a kind are 20
+    # hours apart, so they're resolved with the ones of the other kind.
+    day = datetime(2023, 9, 26, 22, 0, tzinfo=timezone.utc)
+    later = [day + timedelta(hours=10 * i) for i in range(1, 7)]
+    path = write_fit_file(tmp_path / "monitor.fit", [
+        file_id("monitoring_b"),
+        ("MONITORING_INFO", {"timestamp": day, "activity_type": ["walking", "running"]}),
+        *[
+            ("MONITORING", {
+                "timestamp_16": fit_low_bits(dt, 0xFFFF),
+                **({"heart_rate": 60} if i % 2 else {"moderate_activity_minutes": 1})
+            }) for i, dt in enumerate(later)
+        ]
+    ])
+    for columnar in (False, True):
+        monitor = FitGalgo(path, "Europe/Madrid", columnar=columnar).parse()
+        assert isinstance(monitor, Monitor)
+        assert [hr.datetime_utc for hr in monitor.heart_rates] == later[1::2]
+        assert [a.datetime_utc for a in monitor.activity_intensities] == later[::2]
+
+
+def test_last_timestamp_is_not_serialized():
+    monitoring = Monitoring(heart_rate=60, timestamp_16=1, last_timestamp=FIT_EPOCH_S)
+    assert monitoring.last_timestamp == FIT_EPOCH_S
+    assert "last_timestamp" not in monitoring.model_dump()
+    assert "last_timestamp" not in monitoring.model_dump_json()
+
+
+def test_monitor_heart_rates_across_days():
+    info_timestamp = datetime(2023, 9, 26, 22, 0, tzinfo=timezone.utc)
+    hr_datetimes = [
+        datetime(2023, 9, 26, 22, 5, tzinfo=timezone.utc),
+        datetime(2023, 9, 27, 0, 5, tzinfo=timezone.utc),
+        datetime(2023, 9, 27, 3, 0, tzinfo=timezone.utc)
+    ]
+    last = epoch(info_timestamp)
+    monitor = Monitor(
+        fit_file_path="monitor.fit",
+        file_id=FileId(type="monitoring_b"),
+        zone_info="Europe/Madrid",
+        monitoring_info=MonitoringInfo(timestamp=info_timestamp),
+        monitorings=[
+            Monitoring(timestamp=info_timestamp),
+            *[
+                Monitoring(
+                    heart_rate=60 + i,
+                    timestamp_16=fit_low_bits(dt, 0xFFFF),
+                    last_timestamp=last
+                ) for i, dt in enumerate(hr_datetimes)
+            ],
+            Monitoring(
+                moderate_activity_minutes=3,
+                timestamp_16=fit_low_bits(hr_datetimes[1], 0xFFFF)
+            )
+        ]
+    )
+
+    assert [hr.datetime_utc for hr in monitor.heart_rates] == hr_datetimes
+    assert [hr.heart_rate for hr in monitor.heart_rates] == [60, 61, 62]
+    assert list(monitor.heart_rate_series.timestamps) == [epoch(d) for d in hr_datetimes]
+
+    intensities = monitor.activity_intensities
+    assert len(intensities) == 1
+    assert intensities[0].datetime_utc == hr_datetimes[1]
+    assert intensities[0].moderate_minutes == 3
+    assert intensities[0].vigorous_minutes == 0
+    assert epoch_to_datetime(last) == info_timestamp
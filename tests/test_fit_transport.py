@@ -0,0 +1,99 @@
+import pickle
+
+import pytest
+
+from fit_galgo.galgo import FitGalgo
+from fit_galgo.fit.columnar import LazyList
+from fit_galgo.fit.models import DistanceActivity, FitError, Monitor
+from fit_galgo.index.geo import GeoIndex
+from fit_galgo.pool import FitPool
+from fit_galgo.transport import SharedResult, receive, share
+from .fit_builder import (
+    file_id,
+    lap,
+    monitoring_messages,
+    record,
+    session,
+    write_activity,
+    write_fit_file
+)
+
+
+def test_activity_records_travel_in_shared_memory(tmp_path):
+    path = write_activity(tmp_path / "running.fit", 2000, laps=4)
+    activity = FitGalgo(path).parse()
+    assert isinstance(activity, DistanceActivity)
+
+    shared = share(activity)
+    assert isinstance(shared, SharedResult)
+    assert len(activity.records) == 2000
+    assert len(pickle.dumps(shared)) * 10 < len(pickle.dumps(activity))
+
+    received = receive(pickle.loads(pickle.dumps(shared)))
+    # The records stay by columns until they're used.
+    assert isinstance(received.records, LazyList) and not received.records.built
+    assert {k: v.tobytes() for k, v in received.to_arrays().items()} == {
+        k: v.tobytes() for k, v in activity.to_arrays().items()
+    }
+    assert received.altitude == activity.altitude
+    assert received.laps == activity.laps
+    assert len(received.records) == 2000
+    assert GeoIndex().add_activity(received) and not received.records.built
+    loaded = pickle.loads(pickle.dumps(received))
+    assert not loaded.records.built
+
+    assert received.records == activity.records
+    assert received.records[5].model_fields_set == activity.records[5].model_fields_set
+    assert loaded.model_dump() == activity.model_dump()
+    # The block is unlinked once received.
+    with pytest.raises(FileNotFoundError):
+        shared.buffers.receive()
+
+
+def test_every_record_field_travels(tmp_path):
+    messages = [
+        file_id("activity"),
+        *[record(i, temperature=20 + i % 3, activity_type="running")
+          for i in range(50)],
+        record(50, fractional_cadence=0.5),
+        lap(0, 0, 50),
+        session(51)
+    ]
+    path = write_fit_file(tmp_path / "running.fit", messages)
+    for fast in (False, True):
+        activity = FitGalgo(path, fast=fast).parse()
+        received = receive(pickle.loads(pickle.dumps(share(activity))))
+        assert received.records == activity.records
+        assert received.records[49].temperature == 21
+        assert received.records[50].temperature is None
+        assert received.records[50].fractional_cadence == 0.5
+        assert received.records[0].activity_type == "running"
+        first, received_first = activity.records[0], received.records[0]
+        assert received_first.__class__.__name__ == first.__class__.__name__
+        assert received_first.model_fields_set == first.model_fields_set
+
+
+def test_monitor_and_other_results(tmp_path):
+    path = write_fit_file(tmp_path / "monitor.fit", monitoring_messages())
+    monitor = FitGalgo(path, "Europe/Madrid").parse()
+    assert isinstance(monitor, Monitor)
+
+    received = receive(pickle.loads(pickle.dumps(share(monitor))))
+    assert received.monitorings == []
+    assert len(received.monitoring_table) == 34
+    assert received.total_steps == monitor.total_steps == 2000
+    assert received.heart_rates == monitor.heart_rates
+
+    error = FitError(fit_file_path="error.fit", errors=[])
+    assert share(error) is error and receive(error) is error
+
+
+def test_pool_with_shared_memory(tmp_path):
+    paths = [write_activity(tmp_path / f"activity{i}.fit", 100 + i) for i in range(4)]
+    with FitPool(max_workers=2, transport="shared_memory") as pool:
+        results = list(pool.map(paths))
+        assert [path for path, _ in results] == paths
+        for i, (_, activity) in enumerate(results):
+            assert isinstance(activity, DistanceActivity)
+            assert len(activity.record_table) == 100 + i
+        assert len(pool.submit_file(paths[0]).result().record_table) == 100